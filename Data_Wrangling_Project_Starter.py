@@ -13,19 +13,9 @@
 # Included detailed code comments for readability and understanding.
 # Required packages were installed to facilitate the data wrangling process.
 
-# In[1]:
-
-
-get_ipython().system('python -m pip install kaggle==1.6.12')
-
-
-# In[2]:
-
-
-get_ipython().system('pip install --target=/workspace ucimlrepo numpy==1.24.3')
-
-
-# **Note:** Restart the kernel to use updated package(s).
+# **Note:** Install the project once with `pip install -e ".[all]"` before running the notebook; the
+# reusable steps live in the `income_health` package and the same work can be scheduled headlessly
+# with `income-health fetch`, `income-health build` and `income-health report`.
 
 # ## 1. Gather data
 # 
@@ -99,12 +89,13 @@ get_ipython().system('pip install --target=/workspace ucimlrepo numpy==1.24.3')
 
 
 import pandas as pd
+from income_health.wdi import load_wdi, year_columns
 
 # File path for the CSV
 file_path = 'API_NY.GDP.MKTP.CD_DS2_en_csv_v2_2.csv'
 
-# Load the data with the correct encoding and handle bad lines
-gdp_data = pd.read_csv(file_path, encoding='utf-8', on_bad_lines='skip')
+# Load the data, skipping the metadata preamble and reading the year columns as numbers
+gdp_data = load_wdi(file_path)
 
 # Display the first 5 rows of the raw data to understand its structure
 print(gdp_data.head())
@@ -144,30 +135,28 @@ print(gdp_data.head())
 # In[78]:
 
 
-import requests
 import pandas as pd
+from income_health.cache import HTTPCache
+from income_health.gho import GHOClient
+
+# On-disk cache so repeated runs revalidate instead of downloading again
+http_cache = HTTPCache('.cache/http', ttl=24 * 3600)
+
+# Client for the GHO API; pages are fetched concurrently and retried with backoff
+client = GHOClient(page_size=1000, max_workers=4, cache=http_cache)
+
+# Fetching the mortality data, asking the server for only the columns we use
+# and parsing each page straight into typed columns
+try:
+    df = client.fetch('MORT_100', stream=True)
 
-# URL for the GHO API to fetch mortality data
-url = "https://ghoapi.azureedge.net/api/MORT_100"
-
-# Sending the request to fetch the data
-response = requests.get(url)
-
-# Checking the response status
-if response.status_code == 200:
-    try:
-        data = response.json()
-        
-        # Extracting data and converting it to a DataFrame
-        countries_data = data['value']
-        df = pd.json_normalize(countries_data)
-        
-        # Displaying the data
-        print(df[['SpatialDim', 'TimeDim', 'Value']])
-    except ValueError:
-        print("Error parsing JSON response")
-else:
-    print(f"Failed to fetch data. Status code: {response.status_code}")
+    # Displaying the data
+    print(df[['SpatialDim', 'TimeDim', 'Value']])
+except Exception as error:
+    print(f"Failed to fetch data: {error}")
+
+# How many pages came from the cache
+print(http_cache.stats.as_dict())
 
 
 # ## 2. Assess data
@@ -181,18 +170,21 @@ else:
 
 #FILL IN - Inspecting the dataframe visually
 print(gdp_data.head())
-print(gdp_data.info())
 
 
 # In[80]:
 
 
 #FILL IN - Inspecting the dataframe programmatically
-missing_values = gdp_data.isnull().sum()
-print(missing_values[missing_values > 0])
+from income_health.quality import null_counts, profile
+
+# One pass over the data collects null counts, dtypes and duplicate country codes;
+# the report is a plain dict, so it can be saved as JSON and checked on every refresh
+gdp_profile = profile(gdp_data, key=['Country Code'])
+print(null_counts(gdp_profile))
 
 
-# Issue and justification: *The visual inspection of the dataframe shows that there are a lot of NaN values in the dataset. Programmatically, the info() method and the isnull().sum() method confirm the presence of missing values across many columns. Missing data can lead to inaccurate analyses and should be handled appropriately by either imputing or removing the missing values.*
+# Issue and justification: *The visual inspection of the dataframe shows that there are a lot of NaN values in the dataset. Programmatically, the profile report confirms the presence of missing values across many columns. Missing data can lead to inaccurate analyses and should be handled appropriately by either imputing or removing the missing values.*
 
 # ### Quality Issue 2:
 
@@ -201,19 +193,22 @@ print(missing_values[missing_values > 0])
 
 #FILL IN - Inspecting the dataframe visually
 print(df.head())
-print(df.info())
 
 
 # In[82]:
 
 
 #FILL IN - Inspecting the dataframe programmatically
-missing_values = df.isnull().sum()
-print(missing_values[missing_values > 0])
+mortality_profile = profile(df, key=['SpatialDim', 'TimeDim'], country='SpatialDim', year='TimeDim',
+                            numeric=['Value'])
+print(null_counts(mortality_profile))
+print("All-null columns:", mortality_profile['all_null_columns'])
+print("Non-numeric values:", mortality_profile['non_numeric'])
+print("Rows sharing a (country, year) key:", mortality_profile['duplicate_keys']['rows'])
 
 
 # Issue and justification: *
-# The visual inspection of the dataframe shows that there are several columns with missing values, such as ParentLocationCode, ParentLocation, DataSourceDimType, DataSourceDim, Value, NumericValue, Low, High, and Comments. Programmatically, the info() method and the isnull().sum() method confirm the presence of missing values across these columns. Missing data can lead to inaccurate analyses and should be handled appropriately by either imputing or removing the missing values. Specifically, DataSourceDimType, DataSourceDim, Low, High, and Comments columns are entirely missing values, indicating that they might be unnecessary or require additional data sources for completion.*
+# The visual inspection of the dataframe shows that there are several columns with missing values, such as ParentLocationCode, ParentLocation, DataSourceDimType, DataSourceDim, Value, NumericValue, Low, High, and Comments. Programmatically, the profile report confirms the presence of missing values across these columns. Missing data can lead to inaccurate analyses and should be handled appropriately by either imputing or removing the missing values. Specifically, DataSourceDimType, DataSourceDim, Low, High, and Comments columns are entirely missing values, indicating that they might be unnecessary or require additional data sources for completion.*
 
 # ### Tidiness Issue 1:
 
@@ -232,7 +227,7 @@ print(gdp_data.columns)
 
 
 # Issue and justification: 
-# Issue: The first three rows contain metadata rather than actual data. This results in multiple rows that are not part of the actual dataset, making it untidy and requiring manual cleaning before analysis. Justification: Metadata rows should be excluded, and column names should be set appropriately to ensure the dataframe is tidy and ready for analysis.
+# Issue: The file starts with metadata rows ("Data Source", "Last Updated Date") rather than actual data. Read naively, they end up as data rows and the real header is lost, making it untidy and requiring manual cleaning before analysis. Justification: Metadata rows should be excluded, and column names should be set appropriately to ensure the dataframe is tidy and ready for analysis. `load_wdi` detects the preamble, keeps it in `gdp_data.attrs['wdi']` and uses the real header, with the years as integer column labels.
 
 # ### Tidiness Issue 2: 
 
@@ -263,9 +258,12 @@ print(df.columns)
 
 
 # FILL IN - Make copies of the datasets to ensure the raw dataframes 
-# are not impacted
-gdp_data_clean = gdp_data.copy()
-df_clean = df.copy()
+# are not impacted. With copy-on-write these are shallow copies: the data is
+# only duplicated for the columns that the cleaning steps actually modify
+from income_health.pipeline import enable_copy_on_write
+enable_copy_on_write()
+gdp_data_clean = gdp_data.copy(deep=False)
+df_clean = df.copy(deep=False)
 
 
 # ### **Quality Issue 1: FILL IN**
@@ -274,15 +272,10 @@ df_clean = df.copy()
 
 
 # FILL IN - Apply the cleaning strategy
-# Drop the first three rows
-gdp_data_clean = gdp_data_clean.drop([0, 1, 2])
-
-# Set the fourth row as the header
-gdp_data_clean.columns = gdp_data_clean.iloc[0]
-gdp_data_clean = gdp_data_clean.drop(3)
+# The metadata rows were already skipped by the loader, which also set the real header
 
-# Drop any remaining completely empty rows
-gdp_data_clean = gdp_data_clean.dropna(how='all')
+# Drop the rows that have no GDP value for any year
+gdp_data_clean = gdp_data_clean.dropna(subset=year_columns(gdp_data_clean), how='all')
 
 # Reset the index
 gdp_data_clean = gdp_data_clean.reset_index(drop=True)
@@ -295,7 +288,7 @@ gdp_data_clean = gdp_data_clean.reset_index(drop=True)
 print(gdp_data_clean.head())
 
 
-# Justification: *The metadata rows were removed, and the dataframe's column headers were set correctly. The cleaned dataframe now only contains relevant data.*
+# Justification: *The metadata rows were skipped when loading, and the dataframe's column headers are set correctly. Rows without any GDP value were removed, so the cleaned dataframe now only contains relevant data.*
 
 # ### **Quality Issue 2: FILL IN**
 
@@ -349,8 +342,9 @@ print(gdp_data_clean.columns)
 
 
 #FILL IN - Apply the cleaning strategy
-# Remove unnecessary columns, keeping only 'SpatialDim', 'TimeDim', 'IndicatorCode', and 'Value'
-relevant_columns = ['SpatialDim', 'TimeDim', 'IndicatorCode', 'Value']
+# Remove unnecessary columns, keeping only 'SpatialDim', 'TimeDim', 'IndicatorCode', the
+# disaggregation dimensions ('Dim1', 'Dim2') and 'Value'
+relevant_columns = ['SpatialDim', 'TimeDim', 'IndicatorCode', 'Dim1', 'Dim2', 'Value']
 df_clean = df_clean[relevant_columns]
 
 
@@ -374,15 +368,21 @@ print(df_clean.columns)
 # Verify the columns in the GDP dataset
 print(gdp_data_clean.columns)
 
-# Drop the '1960.0' column if it exists (or use the correct column name if different)
-gdp_data_clean = gdp_data_clean.drop(columns=['1960.0'], errors='ignore')
+from income_health.combine import combine_gdp_mortality
+from income_health.entities import load_entity_index
 
-# Merge the datasets
-combined_data = pd.merge(df_clean, gdp_data_clean, left_on='SpatialDim', right_on='Country Code', how='inner')
+# Index of countries and aggregates (World, regions, income groups) for both sources,
+# built once and cached; GHO codes such as GLOBAL resolve to their World Bank equivalents
+entities = load_entity_index(file_path, gho=df)
 
-# Rename columns for clarity
-combined_data = combined_data.rename(columns={'SpatialDim': 'Country', 'Value': 'Mortality Rate'})
+# Merge the datasets on country and year for 2014-2023. The mortality rows are first
+# averaged over the sex/age dimensions so that each country-year is matched with
+# exactly one GDP value, instead of every row being paired with every year of GDP.
+# Aggregates are left out so that only countries are compared
+combined_data = combine_gdp_mortality(df_clean, gdp_data_clean, years=(2014, 2023), entities=entities)
 
+# Countries present in only one of the two sources
+print(combined_data.attrs['unmatched'])
 
 
 # In[69]:
@@ -395,21 +395,11 @@ print(combined_data.head())
 # In[70]:
 
 
-# Remove the dots from the column names
-combined_data.columns = combined_data.columns.astype(str).str.replace('.0', '', regex=False)
+from income_health.reshape import year_to_timestamp
 
-# Filter the columns related to years between 2014 and 2023
-year_columns = [str(year) for year in range(2014, 2024) if str(year) in combined_data.columns]
-
-# Reshape the data using pd.melt
-combined_data_melted = pd.melt(combined_data, 
-                               id_vars=['Country', 'Country Code', 'Indicator Code', 'Mortality Rate', 'Country Name'], 
-                               value_vars=year_columns, 
-                               var_name='Year', 
-                               value_name='GDP')
-
-# Convert the "Year" column to DateTime format
-combined_data_melted['Date'] = pd.to_datetime(combined_data_melted['Year'])
+# The combined data already has one row per country and year (2014-2023);
+# convert the integer "Year" column to DateTime format without parsing strings
+combined_data_melted = combined_data.assign(Date=year_to_timestamp(combined_data['Year']))
 
 # Drop the old "Year" column
 combined_data_melted = combined_data_melted.drop(columns=['Year'])
@@ -418,59 +408,107 @@ combined_data_melted = combined_data_melted.drop(columns=['Year'])
 print(combined_data_melted.head())
 
 
-# In[71]:
+# ## 4. Update your data store
+# Update your local database/data store with the cleaned data, following best practices for storing your cleaned data:
+# 
+# - Must maintain different instances / versions of data (raw and cleaned data)
+# - Must name the dataset files informatively
+# - Ensure both the raw and cleaned data is saved to your database/data store
+
+# In[74]:
+
 
+# Assuming combined_data is the raw data and combined_data_melted is the cleaned data
+from datetime import datetime, timezone
+from income_health.store import SnapshotStore
 
-# Drop the 'Country' column
-combined_data_melted = combined_data_melted.drop(columns=['Country'])
+# Versioned store: each run adds a snapshot (Parquet files split by year) with a
+# manifest recording where the data came from, instead of overwriting a CSV
+store = SnapshotStore('data/store')
+provenance = {'source': 'https://ghoapi.azureedge.net/api/MORT_100',
+              'fetched_at': datetime.now(timezone.utc).isoformat(),
+              'extra': {'gdp_file': file_path, 'gdp_last_updated': gdp_data.attrs['wdi'].get('Last Updated Date')}}
 
-# Display the updated data
-print(combined_data_melted.head())
+# Save raw data
+raw_snapshot = store.write('raw_combined_data', combined_data, partition_by='Year', **provenance)
 
+# Save cleaned data
+cleaned_snapshot = store.write('cleaned_combined_data', combined_data_melted, partition_by='Date', **provenance)
 
-# In[72]:
+# Display confirmation messages
+print(f"Raw data saved as snapshot {raw_snapshot['id']} ({raw_snapshot['rows']} rows)")
+print(f"Cleaned data saved as snapshot {cleaned_snapshot['id']} ({cleaned_snapshot['rows']} rows)")
 
 
-# Get unique values in the 'Indicator Code' column
-unique_indicator_codes = combined_data_melted['Indicator Code'].unique()
+# In[ ]:
 
-# Display the unique values
-print(unique_indicator_codes)
 
+from income_health.sqlstore import SQLStore
 
-# In[73]:
+# Also load the observations into an indexed SQLite database so that slices
+# (indicators x countries x years) can be queried without reloading everything
+sql_store = SQLStore('data/income_health.sqlite')
+sql_store.load_wdi(gdp_data_clean, source=file_path)
+sql_store.load_gho(df, 'MORT_100', source='https://ghoapi.azureedge.net/api/MORT_100')
 
+# Example slice: GDP and mortality for the WHO African region, 2014-2023
+print(sql_store.query(['NY.GDP.MKTP.CD', 'MORT_100'], region='AFR', years=(2014, 2023)).head())
 
-# Drop the 'Country' column from combined_data_melted
-combined_data_melted = combined_data_melted.drop(columns=['Indicator Code'], errors='ignore')
 
-# Display the updated data
-print(combined_data_melted.head())
+# In[ ]:
 
 
-# ## 4. Update your data store
-# Update your local database/data store with the cleaned data, following best practices for storing your cleaned data:
-# 
-# - Must maintain different instances / versions of data (raw and cleaned data)
-# - Must name the dataset files informatively
-# - Ensure both the raw and cleaned data is saved to your database/data store
+from income_health.refresh import refresh
 
-# In[74]:
+# Later runs can refresh the stored panels incrementally: the GDP file is only parsed
+# again when its "Last Updated Date" changes, only GHO years newer than the stored ones
+# are downloaded, and only the affected country-years are recombined and rewritten
+refresh_result = refresh(store, file_path, client)
+print(refresh_result.as_dict())
 
 
-# Assuming combined_data is the raw data and combined_data_melted is the cleaned data
+# The same gather → clean → combine → analyze steps are also available as a pipeline of
+# named stages whose results are cached on disk; re-running it only re-executes the stages
+# whose code, parameters or inputs changed, and prune() drops results that are out of date.
 
-# Save raw data (if you still have the original raw data)
-raw_data_file_path = 'raw_combined_data.csv'
-combined_data.to_csv(raw_data_file_path, index=False)
+# In[ ]:
 
-# Save cleaned data
-cleaned_data_file_path = 'cleaned_combined_data.csv'
-combined_data_melted.to_csv(cleaned_data_file_path, index=False)
 
-# Display confirmation messages
-print(f"Raw data saved to: {raw_data_file_path}")
-print(f"Cleaned data saved to: {cleaned_data_file_path}")
+from income_health.pipeline import build_pipeline
+
+pipeline = build_pipeline(file_path, client, years=(2014, 2023))
+print("Stale stages:", pipeline.stale())
+pipeline_results = pipeline.run()
+print("Executed:", pipeline.executed)
+print("Pruned:", len(pipeline.prune()), "outdated stage results")
+pipeline_results['analyze'].head()
+
+
+# For inputs that do not fit in memory (e.g. sub-national or sex × age datasets), the same
+# steps can run out-of-core: the sources are read in batches, joined bucket by bucket
+# through temporary files and written to the store chunk by chunk, within a memory budget.
+# It goes to its own dataset so the in-memory snapshot above stays the latest one.
+
+# In[ ]:
+
+
+from income_health.chunked import run_chunked
+
+chunked_snapshot = run_chunked(file_path, client.iter_pages('MORT_100'), years=(2014, 2023),
+                               memory_budget=512 * 2**20, store=store, dataset='raw_combined_data_chunked')
+print(f"Chunked run stored snapshot {chunked_snapshot['id']} ({chunked_snapshot['rows']} rows)")
+
+
+# Every pipeline stage records its wall and CPU time, rows in and out, bytes downloaded and
+# peak memory. Set `INCOME_HEALTH_METRICS=<file>.jsonl` to log each record as JSON and
+# `INCOME_HEALTH_PROFILE=<stage>` (or `all`) to capture a cProfile summary of a stage.
+
+# In[ ]:
+
+
+from income_health.instrument import registry
+
+pd.DataFrame(registry.summary()).T
 
 
 # ## 5. Answer the research question
@@ -490,13 +528,13 @@ print(f"Cleaned data saved to: {cleaned_data_file_path}")
 
 #Visual 1 - FILL IN
 import matplotlib.pyplot as plt
+from income_health.plots import density_scatter
 
-# Plot GDP vs Mortality Rate
-plt.figure(figsize=(10, 6))
-plt.scatter(combined_data_melted['GDP'], combined_data_melted['Mortality Rate'], alpha=0.5)
-plt.title('GDP vs Mortality Rate (2014-2023)')
-plt.xlabel('GDP (Current US$)')
-plt.ylabel('Mortality Rate')
+# Plot GDP (log scale) vs Mortality Rate as a 2D histogram, so the cost of drawing does not
+# grow with the number of rows; a few countries are highlighted on top
+fig, ax = plt.subplots(figsize=(10, 6))
+density_scatter(combined_data_melted, x='GDP', y='Mortality Rate', highlight=['USA', 'IND', 'NGA'], ax=ax,
+                title='GDP vs Mortality Rate (2014-2023)', path='figures/gdp_vs_mortality.png')
 plt.show()
 
 
@@ -509,16 +547,14 @@ plt.show()
 
 
 #Visual 2 - FILL IN
-import seaborn as sns
-
-# Plot GDP over the years for different countries
-plt.figure(figsize=(12, 6))
-sns.lineplot(data=combined_data_melted, x='Date', y='GDP', hue='Country Name', markers=True)
-plt.title('GDP Over Time for Different Countries (2014-2023)')
-plt.xlabel('Year')
-plt.ylabel('GDP (Current US$)')
-plt.legend(title='Country Name', bbox_to_anchor=(1.05, 1), loc='upper left')
-plt.tight_layout()
+from income_health.plots import timeseries_plot
+
+# Plot GDP over the years for the 10 countries with the largest GDP; the per-country
+# series are computed once and drawn together instead of one hue per country
+fig, ax = plt.subplots(figsize=(12, 6))
+timeseries_plot(combined_data_melted, value='GDP', entity='Country Name', year='Date', top=10, ax=ax,
+                title='GDP Over Time for Different Countries (2014-2023)', path='figures/gdp_over_time.png')
+ax.set_ylabel('GDP (Current US$)')
 plt.show()
 
 
@@ -526,12 +562,85 @@ plt.show()
 # 
 # By analyzing the mortality rates over time, we can identify which countries have improved or worsened, and correlate these changes with relevant factors such as healthcare infrastructure, policies, and economic conditions.
 
+# To put numbers on both questions, the combined data is turned into one country × year array
+# per indicator and every correlation is computed for all countries at once: log GDP vs
+# mortality (question 1) and GDP growth vs the yearly change in mortality (question 2),
+# per country and pooled, with bootstrap confidence intervals for the pooled values.
+
+# In[ ]:
+
+
+import numpy as np
+from income_health.stats import Panel, bootstrap_ci, growth, difference, pooled, summarize
+
+panel = Panel.from_wide(combined_data, ['GDP', 'Mortality Rate'])
+country_stats = summarize(panel)
+print(country_stats.describe())
+
+log_gdp, mortality = np.log(panel.get('GDP')), panel.get('Mortality Rate')
+print('Pooled Pearson (log GDP vs mortality):', pooled(log_gdp, mortality))
+print('Pooled Spearman (log GDP vs mortality):', pooled(log_gdp, mortality, method='spearman'))
+print('95% CI:', bootstrap_ci(log_gdp, mortality, n_boot=500)['pooled'])
+print('Pooled Pearson (GDP growth vs mortality change):',
+      pooled(growth(panel.get('GDP'), 'log'), difference(mortality)))
+
 # ### **5.2:** Reflection
 # In 2-4 sentences, if you had more time to complete the project, what actions would you take? For example, which data quality and structural issues would you look into further, and what research questions would you further explore?
 
 # *Answer:* If I had more time to complete the project, I would focus on addressing any potential data quality issues, such as missing values or outliers in the "GDP" and "Mortality Rate" columns. I would also consider investigating the impact of other factors (e.g., healthcare expenditure, population density, or education levels) on mortality rates. Additionally, I would explore further research questions, such as how the relationship between GDP and mortality rate varies across regions or income groups.
 # 
 
+# As a first step in that direction, additional indicators (health expenditure, population,
+# education) can be loaded together with GDP and mortality into one long
+# (country, indicator, year, value) panel. Downloads run concurrently and parsing is spread
+# over all CPU cores.
+
+# In[ ]:
+
+
+from income_health.ingest import ingest
+
+indicator_panel = ingest(
+    wdi=['NY.GDP.MKTP.CD', 'SH.XPD.CHEX.GD.ZS', 'SP.POP.TOTL', 'SE.XPD.TOTL.GD.ZS'],
+    gho=['MORT_100'],
+    years=(2014, 2023),
+    cache=http_cache,
+)
+print(indicator_panel.groupby('indicator', observed=True).size())
+
+
+# The entity index also gives each country's region and income group, so the
+# combined data can be rolled up to answer the question by income level. The bundled GDP
+# file has no country metadata; the archive downloaded by `ingest` above ships
+# `Metadata_Country_*.csv`, so the index is rebuilt with it before rolling up.
+
+# In[ ]:
+
+
+from income_health.entities import wdi_metadata_path
+
+entities = load_entity_index(file_path, metadata_path=wdi_metadata_path(f'data/raw/{file_path}'), gho=df)
+
+# Total GDP and average mortality rate per World Bank income group and year
+income_rollup = entities.rollup(combined_data, by='income_group', columns=['GDP'], agg='sum').merge(
+    entities.rollup(combined_data, by='income_group', columns=['Mortality Rate'], agg='mean'))
+print(income_rollup)
+
+
+# The same question can be answered per slice: every region, income group, WHO region and
+# region × income group combination gets its own correlations and figures. The panel is
+# shared with the worker processes through a memory-mapped file, so the slices render in
+# parallel; `reports/slices/index.json` lists them all.
+
+# In[ ]:
+
+
+from income_health.report import batch_report
+
+slice_index = batch_report(combined_data, entities, 'reports/slices', n_boot=200)
+pd.DataFrame(slice_index['slices']).set_index('key')[['title', 'countries', 'pooled_pearson', 'pooled_growth_vs_change']]
+
+
 # In[ ]:
 
 
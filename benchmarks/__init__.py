@@ -0,0 +1,4 @@
+"""Offline benchmarks of the load → clean → combine → reshape → store path.
+
+Run ``python -m benchmarks.run --help`` from the repository root.
+"""
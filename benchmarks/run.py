@@ -0,0 +1,218 @@
+"""Benchmark every stage of the in-memory and chunked pipelines.
+
+Usage::
+
+    python -m benchmarks.run                       # scales 1, 10 and 100
+    python -m benchmarks.run --scales 1 10 --repeat 5
+    python -m benchmarks.run --compare benchmarks/results/<baseline>.json
+
+Each stage is timed ``--repeat`` times on inputs prepared by the previous
+stages, then run once more under ``tracemalloc`` with an RSS sampler to
+record its peak memory. Inputs are generated by
+:mod:`benchmarks.synthetic` and cached, so no network access is needed.
+Results are written as JSON; ``--compare`` reports stages whose median
+time or peak memory grew by more than ``--threshold`` against an older
+result file and exits with status 1 if there are any.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import GENERATOR_VERSION, generate
+from income_health.chunked import run_chunked
+from income_health.clean import clean_gdp, clean_mortality
+from income_health.combine import combine_gdp_mortality
+from income_health.gho import DEFAULT_FIELDS
+from income_health.instrument import RSSSampler
+from income_health.reshape import year_to_timestamp
+from income_health.store import SnapshotStore, _pyarrow
+from income_health.streaming import CHUNK_SIZE, parse_gho_stream
+from income_health.wdi import load_wdi
+
+YEARS = (2014, 2023)
+
+
+def _rows(value: Any) -> int | None:
+    if isinstance(value, pd.DataFrame):
+        return len(value)
+    if isinstance(value, dict) and "rows" in value:
+        return int(value["rows"])
+    return None
+
+
+def _file_chunks(path: str | os.PathLike) -> Iterator[bytes]:
+    """Read a saved GHO body in streaming-sized pieces instead of all at once."""
+    with open(path, "rb") as fh:
+        yield from iter(lambda: fh.read(CHUNK_SIZE), b"")
+
+
+def measure(func: Callable[[], Any], repeat: int) -> tuple[dict, Any]:
+    """Time ``func`` ``repeat`` times, then once more while tracing memory."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    sampler = RSSSampler(interval=0.005)
+    sampler.start()
+    tracemalloc.start()
+    try:
+        result = func()
+        _, traced_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        rss_peak = sampler.stop() - sampler.start_rss
+    return {
+        "wall_s": times,
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "peak_traced_bytes": traced_peak,
+        "peak_rss_delta_bytes": rss_peak,
+        "rows_out": _rows(result),
+    }, result
+
+
+def bench_scale(scale: float, data_dir: Path, repeat: int, seed: int = 0,
+                stages: set[str] | None = None) -> dict:
+    """Run every stage on the inputs of one scale."""
+    files = generate(data_dir, scale, seed)
+    results: dict[str, dict] = {}
+
+    def stage(name: str, func: Callable[[], Any]) -> Any:
+        if stages is not None and name not in stages:
+            return func()  # still needed as input of later stages
+        print(f"  x{scale:g} {name}...", end="", flush=True, file=sys.stderr)
+        results[name], value = measure(func, repeat)
+        print(f" {results[name]['median_s']:.3f}s", file=sys.stderr)
+        return value
+
+    gdp = stage("load_wdi", lambda: load_wdi(files["wdi"]))
+    gho = stage("parse_gho", lambda: parse_gho_stream(_file_chunks(files["gho"]), DEFAULT_FIELDS))
+    gdp_clean = stage("clean_gdp", lambda: clean_gdp(gdp))
+    gho_clean = stage("clean_mortality", lambda: clean_mortality(gho))
+    combined = stage("combine", lambda: combine_gdp_mortality(gho_clean, gdp_clean, years=YEARS))
+    stage("melt", lambda: combined.assign(Date=year_to_timestamp(combined["Year"])).drop(columns=["Year"]))
+
+    try:
+        _pyarrow()
+    except ImportError:
+        print("  pyarrow is not installed; skipping store stages", file=sys.stderr)
+    else:
+        def store_write():
+            # A fresh store every call: an existing one already holds the
+            # objects, and write() would only hash the frame.
+            with tempfile.TemporaryDirectory(prefix="income-health-bench-") as root:
+                return SnapshotStore(root).write("combined", combined)
+
+        stage("store_write", store_write)
+    stage("chunked_pipeline", lambda: run_chunked(files["wdi"], files["gho"], years=YEARS,
+                                                  memory_budget=64 * 2**20))
+
+    return {
+        "inputs": {kind: {"path": os.fspath(path), "bytes": os.path.getsize(path)} for kind, path in files.items()},
+        "rows": {"wdi": len(gdp), "gho": len(gho), "combined": len(combined)},
+        "stages": results,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             check=True, cwd=Path(__file__).resolve().parent)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.2) -> list[dict]:
+    """Stages of ``current`` that are slower or bigger than in ``baseline`` by more than ``threshold``."""
+    regressions = []
+    for scale, result in current["scales"].items():
+        old_stages = baseline.get("scales", {}).get(scale, {}).get("stages", {})
+        for name, new in result["stages"].items():
+            old = old_stages.get(name)
+            if old is None:
+                continue
+            for metric in ("median_s", "peak_traced_bytes"):
+                before, after = old.get(metric), new.get(metric)
+                if before and after and after > before * (1 + threshold):
+                    regressions.append({"scale": scale, "stage": name, "metric": metric,
+                                        "before": before, "after": after, "ratio": after / before})
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n")[0])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage")
+    parser.add_argument("--stages", nargs="+", help="only report these stages")
+    parser.add_argument("--data-dir", default=".cache/bench", help="where generated inputs are cached")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative growth")
+    args = parser.parse_args(argv)
+
+    commit = _git_commit()
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "commit": commit,
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "generator_version": GENERATOR_VERSION,
+            "repeat": args.repeat,
+        },
+        "scales": {},
+    }
+    for scale in args.scales:
+        report["scales"][f"{scale:g}"] = bench_scale(scale, Path(args.data_dir), args.repeat, args.seed,
+                                                     set(args.stages) if args.stages else None)
+
+    output = Path(args.output) if args.output else Path("benchmarks/results") / (
+        datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + f"-{commit or 'nogit'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+    for scale, result in report["scales"].items():
+        print(f"\nscale x{scale}  (combined rows: {result['rows']['combined']})")
+        for name, stats in result["stages"].items():
+            print(f"  {name:<18} {stats['median_s']:>9.3f} s  {stats['peak_traced_bytes'] / 2**20:>9.1f} MiB traced"
+                  f"  {stats['peak_rss_delta_bytes'] / 2**20:>9.1f} MiB RSS")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(baseline, report, args.threshold)
+        print(f"\nCompared with {args.compare} ({baseline['meta'].get('commit')}):")
+        for r in regressions:
+            print(f"  REGRESSION x{r['scale']} {r['stage']} {r['metric']}: "
+                  f"{r['before']:.4g} -> {r['after']:.4g} ({r['ratio']:.2f}x)")
+        if regressions:
+            return 1
+        print("  no regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
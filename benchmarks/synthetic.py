@@ -0,0 +1,127 @@
+"""Synthetic WDI and GHO inputs at a multiple of the bundled dataset's size.
+
+Scale 1 matches the bundled ``API_NY.GDP.MKTP.CD_DS2_en_csv_v2_2.csv``:
+266 entities with year columns 1960–2023 behind the usual metadata
+preamble. Scale *k* has *k* times as many entities. The GHO payload has
+one record per entity, year (2000–2023), sex (``Dim1``) and age group
+(``Dim2``); its entities are about 90% of the WDI codes plus a few codes
+WDI does not know, so it grows with the same factor. Both files are written in a streaming
+fashion, so generating scale 100 does not need the whole file in memory.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+BASE_ENTITIES = 266
+WDI_YEARS = range(1960, 2024)
+GHO_YEARS = range(2000, 2024)
+SEXES = ("SEX_BTSX", "SEX_MLE", "SEX_FMLE")
+AGE_GROUPS = ("AGEGROUP_YEARS0-4", "AGEGROUP_YEARS5-14")
+WHO_REGIONS = ("AFR", "AMR", "SEAR", "EUR", "EMR", "WPR")
+
+# Bump whenever the generated content changes, so cached inputs are rebuilt.
+GENERATOR_VERSION = 1
+
+
+def entity_codes(n: int) -> list[str]:
+    """``n`` distinct upper-case codes, three letters while they last."""
+    codes = []
+    for i in range(n):
+        letters = ""
+        value = i
+        while value or len(letters) < 3:
+            value, digit = divmod(value, 26)
+            letters = chr(ord("A") + digit) + letters
+        codes.append(letters)
+    return codes
+
+
+def write_wdi_csv(path: str | os.PathLike, scale: float = 1, seed: int = 0) -> Path:
+    """Write a WDI-shaped CSV with ``BASE_ENTITIES * scale`` rows."""
+    rng = np.random.default_rng(seed)
+    n = max(1, int(BASE_ENTITIES * scale))
+    codes = entity_codes(n)
+    years = np.asarray(WDI_YEARS)
+    # Coverage improves over time like the real file: most 1960s values are missing.
+    present = rng.random((n, len(years))) < np.linspace(0.35, 0.97, len(years))
+    level = np.exp(rng.normal(23, 2, size=(n, 1)))
+    growth = np.cumprod(1 + rng.normal(0.04, 0.05, size=(n, len(years))), axis=1)
+    values = np.where(present, level * growth, np.nan)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    width = 4 + len(years)
+    pad = "," * (width - 2)
+    with open(path, "w", encoding="utf-8", newline="") as fh:
+        fh.write(f"Data Source,World Development Indicators,{pad}\r\n")
+        fh.write("," * (width - 1) + "\r\n")
+        fh.write(f"Last Updated Date,11/13/2024,{pad}\r\n")
+        fh.write("," * (width - 1) + "\r\n")
+        fh.write("Country Name,Country Code,Indicator Name,Indicator Code,"
+                 + ",".join(str(y) for y in years) + "\r\n")
+        for i, code in enumerate(codes):
+            cells = ["" if np.isnan(v) else repr(float(v)) for v in values[i]]
+            fh.write(f"Country {code},{code},GDP (current US$),NY.GDP.MKTP.CD," + ",".join(cells) + "\r\n")
+    return path
+
+
+def write_gho_json(path: str | os.PathLike, scale: float = 1, seed: int = 0,
+                   indicator: str = "MORT_100") -> Path:
+    """Write a GHO OData body (``@odata.count`` first, then ``value``) for ``scale``."""
+    rng = np.random.default_rng(seed + 1)
+    n = max(1, int(BASE_ENTITIES * scale))
+    codes = entity_codes(n)
+    known = [c for c in codes if rng.random() < 0.9]
+    unknown = [f"X{c}" for c in codes[: max(1, n // 50)]]
+    spatial = known + unknown
+    regions = rng.choice(WHO_REGIONS, size=len(spatial))
+    base_rate = rng.gamma(2.0, 20.0, size=len(spatial))
+    years = np.asarray(GHO_YEARS)
+    total = len(spatial) * len(years) * len(SEXES) * len(AGE_GROUPS)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    record_id = 0
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(f'{{"@odata.context":"synthetic","@odata.count":{total},"value":[')
+        for e, code in enumerate(spatial):
+            trend = base_rate[e] * np.exp(-0.03 * (years - years[0]))
+            noise = rng.normal(1.0, 0.05, size=(len(years), len(SEXES), len(AGE_GROUPS)))
+            rates = trend[:, None, None] * noise
+            parent = regions[e]
+            records = []
+            for y, year in enumerate(years):
+                for s, sex in enumerate(SEXES):
+                    for a, age in enumerate(AGE_GROUPS):
+                        rate = float(rates[y, s, a])
+                        # About 1% of values are not numbers, as in real exports.
+                        text = "No data" if (record_id % 97) == 0 else f"{rate:.2f}"
+                        records.append(json.dumps({
+                            "Id": record_id, "IndicatorCode": indicator, "SpatialDimType": "COUNTRY",
+                            "SpatialDim": code, "ParentLocationCode": parent, "TimeDimType": "YEAR",
+                            "TimeDim": int(year), "Dim1Type": "SEX", "Dim1": sex, "Dim2Type": "AGEGROUP",
+                            "Dim2": age, "Value": text, "NumericValue": None if text == "No data" else rate,
+                        }, separators=(",", ":")))
+                        record_id += 1
+            fh.write(("," if e else "") + ",".join(records))
+        fh.write("]}")
+    return path
+
+
+def generate(directory: str | os.PathLike, scale: float, seed: int = 0) -> dict[str, Path]:
+    """Generate (or reuse) the inputs for ``scale`` under ``directory``."""
+    directory = Path(directory) / f"v{GENERATOR_VERSION}-seed{seed}-x{scale:g}"
+    wdi = directory / "API_SYNTH_GDP.csv"
+    gho = directory / "MORT_100.json"
+    if not wdi.exists():
+        write_wdi_csv(f"{wdi}.tmp", scale, seed)
+        os.replace(f"{wdi}.tmp", wdi)
+    if not gho.exists():
+        write_gho_json(f"{gho}.tmp", scale, seed)
+        os.replace(f"{gho}.tmp", gho)
+    return {"wdi": wdi, "gho": gho}
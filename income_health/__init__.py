@@ -0,0 +1,47 @@
+"""Gather, clean, combine and analyze GDP and mortality data.
+
+The notebook export in ``Data_Wrangling_Project_Starter.py`` walks through
+the project step by step; this package holds the reusable pieces it calls,
+and :mod:`income_health.cli` exposes them as the ``income-health`` command.
+
+The names below are resolved on first access, so ``import income_health``
+does not pull in pandas, requests or matplotlib.
+"""
+
+from __future__ import annotations
+
+import importlib
+
+__version__ = "0.1.0"
+
+_EXPORTS = {
+    "load_wdi": "wdi",
+    "download_wdi": "wdi",
+    "GHOClient": "gho",
+    "HTTPCache": "cache",
+    "clean_gdp": "clean",
+    "clean_mortality": "clean",
+    "combine_gdp_mortality": "combine",
+    "SnapshotStore": "store",
+    "Pipeline": "pipeline",
+    "build_pipeline": "pipeline",
+    "run_chunked": "chunked",
+    "EntityIndex": "entities",
+    "load_entity_index": "entities",
+    "Panel": "stats",
+    "summarize": "stats",
+}
+
+__all__ = ["__version__", *_EXPORTS]
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{_EXPORTS[name]}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,7 @@
+"""Allow ``python -m income_health``."""
+
+import sys
+
+from income_health.cli import main
+
+sys.exit(main())
@@ -0,0 +1,271 @@
+"""Persistent on-disk cache for HTTP downloads.
+
+Payloads are stored once per URL and query string. Fresh entries (younger
+than the TTL) are served without touching the network; stale ones are
+revalidated with ``If-None-Match``/``If-Modified-Since`` so an unchanged
+resource costs a single 304 round trip. When the network is unavailable
+the last stored payload is served instead, so offline runs keep working.
+The cache is bounded in size and evicts the least recently used entries.
+Index changes (new entries, evictions, access times) are kept in memory
+and written on :meth:`HTTPCache.flush`/``close`` or when the cache is
+garbage collected, so neither a hit nor a stored payload rewrites the
+whole index.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import urlencode
+
+from income_health.instrument import record_download
+
+if TYPE_CHECKING:
+    import requests
+
+INDEX_FILE = "index.json"
+
+
+@dataclass
+class CacheStats:
+    """Counters describing how well the cache is doing."""
+
+    hits: int = 0
+    misses: int = 0
+    revalidated: int = 0
+    stale_served: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of lookups answered without downloading the payload again."""
+        served = self.hits + self.revalidated + self.stale_served
+        total = served + self.misses
+        return served / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return dict(asdict(self), hit_ratio=self.hit_ratio)
+
+
+def _write_index(directory: Path, index: dict) -> None:
+    tmp = directory / (INDEX_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(index, fh)
+    os.replace(tmp, directory / INDEX_FILE)
+
+
+def _flush_index(directory: Path, index: dict, dirty: threading.Event, lock: threading.Lock) -> None:
+    with lock:
+        if dirty.is_set():
+            _write_index(directory, index)
+            dirty.clear()
+
+
+def cache_key(url: str, params: dict | None = None) -> str:
+    """Hash a URL and its query parameters into a stable cache key."""
+    query = urlencode(sorted((params or {}).items()))
+    return hashlib.sha256(f"{url}?{query}".encode("utf-8")).hexdigest()
+
+
+class HTTPCache:
+    """Size-bounded LRU cache of HTTP response bodies on disk.
+
+    Args:
+        directory: Where payloads and the index are kept.
+        ttl: Seconds an entry is considered fresh; after that it is
+            revalidated with the server before use.
+        max_bytes: Upper bound on the total size of stored payloads.
+        offline: Never touch the network; serve whatever is stored.
+    """
+
+    def __init__(self, directory: str | os.PathLike = ".cache/http", ttl: float = 24 * 3600,
+                 max_bytes: int = 512 * 1024 ** 2, offline: bool = False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+        self._bytes = sum(entry["size"] for entry in self._index.values())
+        # Set when the index changed since it was last written.
+        self._dirty = threading.Event()
+        weakref.finalize(self, _flush_index, self.directory, self._index, self._dirty, self._lock)
+
+    # -- index bookkeeping ------------------------------------------------
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self.directory / INDEX_FILE, encoding="utf-8") as fh:
+                return json.load(fh)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_index(self) -> None:
+        """Write the index; the caller holds the lock."""
+        _write_index(self.directory, self._index)
+        self._dirty.clear()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+
+    def _blob_path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def _read(self, key: str) -> bytes | None:
+        try:
+            return self._blob_path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def _store(self, key: str, url: str, content: bytes, headers) -> None:
+        path = self._blob_path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+        now = time.time()
+        with self._lock:
+            previous = self._index.get(key)
+            self._bytes += len(content) - (previous["size"] if previous else 0)
+            self._index[key] = {
+                "url": url,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "stored_at": now,
+                "last_access": now,
+                "size": len(content),
+            }
+            self._evict()
+            self._dirty.set()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries over ``max_bytes``; the caller holds the lock."""
+        if self._bytes <= self.max_bytes:
+            return
+        for key, entry in sorted(self._index.items(), key=lambda item: item[1]["last_access"]):
+            if self._bytes <= self.max_bytes:
+                break
+            self._blob_path(key).unlink(missing_ok=True)
+            del self._index[key]
+            self._bytes -= entry["size"]
+            self.stats.evictions += 1
+
+    def _touch(self, key: str, revalidated: bool = False) -> None:
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                return
+            entry["last_access"] = time.time()
+            if revalidated:
+                entry["stored_at"] = entry["last_access"]
+            self._dirty.set()
+
+    # -- public API -------------------------------------------------------
+
+    def entry(self, url: str, params: dict | None = None) -> dict | None:
+        """Return a copy of the stored metadata for a URL, if any."""
+        with self._lock:
+            entry = self._index.get(cache_key(url, params))
+            return dict(entry) if entry is not None else None
+
+    def get(self, session: requests.Session, url: str, params: dict | None = None,
+            timeout: float | None = None, refresh: bool = False) -> bytes:
+        """Return the body for ``url``, downloading it only when necessary.
+
+        Args:
+            session: Session used for any network request.
+            url: Resource to fetch.
+            params: Query parameters; part of the cache key.
+            timeout: Per-request timeout in seconds.
+            refresh: Revalidate with the server even if the entry is fresh.
+
+        Raises:
+            requests.RequestException: The resource is not cached and could
+                not be downloaded.
+        """
+        import requests
+
+        key = cache_key(url, params)
+        with self._lock:
+            entry = self._index.get(key)
+            entry = dict(entry) if entry is not None else None
+        cached = self._read(key) if entry else None
+
+        if cached is not None:
+            fresh = time.time() - entry["stored_at"] < self.ttl
+            if self.offline or (fresh and not refresh):
+                self._count("hits")
+                self._touch(key)
+                return cached
+        elif self.offline:
+            raise requests.ConnectionError(f"{url} is not cached and the cache is offline")
+
+        headers = {}
+        if cached is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+            if response.status_code == 304:
+                if cached is None:
+                    # Nothing was sent to revalidate, so there is no body to serve.
+                    raise requests.HTTPError(f"{url} answered 304 Not Modified to an unconditional request",
+                                             response=response)
+                self._count("revalidated")
+                self._touch(key, revalidated=True)
+                return cached
+            response.raise_for_status()
+        except requests.RequestException:
+            if cached is None:
+                raise
+            # Serve the last good copy rather than failing the whole run.
+            self._count("stale_served")
+            self._touch(key)
+            return cached
+
+        self._count("misses")
+        record_download(len(response.content))
+        self._store(key, url, response.content, response.headers)
+        return response.content
+
+    def flush(self) -> None:
+        """Write access times recorded since the index was last saved."""
+        _flush_index(self.directory, self._index, self._dirty, self._lock)
+
+    def close(self) -> None:
+        """Flush the index; the cache stays usable."""
+        self.flush()
+
+    def __enter__(self) -> "HTTPCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def clear(self) -> None:
+        """Remove every stored payload."""
+        with self._lock:
+            for key in list(self._index):
+                self._blob_path(key).unlink(missing_ok=True)
+            self._index.clear()
+            self._bytes = 0
+            self._save_index()
+
+    @property
+    def size(self) -> int:
+        """Total bytes of stored payloads."""
+        with self._lock:
+            return self._bytes
@@ -0,0 +1,346 @@
+"""Out-of-core execution of the gather → clean → combine → store pipeline.
+
+The in-memory path reads whole files, parses whole responses and joins
+whole frames. Here every step is a generator over bounded batches:
+
+* :func:`read_wdi_chunks` and :func:`read_gho_chunks` parse the sources a
+  batch of rows at a time;
+* :func:`clean_chunks` applies the row-local cleaning rules to each batch;
+* :func:`combine_chunks` joins on (country, year) with a partitioned hash
+  join: batches are spilled to disk bucketed by country, each bucket is
+  combined with the in-memory :func:`~income_health.combine.combine_gdp_mortality`,
+  and the buckets are merged back in the order the in-memory path produces;
+* :meth:`~income_health.store.SnapshotStore.write_chunks` stores the result.
+
+Batch sizes and the number of buckets follow from a memory budget. The
+result has the same rows, in the same order and with the same values as
+the in-memory path; only the categories of the categorical columns may
+include codes that end up unused.
+"""
+
+from __future__ import annotations
+
+import itertools
+import math
+import os
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+
+from income_health.clean import clean_mortality
+from income_health.combine import COUNTRY, YEAR, combine_gdp_mortality
+from income_health.gho import DEFAULT_FIELDS
+from income_health.streaming import CHUNK_SIZE, ColumnBuilder, ValueStream, iter_chunks, read_count
+from income_health.wdi import ID_COLUMNS, read_wdi_header
+
+DEFAULT_MEMORY_BUDGET = 256 * 2**20
+
+# A batch is copied a few times while it is cleaned, hashed and pickled;
+# size batches so that those copies together stay within the budget.
+WORKING_COPIES = 4
+
+# Rough in-memory size of one parsed row, used before any row is seen.
+ESTIMATED_ROW_BYTES = 200
+
+_POSITION = "_position"
+
+
+def rows_for_budget(memory_budget: int, row_bytes: float = ESTIMATED_ROW_BYTES) -> int:
+    """How many rows of ``row_bytes`` fit in a batch under ``memory_budget``."""
+    return max(1000, int(memory_budget / (WORKING_COPIES * max(row_bytes, 1.0))))
+
+
+def _row_bytes(frame: pd.DataFrame) -> float:
+    return frame.memory_usage(deep=True, index=False).sum() / max(len(frame), 1)
+
+
+def read_wdi_chunks(path: str | os.PathLike, years: tuple[int | None, int | None] | None = None,
+                    chunk_rows: int | None = None, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                    encoding: str = "utf-8-sig") -> Iterator[pd.DataFrame]:
+    """Yield a WDI CSV in batches shaped like :func:`~income_health.wdi.load_wdi` output."""
+    header = read_wdi_header(path, encoding)
+    start, end = years if years is not None else (None, None)
+    selected = [y for y in header.years
+                if (start is None or y >= start) and (end is None or y <= end)]
+    year_names = [str(y) for y in selected]
+    dtypes = {name: np.float64 for name in year_names}
+    dtypes.update({name: str for name in ID_COLUMNS})
+    if chunk_rows is None:
+        chunk_rows = rows_for_budget(memory_budget, 8 * len(selected) + 4 * 50)
+
+    reader = pd.read_csv(path, skiprows=header.skiprows, usecols=list(ID_COLUMNS) + year_names,
+                         dtype=dtypes, encoding=encoding, engine="c", chunksize=chunk_rows)
+    with reader:
+        for chunk in reader:
+            chunk = chunk[list(ID_COLUMNS) + year_names]
+            chunk.columns = list(ID_COLUMNS) + selected
+            chunk.attrs["wdi"] = dict(header.metadata)
+            yield chunk
+
+
+def _file_chunks(path: str | os.PathLike) -> Iterator[bytes]:
+    with open(path, "rb") as fh:
+        yield from iter(lambda: fh.read(CHUNK_SIZE), b"")
+
+
+def read_gho_chunks(source: str | os.PathLike | Iterable[bytes], fields: Sequence[str] = DEFAULT_FIELDS,
+                    chunk_rows: int | None = None,
+                    memory_budget: int = DEFAULT_MEMORY_BUDGET) -> Iterator[pd.DataFrame]:
+    """Yield GHO records in typed batches of at most ``chunk_rows`` rows.
+
+    Args:
+        source: A saved OData JSON body on disk, or page bodies such as
+            :meth:`GHOClient.iter_pages <income_health.gho.GHOClient.iter_pages>`
+            yields them.
+        fields: Record fields to keep.
+        chunk_rows: Rows per batch; derived from ``memory_budget`` if omitted.
+        memory_budget: Bytes a batch and its working copies may use.
+    """
+    chunk_rows = chunk_rows or rows_for_budget(memory_budget)
+    bodies = [_file_chunks(source)] if isinstance(source, (str, os.PathLike)) else \
+        (iter_chunks(body) for body in source)
+    builder = ColumnBuilder(fields, capacity=min(chunk_rows, 65536))
+    for body in bodies:
+        for record in ValueStream(body):
+            builder.append(record)
+            if builder.size >= chunk_rows:
+                yield builder.to_frame()
+                builder = ColumnBuilder(fields, capacity=min(chunk_rows, 65536))
+    if builder.size:
+        yield builder.to_frame()
+
+
+def clean_chunks(chunks: Iterable[pd.DataFrame],
+                 clean: Callable[[pd.DataFrame], pd.DataFrame] = clean_mortality) -> Iterator[pd.DataFrame]:
+    """Apply a row-local cleaning function to every batch, skipping empty results.
+
+    :func:`~income_health.clean.clean_mortality` is row-local as it is. For
+    GDP use :func:`clean_gdp_rows`; the in-memory
+    :func:`~income_health.clean.clean_gdp` also drops year columns that are
+    empty in the whole file, which does not change the combined result.
+    """
+    for chunk in chunks:
+        cleaned = clean(chunk)
+        if len(cleaned):
+            yield cleaned
+
+
+def clean_gdp_rows(gdp: pd.DataFrame) -> pd.DataFrame:
+    """The row-local part of :func:`~income_health.clean.clean_gdp`: drop rows without any value."""
+    years = [c for c in gdp.columns if isinstance(c, (int, np.integer))]
+    return gdp.dropna(subset=years, how="all").reset_index(drop=True)
+
+
+# -- spilling -------------------------------------------------------------
+
+def _bucket_of(codes: pd.Series, buckets: int) -> np.ndarray:
+    values = codes.astype(str).to_numpy(dtype=object)
+    return (pd.util.hash_array(values) % np.uint64(buckets)).astype(np.int64)
+
+
+def _spill(path: Path, frame: pd.DataFrame) -> None:
+    with open(path, "ab") as fh:
+        pickle.dump(frame, fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _unspill(path: Path) -> Iterator[pd.DataFrame]:
+    if not path.exists():
+        return
+    with open(path, "rb") as fh:
+        while True:
+            try:
+                yield pickle.load(fh)
+            except EOFError:
+                return
+
+
+def _load_bucket(path: Path) -> pd.DataFrame | None:
+    parts = list(_unspill(path))
+    return pd.concat(parts, ignore_index=True) if parts else None
+
+
+def _first_positions(gho: pd.DataFrame, keep: Sequence[str], select: dict | None) -> pd.DataFrame:
+    """Row position where each collapsed key first appears, as collapse_dimensions orders them."""
+    frame = gho
+    if select:
+        mask = pd.Series(True, index=frame.index)
+        for column, wanted in select.items():
+            mask &= frame[column] == wanted
+        frame = frame[mask]
+    keys = ["SpatialDim", "TimeDim", *keep]
+    first = frame.groupby([frame[k].astype(object) for k in keys], sort=False, dropna=False)[_POSITION].min()
+    first = first.reset_index().rename(columns={"SpatialDim": COUNTRY, "TimeDim": YEAR})
+    first[YEAR] = first[YEAR].astype("int16")
+    return first
+
+
+def _merge_sorted(streams: list[Iterator[pd.DataFrame]]) -> Iterator[pd.DataFrame]:
+    """K-way merge of streams of batches, each sorted by position."""
+    buffers = {}
+    for i, stream in enumerate(streams):
+        first = next(stream, None)
+        if first is not None:
+            buffers[i] = first
+    while buffers:
+        # Everything up to the smallest "last position" of the buffers is final.
+        bound = min(buf[_POSITION].iat[-1] for buf in buffers.values())
+        ready = []
+        for i in list(buffers):
+            buf = buffers[i]
+            cut = int(np.searchsorted(buf[_POSITION].to_numpy(), bound, side="right"))
+            ready.append(buf.iloc[:cut])
+            if cut < len(buf):
+                buffers[i] = buf.iloc[cut:]
+            else:
+                following = next(streams[i], None)
+                if following is None:
+                    del buffers[i]
+                else:
+                    buffers[i] = following
+        yield pd.concat(ready, ignore_index=True).sort_values(_POSITION, kind="stable")
+
+
+def combine_chunks(gho_chunks: Iterable[pd.DataFrame], wdi_chunks: Iterable[pd.DataFrame],
+                   years: tuple[int, int] | None = None, keep: Sequence[str] = (),
+                   select: dict | None = None, buckets: int = 16, chunk_rows: int = 100_000,
+                   spill_dir: str | os.PathLike | None = None, **names) -> Iterator[pd.DataFrame]:
+    """Out-of-core equivalent of :func:`~income_health.combine.combine_gdp_mortality`.
+
+    Both inputs are consumed once and spilled to ``buckets`` files each,
+    partitioned by a hash of the country code. Every bucket then holds all
+    rows of its countries, so combining it in memory gives exactly the
+    rows the full join gives for those countries. Each bucket needs about
+    ``1 / buckets`` of the input's memory.
+
+    Args:
+        gho_chunks: Cleaned GHO batches.
+        wdi_chunks: Cleaned WDI batches.
+        years, keep, select: As for :func:`combine_gdp_mortality`.
+        buckets: Number of hash partitions.
+        chunk_rows: Approximate rows per yielded batch.
+        spill_dir: Directory for temporary files (removed afterwards).
+        **names: ``value_name`` / ``gdp_name`` passed through.
+
+    Yields:
+        Batches of the combined rows in the order of the in-memory result.
+        ``Country Code`` and ``Country Name`` are categoricals over every
+        code and name in the WDI input, and categorical ``keep`` dimensions
+        over every value in the GHO input, so all batches share one dtype.
+    """
+    workdir = Path(tempfile.mkdtemp(prefix="income-health-", dir=spill_dir))
+    try:
+        position = 0
+        # Categories of the kept GHO dimensions in order of first appearance,
+        # as the in-memory parse assigns them; None once a batch is not categorical.
+        kept: dict[str, dict | None] = {k: {} for k in keep}
+        for chunk in gho_chunks:
+            for k, seen in kept.items():
+                if seen is not None and isinstance(chunk[k].dtype, pd.CategoricalDtype):
+                    seen.update(dict.fromkeys(chunk[k].cat.categories))
+                else:
+                    kept[k] = None
+            if years is not None:
+                chunk = chunk[chunk["TimeDim"].between(*years)]
+            chunk = chunk.assign(**{_POSITION: np.arange(position, position + len(chunk), dtype=np.int64)})
+            position += len(chunk)
+            for bucket, part in chunk.groupby(_bucket_of(chunk["SpatialDim"], buckets)):
+                _spill(workdir / f"gho-{bucket}.pkl", part)
+
+        codes: set[str] = set()
+        country_names: set[str] = set()
+        for chunk in wdi_chunks:
+            codes.update(chunk[COUNTRY].astype(str))
+            country_names.update(chunk["Country Name"].astype(str))
+            for bucket, part in chunk.groupby(_bucket_of(chunk[COUNTRY], buckets)):
+                _spill(workdir / f"wdi-{bucket}.pkl", part)
+
+        dtypes = {COUNTRY: pd.CategoricalDtype(sorted(codes)),
+                  "Country Name": pd.CategoricalDtype(sorted(country_names)),
+                  **{k: pd.CategoricalDtype(list(seen)) for k, seen in kept.items() if seen is not None}}
+        per_bucket = max(1, chunk_rows // buckets)
+        streams = []
+        for bucket in range(buckets):
+            gho, wdi = _load_bucket(workdir / f"gho-{bucket}.pkl"), _load_bucket(workdir / f"wdi-{bucket}.pkl")
+            if gho is None or wdi is None:
+                continue
+            combined = combine_gdp_mortality(gho, wdi, years=years, keep=keep, select=select, **names)
+            combined = combined.astype({COUNTRY: object, "Country Name": object})
+            combined = combined.merge(_first_positions(gho, keep, select), on=[COUNTRY, YEAR, *keep], how="left")
+            combined = combined.sort_values(_POSITION, kind="stable").reset_index(drop=True)
+            out = workdir / f"out-{bucket}.pkl"
+            for start in range(0, len(combined), per_bucket):
+                _spill(out, combined.iloc[start:start + per_bucket])
+            streams.append(_unspill(out))
+            del gho, wdi, combined
+
+        for batch in _merge_sorted(streams):
+            batch = batch.drop(columns=_POSITION).reset_index(drop=True)
+            # The position merge leaves the keys as plain strings.
+            yield batch.astype(dtypes)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def buckets_for(paths: Sequence[str | os.PathLike], memory_budget: int, expansion: float = 4.0) -> int:
+    """Buckets needed so that one bucket of the parsed inputs fits in ``memory_budget``."""
+    size = sum(os.path.getsize(p) for p in paths if p is not None and os.path.exists(p))
+    return max(1, math.ceil(size * expansion * WORKING_COPIES / memory_budget))
+
+
+def run_chunked(wdi_path: str | os.PathLike, gho: str | os.PathLike | Iterable[bytes],
+                years: tuple[int, int] | None = (2014, 2023), keep: Sequence[str] = (),
+                select: dict | None = None, memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                store=None, dataset: str = "combined", spill_dir: str | os.PathLike | None = None,
+                buckets: int | None = None, extra: dict | None = None):
+    """Run load → clean → combine (→ store) within ``memory_budget`` bytes.
+
+    Args:
+        wdi_path: WDI GDP file.
+        gho: Saved GHO JSON body, or page bodies, e.g.
+            ``client.iter_pages("MORT_100")``.
+        years, keep, select: As for :func:`combine_gdp_mortality`.
+        memory_budget: Approximate peak memory for data, in bytes.
+        store: :class:`~income_health.store.SnapshotStore`; the result is
+            written there as ``dataset`` instead of being returned.
+        spill_dir: Where temporary bucket files go.
+        buckets: Hash partitions; derived from the budget when omitted:
+            from the file sizes, or for a page stream from the
+            ``@odata.count`` of its first page and the rows a batch of the
+            budget holds.
+        extra: Provenance recorded in the snapshot manifest.
+
+    Returns:
+        The snapshot manifest when ``store`` is given, otherwise the
+        combined frame.
+
+    Raises:
+        ValueError: ``buckets`` is omitted and the first page of a stream
+            does not report ``@odata.count``.
+    """
+    if buckets is None:
+        if isinstance(gho, (str, os.PathLike)):
+            buckets = buckets_for([wdi_path, gho], memory_budget)
+        else:
+            pages = iter(gho)
+            first = next(pages, None)
+            total = read_count(first) if first is not None else 0
+            if total is None:
+                raise ValueError("the first GHO page has no @odata.count, so buckets cannot be derived "
+                                 "from memory_budget; pass buckets explicitly")
+            gho = itertools.chain([first], pages) if first is not None else pages
+            buckets = max(buckets_for([wdi_path], memory_budget),
+                          math.ceil(total / rows_for_budget(memory_budget)))
+    fields = list(DEFAULT_FIELDS)
+    gho_chunks = clean_chunks(read_gho_chunks(gho, fields, memory_budget=memory_budget))
+    wdi_chunks = clean_chunks(read_wdi_chunks(wdi_path, years, memory_budget=memory_budget), clean_gdp_rows)
+    batches = combine_chunks(gho_chunks, wdi_chunks, years=years, keep=keep, select=select, buckets=buckets,
+                             chunk_rows=rows_for_budget(memory_budget), spill_dir=spill_dir)
+    if store is not None:
+        return store.write_chunks(dataset, batches, source=os.fspath(wdi_path), extra=extra)
+    parts = list(batches)
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
@@ -0,0 +1,32 @@
+"""Cleaning rules for the GDP and mortality datasets.
+
+These are the steps of section 3 of the notebook, as functions that return
+new frames and never modify their input.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+import pandas as pd
+
+from income_health.wdi import year_columns
+
+MORTALITY_COLUMNS = ("SpatialDim", "TimeDim", "IndicatorCode", "Dim1", "Dim2", "Value")
+
+
+def clean_gdp(gdp: pd.DataFrame) -> pd.DataFrame:
+    """Drop rows without any GDP value and years without any data."""
+    years = year_columns(gdp)
+    gdp = gdp.dropna(subset=years, how="all")
+    empty = [y for y in years if gdp[y].isna().all()]
+    gdp = gdp.drop(columns=empty)
+    ids = [c for c in ("Country Name", "Country Code", "Indicator Name", "Indicator Code") if c in gdp.columns]
+    return gdp[ids + [c for c in gdp.columns if c not in ids]].reset_index(drop=True)
+
+
+def clean_mortality(gho: pd.DataFrame, columns: Sequence[str] = MORTALITY_COLUMNS) -> pd.DataFrame:
+    """Coerce ``Value`` to numeric, drop rows without a value and unused columns."""
+    gho = gho.assign(Value=pd.to_numeric(gho["Value"], errors="coerce"))
+    gho = gho.dropna(subset=["Value"])
+    return gho[[c for c in columns if c in gho.columns]].reset_index(drop=True)
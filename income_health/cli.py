@@ -0,0 +1,232 @@
+"""Command-line interface: ``income-health fetch|build|report``.
+
+``fetch``
+    Download the latest WDI file and bring the stored ``gdp``,
+    ``mortality`` and ``combined`` datasets up to date incrementally
+    (:func:`~income_health.refresh.refresh`), keeping the year window and
+    dimensions the combined panel was built with. Meant for cron.
+``build``
+    Rebuild the combined panel from scratch with the cached stage pipeline
+    (or out-of-core with ``--chunked``) and store it as a new snapshot.
+``report``
+    Read the stored combined panel and write per-country statistics, pooled
+    correlations and the two figures of the notebook to a directory. With
+    ``--slices`` the same is done for every region and income group in
+    parallel (:func:`~income_health.report.batch_report`).
+
+Only the standard library is imported at startup; pandas, requests,
+pyarrow and matplotlib are loaded by the command that needs them, so
+``income-health --help`` and argument errors return immediately.
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import sys
+from pathlib import Path
+
+WDI_INDICATOR = "NY.GDP.MKTP.CD"
+GHO_INDICATOR = "MORT_100"
+
+
+def _years(text: str) -> tuple[int, int]:
+    try:
+        start, end = (int(part) for part in text.split("-"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected START-END, e.g. 2014-2023, not {text!r}") from None
+    return start, end
+
+
+def _http_cache(args):
+    from income_health.cache import HTTPCache
+
+    return HTTPCache(Path(args.cache_dir) / "http", offline=args.offline)
+
+
+def _client(args, cache):
+    from income_health.gho import GHOClient
+
+    return GHOClient(base_url=args.gho_url, cache=cache)
+
+
+def _wdi_path(args, cache=None, download: bool = False) -> Path:
+    """The WDI file to use: ``--wdi``, else the newest download, else a fresh one."""
+    if args.wdi:
+        return Path(args.wdi)
+    existing = sorted(glob.glob(os.path.join(args.data_dir, f"API_{args.wdi_indicator}_*.csv")),
+                      key=os.path.getmtime)
+    if existing and not download:
+        return Path(existing[-1])
+    from income_health.wdi import download_wdi
+
+    return download_wdi(args.wdi_indicator, args.data_dir, cache=cache or _http_cache(args))
+
+
+def _store(args):
+    from income_health.store import SnapshotStore
+
+    return SnapshotStore(args.store)
+
+
+def cmd_fetch(args) -> dict:
+    from income_health.refresh import refresh
+
+    cache = _http_cache(args)
+    wdi_path = _wdi_path(args, cache, download=not args.wdi)
+    client = None if args.skip_gho else _client(args, cache)
+    result = refresh(_store(args), wdi_path, client, indicator=args.indicator, full_gho=args.full,
+                     years=args.years, keep=args.keep)
+    return {"wdi": os.fspath(wdi_path), **result.as_dict(), "http_cache": cache.stats.as_dict()}
+
+
+def cmd_build(args) -> dict:
+    from income_health.refresh import combined_scope
+
+    store = _store(args)
+    scope = {"scope": combined_scope(args.years, args.keep)}
+    cache = _http_cache(args)
+    wdi_path = _wdi_path(args, cache)
+    client = _client(args, cache)
+    if args.chunked:
+        from income_health.chunked import run_chunked
+
+        manifest = run_chunked(wdi_path, client.iter_pages(args.indicator), years=args.years,
+                               keep=args.keep, memory_budget=args.memory_budget * 2**20,
+                               store=store, dataset=args.dataset, extra=scope)
+    else:
+        from income_health.pipeline import build_pipeline
+
+        pipeline = build_pipeline(wdi_path, client, indicator=args.indicator, years=args.years,
+                                  keep=args.keep, cache_dir=Path(args.cache_dir) / "stages")
+        combined = pipeline.run(["combined"])["combined"]
+        pipeline.prune()
+        manifest = store.write(args.dataset, combined, partition_by="Year", source=args.indicator, extra=scope)
+    return {"wdi": os.fspath(wdi_path), "dataset": args.dataset, "snapshot": manifest["id"],
+            "rows": manifest["rows"]}
+
+
+def cmd_report(args) -> dict:
+    import numpy as np
+
+    from income_health.stats import Panel, bootstrap_ci, pooled, summarize
+
+    frame = _store(args).read(args.dataset, snapshot=args.snapshot)
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+
+    panel = Panel.from_wide(frame, ["GDP", "Mortality Rate"])
+    summary = summarize(panel)
+    summary.to_csv(output / "summary.csv")
+    gdp = panel.get("GDP")
+    log_gdp = np.log(np.where(gdp > 0, gdp, np.nan))
+    mortality = panel.get("Mortality Rate")
+    report = {
+        "dataset": args.dataset,
+        "snapshot": args.snapshot,
+        "rows": len(frame),
+        "countries": len(panel.entities),
+        "years": [int(panel.years.min()), int(panel.years.max())] if len(panel.years) else None,
+        "pooled": {method: pooled(log_gdp, mortality, method) for method in ("pearson", "spearman")},
+        "files": ["summary.csv"],
+    }
+    if args.bootstrap:
+        ci = bootstrap_ci(log_gdp, mortality, n_boot=args.bootstrap, workers=args.workers)
+        report["pooled_ci"] = list(ci["pooled"])
+    if not args.no_figures:
+        from income_health.plots import density_scatter, timeseries_plot
+
+        density_scatter(frame, x="GDP", y="Mortality Rate", path=output / "gdp_vs_mortality.png",
+                        title="GDP vs Mortality Rate")
+        timeseries_plot(frame, value="GDP", entity="Country Name", year="Year", top=10,
+                        path=output / "gdp_over_time.png", title="GDP over time")
+        report["files"] += ["gdp_vs_mortality.png", "gdp_over_time.png"]
+    if args.slices:
+        from income_health.entities import load_entity_index
+        from income_health.report import batch_report
+
+        # WHO regions come from the GHO country dimension, regions and income
+        # groups from the WDI country metadata next to the data file.
+        entities = load_entity_index(_wdi_path(args), metadata_path=args.metadata,
+                                     client=_client(args, _http_cache(args)),
+                                     cache_path=Path(args.cache_dir) / "entities.json")
+        index = batch_report(frame, entities, output / "slices", n_boot=args.bootstrap,
+                             figures=not args.no_figures, workers=args.workers)
+        report["slices"] = len(index["slices"])
+        report["files"].append("slices/index.json")
+    (output / "report.json").write_text(json.dumps(report, indent=2, default=float), encoding="utf-8")
+    return report
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="income-health", description="Gather, combine and analyze GDP and "
+                                     "mortality data.")
+    parser.add_argument("--store", default="data/store", help="snapshot store directory (default: %(default)s)")
+    parser.add_argument("--data-dir", default="data", help="where WDI files are downloaded (default: %(default)s)")
+    parser.add_argument("--cache-dir", default=".cache", help="HTTP and stage caches (default: %(default)s)")
+    parser.add_argument("--offline", action="store_true", help="serve downloads from the HTTP cache only")
+    parser.add_argument("--metrics", help="append per-stage metrics as JSON lines to this file")
+    parser.add_argument("--profile", help="comma-separated stages to profile, or 'all'")
+    parser.add_argument("--trace-memory", action="store_true", help="record tracemalloc peaks per stage "
+                        "(slower)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def source_options(sub):
+        sub.add_argument("--wdi", help="WDI CSV to use instead of the newest one in --data-dir")
+        sub.add_argument("--wdi-indicator", default=WDI_INDICATOR, help="WDI indicator (default: %(default)s)")
+        sub.add_argument("--indicator", default=GHO_INDICATOR, help="GHO indicator (default: %(default)s)")
+        sub.add_argument("--gho-url", default="https://ghoapi.azureedge.net/api", help=argparse.SUPPRESS)
+
+    fetch = commands.add_parser("fetch", help="download new data and update the stored datasets")
+    source_options(fetch)
+    fetch.add_argument("--full", action="store_true", help="re-fetch every GHO year, not only new ones")
+    fetch.add_argument("--skip-gho", action="store_true", help="only refresh the GDP side")
+    fetch.add_argument("--years", type=_years, help="START-END window of the combined panel "
+                       "(default: the window it was built with)")
+    fetch.add_argument("--keep", nargs="*", help="GHO dimensions to keep (default: as built)")
+    fetch.set_defaults(handler=cmd_fetch)
+
+    build = commands.add_parser("build", help="rebuild the combined panel and store a snapshot")
+    source_options(build)
+    build.add_argument("--years", type=_years, default=(2014, 2023), help="START-END (default: 2014-2023)")
+    build.add_argument("--keep", nargs="*", default=[], help="GHO dimensions to keep, e.g. Dim1")
+    build.add_argument("--dataset", default="combined", help="dataset name (default: %(default)s)")
+    build.add_argument("--chunked", action="store_true", help="run out-of-core within --memory-budget")
+    build.add_argument("--memory-budget", type=int, default=256, help="MiB for --chunked (default: %(default)s)")
+    build.set_defaults(handler=cmd_build)
+
+    report = commands.add_parser("report", help="write statistics and figures for a stored panel")
+    report.add_argument("--dataset", default="combined", help="dataset name (default: %(default)s)")
+    report.add_argument("--snapshot", help="snapshot id (default: latest)")
+    report.add_argument("--output", default="reports", help="output directory (default: %(default)s)")
+    report.add_argument("--bootstrap", type=int, default=0, help="bootstrap replicates for a pooled CI")
+    report.add_argument("--workers", type=int, default=None, help="processes for the bootstrap and slices")
+    report.add_argument("--no-figures", action="store_true", help="skip the PNG figures")
+    report.add_argument("--slices", action="store_true", help="also report every region and income group")
+    report.add_argument("--wdi", help="WDI CSV whose country metadata assigns the groups")
+    report.add_argument("--metadata", help="WDI Metadata_Country CSV (default: the one next to the WDI file)")
+    report.add_argument("--wdi-indicator", default=WDI_INDICATOR, help=argparse.SUPPRESS)
+    report.add_argument("--gho-url", default="https://ghoapi.azureedge.net/api", help=argparse.SUPPRESS)
+    report.set_defaults(handler=cmd_report)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.metrics or args.profile or args.trace_memory:
+        from income_health.instrument import json_lines_sink, registry
+
+        registry.trace_memory = registry.trace_memory or args.trace_memory
+        if args.metrics:
+            registry.sinks.append(json_lines_sink(args.metrics))
+        if args.profile:
+            registry.profile.update(s.strip() for s in args.profile.split(",") if s.strip())
+    try:
+        result = args.handler(args)
+    except (OSError, ValueError) as error:
+        print(f"income-health {args.command}: {error}", file=sys.stderr)
+        return 1
+    print(json.dumps(result, indent=2, default=str))
+    return 0
@@ -0,0 +1,146 @@
+"""Combine GHO mortality observations with World Bank GDP.
+
+Joining on the country code alone pairs every GHO row (each sex, age group
+and year) with the whole multi-decade GDP row, and reshaping afterwards
+multiplies that again by the number of years. Here the GHO rows are first
+collapsed to one value per (country, year) or per (country, year, kept
+dimensions), the GDP block is brought into the same long shape, and the
+two are joined on (country, year) with categorical keys after checking
+that the join cannot fan out.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+import pandas as pd
+
+from income_health.entities import EntityIndex
+from income_health.reshape import wide_to_long
+
+COUNTRY = "Country Code"
+YEAR = "Year"
+
+
+def collapse_dimensions(gho: pd.DataFrame, keep: Sequence[str] = (), select: dict | None = None,
+                        value: str = "Value", agg: str = "mean") -> pd.DataFrame:
+    """Collapse GHO rows to one value per country, year and kept dimension.
+
+    Args:
+        gho: GHO observations with ``SpatialDim``, ``TimeDim`` and ``value``.
+        keep: Disaggregation columns (``Dim1``, ``Dim2``, ...) to keep in
+            the key; every other dimension is aggregated away.
+        select: Keep only rows whose columns equal the given values before
+            aggregating, e.g. ``{"Dim1": "SEX_BTSX"}`` for both sexes.
+        value: Column holding the observation; coerced to numeric.
+        agg: Any reduction understood by ``GroupBy.agg``.
+
+    Returns:
+        Columns ``Country Code``, ``Year``, the kept dimensions and ``value``.
+    """
+    frame = gho
+    if select:
+        mask = pd.Series(True, index=frame.index)
+        for column, wanted in select.items():
+            mask &= frame[column] == wanted
+        frame = frame[mask]
+
+    # Rows without a country or year cannot be placed; kept dimensions may be missing.
+    frame = frame[frame["SpatialDim"].notna() & frame["TimeDim"].notna()]
+    keys = ["SpatialDim", "TimeDim", *keep]
+    values = pd.to_numeric(frame[value], errors="coerce")
+    grouped = (values.groupby([frame[k] for k in keys], observed=True, sort=False, dropna=False)
+               .agg(agg).dropna().reset_index())
+    grouped = grouped.rename(columns={"SpatialDim": COUNTRY, "TimeDim": YEAR})
+    grouped[YEAR] = grouped[YEAR].astype("int16")
+    return grouped
+
+
+def _align_categories(left: pd.Series, right: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """Cast two key columns to categoricals sharing the same categories."""
+    categories = pd.Index(pd.concat([left.astype(str), right.astype(str)]).unique())
+    dtype = pd.CategoricalDtype(categories)
+    return left.astype(str).astype(dtype), right.astype(str).astype(dtype)
+
+
+def combine_gdp_mortality(gho: pd.DataFrame, wdi: pd.DataFrame, years: tuple[int, int] | None = None,
+                          keep: Sequence[str] = (), select: dict | None = None,
+                          value_name: str = "Mortality Rate", gdp_name: str = "GDP",
+                          entities: EntityIndex | None = None, countries_only: bool = True) -> pd.DataFrame:
+    """Join collapsed GHO mortality with WDI GDP on (country, year).
+
+    Args:
+        gho: GHO observations as returned by :meth:`GHOClient.fetch`.
+        wdi: GDP frame as returned by :func:`~income_health.wdi.load_wdi`.
+        years: Inclusive ``(start, end)`` window to keep.
+        keep: GHO dimensions to keep as part of the key; see
+            :func:`collapse_dimensions`.
+        select: Row filter applied to the GHO data before collapsing.
+        entities: When given, both sides are keyed by
+            :class:`~income_health.entities.EntityIndex` ids instead of raw
+            strings, so GHO spellings such as ``GLOBAL`` match their WDI
+            codes. Codes the index does not know are listed in
+            ``result.attrs["unmatched"]`` instead of vanishing silently.
+        countries_only: With ``entities``, drop aggregates and regions.
+
+    Returns:
+        One row per country, year and kept dimension with columns
+        ``Country Code``, ``Country Name``, ``Year``, the kept dimensions,
+        ``value_name`` and ``gdp_name``.
+    """
+    if years is not None:
+        gho = gho[gho["TimeDim"].between(*years)]
+    mortality = collapse_dimensions(gho, keep=keep, select=select).rename(columns={"Value": value_name})
+    # Only the requested window of the GDP year block is reshaped; there is
+    # never a full-width intermediate.
+    gdp = wide_to_long(wdi, (COUNTRY, "Country Name"), years, value_name=gdp_name, year_name=YEAR)
+    return join_long(mortality, gdp, keep=keep, value_name=value_name, gdp_name=gdp_name,
+                     entities=entities, countries_only=countries_only)
+
+
+def join_long(mortality: pd.DataFrame, gdp: pd.DataFrame, keep: Sequence[str] = (),
+              value_name: str = "Mortality Rate", gdp_name: str = "GDP",
+              entities: EntityIndex | None = None, countries_only: bool = True) -> pd.DataFrame:
+    """Join long mortality and GDP panels on (country, year).
+
+    This is the second half of :func:`combine_gdp_mortality`, for callers
+    that already hold both sides in long form, e.g. read back from a store.
+
+    Args:
+        mortality: ``Country Code``, ``Year``, the ``keep`` dimensions and
+            ``value_name``, as produced by :func:`collapse_dimensions`.
+        gdp: ``Country Code``, ``Country Name``, ``Year`` and ``gdp_name``.
+        keep: Dimensions in ``mortality`` that are part of its key.
+        value_name: Mortality column.
+        gdp_name: GDP column.
+        entities: See :func:`combine_gdp_mortality`.
+        countries_only: With ``entities``, drop aggregates and regions.
+
+    Returns:
+        The same columns and dtypes as :func:`combine_gdp_mortality`.
+    """
+    keep = list(keep)
+    if not isinstance(gdp["Country Name"].dtype, pd.CategoricalDtype):
+        gdp = gdp.assign(**{"Country Name": gdp["Country Name"].astype("category")})
+    unmatched = None
+    if entities is not None:
+        mortality, unknown_gho = entities.canonicalize(mortality, COUNTRY, countries_only)
+        gdp, unknown_wdi = entities.canonicalize(gdp, COUNTRY, countries_only)
+        unmatched = {
+            "unknown_gho": unknown_gho,
+            "unknown_wdi": unknown_wdi,
+            "gho_only": sorted(set(mortality[COUNTRY].unique()) - set(gdp[COUNTRY].unique())),
+            "wdi_only": sorted(set(gdp[COUNTRY].unique()) - set(mortality[COUNTRY].unique())),
+        }
+    else:
+        left, right = _align_categories(mortality[COUNTRY], gdp[COUNTRY])
+        mortality, gdp = mortality.assign(**{COUNTRY: left}), gdp.assign(**{COUNTRY: right})
+    # validate raises pandas.errors.MergeError (a ValueError) if the join would fan out.
+    combined = mortality.merge(gdp, on=[COUNTRY, YEAR], how="inner",
+                               validate="one_to_one" if not keep else "many_to_one")
+    combined[COUNTRY] = combined[COUNTRY].cat.remove_unused_categories()
+    combined["Country Name"] = combined["Country Name"].cat.remove_unused_categories()
+    combined = combined[[COUNTRY, "Country Name", YEAR, *keep, value_name, gdp_name]]
+    if unmatched is not None:
+        combined.attrs["unmatched"] = unmatched
+    return combined
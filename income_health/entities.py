@@ -0,0 +1,372 @@
+"""Index of countries and aggregates shared by the WDI and GHO sources.
+
+The WDI files mix the 217 economies with 49 aggregates (``WLD``, ``EUU``,
+``AFE``, income groups...), and GHO reports WHO regions and World Bank
+income groups under codes of its own (``AFR``, ``GLOBAL``, ``WB_HI``).
+Joining on raw strings keeps aggregates next to countries and silently
+drops entities whose codes differ between the sources.
+
+:class:`EntityIndex` assigns every entity a small integer id and records,
+also as ids, the World Bank region, income group and WHO region of each
+country. Codes, names and the GHO spellings all resolve to the same id,
+so frames can be filtered, joined and rolled up on ``int32`` keys. The
+index is built once from the source files and cached as JSON by
+:func:`load_entity_index`.
+"""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+# The seven World Bank geographic regions and four income groups; countries
+# are assigned to them by the WDI country metadata file.
+WDI_REGIONS = {
+    "EAS": "East Asia & Pacific",
+    "ECS": "Europe & Central Asia",
+    "LCN": "Latin America & Caribbean",
+    "MEA": "Middle East & North Africa",
+    "NAC": "North America",
+    "SAS": "South Asia",
+    "SSF": "Sub-Saharan Africa",
+}
+WDI_INCOME_GROUPS = {
+    "HIC": "High income",
+    "UMC": "Upper middle income",
+    "LMC": "Lower middle income",
+    "LIC": "Low income",
+}
+# Every aggregate published alongside the economies in WDI files.
+WDI_AGGREGATES = frozenset({
+    "AFE", "AFW", "ARB", "CEB", "CSS", "EAP", "EAR", "EAS", "ECA", "ECS", "EMU", "EUU", "FCS",
+    "HIC", "HPC", "IBD", "IBT", "IDA", "IDB", "IDX", "INX", "LAC", "LCN", "LDC", "LIC", "LMC",
+    "LMY", "LTE", "MEA", "MIC", "MNA", "NAC", "OED", "OSS", "PRE", "PSS", "PST", "SAS", "SSA",
+    "SSF", "SST", "TEA", "TEC", "TLA", "TMN", "TSA", "TSS", "UMC", "WLD",
+})
+WHO_REGIONS = {
+    "AFR": "Africa",
+    "AMR": "Americas",
+    "SEAR": "South-East Asia",
+    "EUR": "Europe",
+    "EMR": "Eastern Mediterranean",
+    "WPR": "Western Pacific",
+}
+# GHO codes for entities that WDI also publishes under another code.
+GHO_ALIASES = {
+    "GLOBAL": "WLD",
+    "WB_HI": "HIC",
+    "WB_UMI": "UMC",
+    "WB_LMI": "LMC",
+    "WB_LI": "LIC",
+}
+GROUPINGS = ("region", "income_group", "who_region")
+
+# Bump when the cached layout or the build rules change.
+INDEX_VERSION = 1
+
+
+def _key(value) -> str:
+    return str(value).strip().casefold()
+
+
+class EntityIndex:
+    """Integer-coded lookup of countries and aggregates.
+
+    Args:
+        table: One row per entity, indexed by id ``0..n-1``, with columns
+            ``code``, ``name``, ``kind`` (``"country"`` or ``"aggregate"``)
+            and the groupings ``region``, ``income_group`` and
+            ``who_region`` holding the id of the group entity or ``-1``.
+        aliases: Extra spellings mapped to entity ids; codes and names are
+            always recognized.
+    """
+
+    def __init__(self, table: pd.DataFrame, aliases: dict[str, int] | None = None):
+        self.table = table.reset_index(drop=True)
+        lookup = {}
+        for column in ("name", "code"):  # codes win over names that happen to collide
+            lookup.update({_key(v): i for i, v in enumerate(self.table[column])})
+        lookup.update({_key(k): int(v) for k, v in (aliases or {}).items()})
+        self.aliases = {k: v for k, v in lookup.items()
+                        if k != _key(self.table.at[v, "code"]) and k != _key(self.table.at[v, "name"])}
+        self._lookup = pd.Index(list(lookup))
+        self._ids = np.fromiter(lookup.values(), dtype=np.int32, count=len(lookup))
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    @classmethod
+    def build(cls, wdi: pd.DataFrame | None = None, metadata: pd.DataFrame | None = None,
+              gho: pd.DataFrame | None = None, gho_countries: pd.DataFrame | None = None,
+              aliases: dict[str, str] | None = None) -> "EntityIndex":
+        """Assemble the index from whichever sources are available.
+
+        Args:
+            wdi: Any WDI frame with ``Country Code`` and ``Country Name``.
+            metadata: The WDI ``Metadata_Country_*.csv`` table (``Country
+                Code``, ``Region``, ``IncomeGroup``); countries are the rows
+                with a region.
+            gho: GHO observations with ``SpatialDim`` and
+                ``ParentLocationCode``; codes with a parent are countries.
+            gho_countries: The GHO ``COUNTRY`` dimension (``Code``,
+                ``Title``, ``ParentCode``), see :func:`fetch_gho_countries`.
+            aliases: Extra spellings, mapped to codes in the index.
+        """
+        rows: dict[str, dict] = {}
+
+        def add(code, name, kind):
+            code = str(code)
+            if code not in rows:
+                rows[code] = {"code": code, "name": str(name) if pd.notna(name) else code, "kind": kind,
+                              "region": None, "income_group": None, "who_region": None}
+            return rows[code]
+
+        for code, name in {**WDI_REGIONS, **WDI_INCOME_GROUPS}.items():
+            add(code, name, "aggregate")
+        for code, name in WHO_REGIONS.items():
+            add(code, name, "aggregate")
+
+        if wdi is not None:
+            pairs = wdi[["Country Code", "Country Name"]].drop_duplicates("Country Code")
+            for code, name in pairs.itertuples(index=False):
+                add(code, name, "aggregate" if code in WDI_AGGREGATES else "country")
+
+        if metadata is not None:
+            region_codes = {v: k for k, v in WDI_REGIONS.items()}
+            income_codes = {v: k for k, v in WDI_INCOME_GROUPS.items()}
+            name_column = "TableName" if "TableName" in metadata.columns else None
+            for record in metadata.to_dict("records"):
+                region = record.get("Region")
+                entry = add(record["Country Code"], record.get(name_column) if name_column else None,
+                            "aggregate")
+                if pd.notna(region):
+                    entry["kind"] = "country"
+                    entry["region"] = region_codes.get(region)
+                    entry["income_group"] = income_codes.get(record.get("IncomeGroup"))
+
+        extra_aliases = dict(GHO_ALIASES)
+        gho_parents = []
+        if gho is not None:
+            pairs = gho[["SpatialDim", "ParentLocationCode"]].dropna(subset=["SpatialDim"]).drop_duplicates()
+            gho_parents.extend((c, None, p) for c, p in pairs.astype(object).itertuples(index=False))
+        if gho_countries is not None:
+            gho_parents.extend(gho_countries[["Code", "Title", "ParentCode"]].astype(object)
+                               .itertuples(index=False))
+        for code, title, parent in gho_parents:
+            code = str(code)
+            if code in GHO_ALIASES:
+                continue
+            if pd.notna(parent) and str(parent) in WHO_REGIONS:
+                entry = add(code, title, "country")
+                entry["who_region"] = str(parent)
+            else:
+                add(code, title, "aggregate")
+            if title is not None and pd.notna(title):
+                extra_aliases[str(title)] = code
+
+        extra_aliases.update(aliases or {})
+        table = pd.DataFrame(list(rows.values()))
+        position = {code: i for i, code in enumerate(table["code"])}
+        for column in GROUPINGS:
+            table[column] = np.array([position.get(c, -1) if c else -1 for c in table[column]], dtype=np.int32)
+        table["kind"] = pd.Categorical(table["kind"], categories=["country", "aggregate"])
+        resolved = {alias: position[code] for alias, code in extra_aliases.items() if code in position}
+        return cls(table, resolved)
+
+    # -- lookups ----------------------------------------------------------
+
+    def encode(self, values) -> np.ndarray:
+        """Entity ids of codes, names or aliases; ``-1`` where unknown.
+
+        Only the distinct values are looked up, so encoding a large
+        categorical column costs as much as its categories.
+        """
+        series = values if isinstance(values, pd.Series) else pd.Series(values)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        keys = pd.Index([_key(u) for u in uniques])
+        found = self._lookup.get_indexer(keys)
+        unique_ids = np.where(found >= 0, self._ids[found], -1).astype(np.int32)
+        unique_ids = np.append(unique_ids, np.int32(-1))  # NaN codes (-1) land here
+        return unique_ids[codes]
+
+    def decode(self, ids, field: str = "code") -> np.ndarray:
+        """Look up a column of the table for an array of ids; ``None`` for ``-1``."""
+        ids = np.asarray(ids)
+        column = self.table[field].astype(object).to_numpy()
+        return np.where(ids >= 0, column[np.where(ids >= 0, ids, 0)], None)
+
+    def kinds(self, ids) -> np.ndarray:
+        """``True`` for ids that are countries (not aggregates or unknown)."""
+        ids = np.asarray(ids)
+        is_country = (self.table["kind"] == "country").to_numpy()
+        return (ids >= 0) & is_country[np.where(ids >= 0, ids, 0)]
+
+    def group_of(self, ids, by: str = "region") -> np.ndarray:
+        """Id of the ``by`` group (region, income group, WHO region) of each entity."""
+        if by not in GROUPINGS:
+            raise ValueError(f"unknown grouping {by!r}; use one of {GROUPINGS}")
+        ids = np.asarray(ids)
+        groups = self.table[by].to_numpy()
+        return np.where(ids >= 0, groups[np.where(ids >= 0, ids, 0)], -1)
+
+    def members(self, group: str, by: str = "region") -> list[str]:
+        """Codes of the countries in a group, e.g. ``members("LIC", by="income_group")``."""
+        group_id = int(self.encode([group])[0])
+        if group_id < 0:
+            raise ValueError(f"unknown group {group!r}")
+        return self.table.loc[self.table[by] == group_id, "code"].tolist()
+
+    # -- frames -----------------------------------------------------------
+
+    def select(self, frame: pd.DataFrame, column: str = "Country Code", countries_only: bool = True,
+               **groups: str) -> pd.DataFrame:
+        """Rows of ``frame`` whose entity is known, optionally only countries of some groups.
+
+        Example: ``index.select(frame, income_group="LIC", who_region="AFR")``.
+        """
+        ids = self.encode(frame[column])
+        keep = self.kinds(ids) if countries_only else ids >= 0
+        for by, group in groups.items():
+            keep &= self.group_of(ids, by) == int(self.encode([group])[0])
+        return frame[keep]
+
+    def canonicalize(self, frame: pd.DataFrame, column: str = "Country Code",
+                     countries_only: bool = False) -> tuple[pd.DataFrame, list[str]]:
+        """Replace ``column`` with canonical codes as a categorical over the whole index.
+
+        The categorical codes of the result are the entity ids, so frames
+        canonicalized by the same index join on shared ``int32`` keys.
+
+        Returns:
+            The frame restricted to known entities (countries only if asked)
+            and the sorted list of values that were not recognized.
+        """
+        ids = self.encode(frame[column])
+        keep = self.kinds(ids) if countries_only else ids >= 0
+        unknown = sorted(pd.unique(frame.loc[ids < 0, column].dropna().astype(str)).tolist())
+        dtype = pd.CategoricalDtype(self.table["code"])
+        codes = pd.Categorical.from_codes(ids[keep], dtype=dtype)
+        return frame[keep].assign(**{column: codes}), unknown
+
+    def rollup(self, frame: pd.DataFrame, by: str = "region", columns: Sequence[str] = ("GDP",),
+               column: str = "Country Code", year: str | None = "Year", agg: str = "sum",
+               countries_only: bool = True) -> pd.DataFrame:
+        """Aggregate country rows into their region, income group or WHO region.
+
+        Returns:
+            One row per group (and year) with the group code in ``column``
+            and the group name in ``"Group Name"``.
+        """
+        ids = self.encode(frame[column])
+        groups = self.group_of(ids, by)
+        keep = groups >= 0
+        if countries_only:
+            keep &= self.kinds(ids)
+        keys = [pd.Series(groups[keep], name=column)]
+        if year is not None:
+            keys.append(frame.loc[keep, year].reset_index(drop=True))
+        data = frame.loc[keep, list(columns)].reset_index(drop=True)
+        result = data.groupby(keys, sort=True).agg(agg).reset_index()
+        group_ids = result[column].to_numpy()
+        result[column] = self.decode(group_ids)
+        result.insert(1, "Group Name", self.decode(group_ids, "name"))
+        return result
+
+    # -- persistence ------------------------------------------------------
+
+    def to_json(self, path: str | os.PathLike, key: str | None = None) -> None:
+        """Write the index (and the fingerprint of its sources) to ``path``."""
+        table = self.table.assign(kind=self.table["kind"].astype(str))
+        payload = {"version": INDEX_VERSION, "key": key, "table": table.to_dict("list"),
+                   "aliases": self.aliases}
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(f"{path}.tmp")
+        tmp.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def from_json(cls, path: str | os.PathLike) -> "EntityIndex":
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+        table = pd.DataFrame(payload["table"])
+        table["kind"] = pd.Categorical(table["kind"], categories=["country", "aggregate"])
+        for column in GROUPINGS:
+            table[column] = table[column].astype(np.int32)
+        return cls(table, payload["aliases"])
+
+
+def wdi_metadata_path(path: str | os.PathLike) -> Path | None:
+    """The ``Metadata_Country_*.csv`` shipped next to a WDI data file, if present."""
+    path = Path(path)
+    suffix = path.name[len("API_"):] if path.name.startswith("API_") else None
+    if suffix:
+        candidate = path.with_name(f"Metadata_Country_API_{suffix}")
+        if candidate.exists():
+            return candidate
+    matches = sorted(glob.glob(os.path.join(glob.escape(os.fspath(path.parent)), "Metadata_Country_*.csv")))
+    return Path(matches[0]) if matches else None
+
+
+def fetch_gho_countries(client) -> pd.DataFrame:
+    """The GHO ``COUNTRY`` dimension: ``Code``, ``Title`` and WHO region ``ParentCode``."""
+    records = client.fetch_records("DIMENSION/COUNTRY/DimensionValues",
+                                   fields=("Code", "Title", "ParentCode"), orderby="Code")
+    return pd.DataFrame.from_records(records, columns=["Code", "Title", "ParentCode"])
+
+
+def load_entity_index(wdi_path: str | os.PathLike | None = None,
+                      metadata_path: str | os.PathLike | None = None, gho: pd.DataFrame | None = None,
+                      client=None, cache_path: str | os.PathLike = ".cache/entities.json",
+                      refresh: bool = False) -> EntityIndex:
+    """Load the cached index, rebuilding it only when its sources changed.
+
+    Args:
+        wdi_path: A WDI data file; its ``Metadata_Country`` companion is
+            used automatically when it sits in the same directory.
+        metadata_path: Explicit path to the WDI country metadata.
+        gho: GHO observations contributing WHO regions.
+        client: :class:`~income_health.gho.GHOClient` used to download the
+            GHO country dimension (with names) when given.
+        cache_path: Where the index is stored.
+        refresh: Rebuild even if the cache is current.
+    """
+    if metadata_path is None and wdi_path is not None:
+        metadata_path = wdi_metadata_path(wdi_path)
+
+    parts = [f"v{INDEX_VERSION}"]
+    for path in (wdi_path, metadata_path):
+        if path is not None:
+            stat = os.stat(path)
+            parts.append(f"{os.fspath(path)}:{stat.st_size}:{stat.st_mtime_ns}")
+    if gho is not None:
+        pairs = gho[["SpatialDim", "ParentLocationCode"]].drop_duplicates()
+        parts.append(str(pd.util.hash_pandas_object(pairs, index=False).sum()))
+    if client is not None:
+        parts.append(f"gho:{client.base_url}")
+    key = hashlib.sha256("|".join(parts).encode()).hexdigest()[:20]
+
+    if not refresh and os.path.exists(cache_path):
+        with open(cache_path, encoding="utf-8") as fh:
+            cached = json.load(fh)
+        if cached.get("version") == INDEX_VERSION and cached.get("key") == key:
+            return EntityIndex.from_json(cache_path)
+
+    from income_health.wdi import load_wdi
+
+    index = EntityIndex.build(
+        wdi=load_wdi(wdi_path, years=(None, 0)) if wdi_path is not None else None,
+        metadata=pd.read_csv(metadata_path, encoding="utf-8-sig") if metadata_path is not None else None,
+        gho=gho,
+        gho_countries=fetch_gho_countries(client) if client is not None else None,
+    )
+    index.to_json(cache_path, key=key)
+    return index
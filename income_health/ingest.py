@@ -0,0 +1,114 @@
+"""Concurrent ingestion of many WDI and GHO indicators into one long panel.
+
+Downloads run in a thread pool; as each one finishes, its CSV or JSON
+pages are handed to a process pool for parsing, so network waits and
+parsing overlap and parsing uses every core. Every indicator is
+normalized to the same long layout::
+
+    country  indicator  year  value
+
+so loading many indicators takes roughly as long as the slowest one.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Sequence
+
+import pandas as pd
+
+from income_health.cache import HTTPCache
+from income_health.combine import collapse_dimensions
+from income_health.gho import DEFAULT_FIELDS, GHOClient
+from income_health.reshape import wide_to_long
+from income_health.streaming import ColumnBuilder, ValueStream, iter_chunks
+from income_health.wdi import download_wdi, load_wdi
+
+PANEL_COLUMNS = ["country", "indicator", "year", "value"]
+
+
+def parse_wdi_file(path: str | os.PathLike, years: tuple[int, int] | None = None) -> pd.DataFrame:
+    """Parse a WDI CSV into long panel rows; runs in a worker process."""
+    wdi = load_wdi(path, years=years, id_columns=("Country Code", "Indicator Code"))
+    long = wide_to_long(wdi, ("Country Code", "Indicator Code"), value_name="value", year_name="year")
+    return long.rename(columns={"Country Code": "country", "Indicator Code": "indicator"})[PANEL_COLUMNS]
+
+
+def parse_gho_pages(indicator: str, pages: Sequence[bytes], select: dict | None = None) -> pd.DataFrame:
+    """Parse raw GHO pages into long panel rows; runs in a worker process.
+
+    Disaggregation dimensions are collapsed as in
+    :func:`~income_health.combine.collapse_dimensions`.
+    """
+    builder = ColumnBuilder(DEFAULT_FIELDS)
+    for page in pages:
+        builder.extend(ValueStream(iter_chunks(page)))
+    long = collapse_dimensions(builder.to_frame(), select=select)
+    long = long.rename(columns={"Country Code": "country", "Year": "year", "Value": "value"})
+    return long.assign(indicator=indicator)[PANEL_COLUMNS]
+
+
+def ingest(wdi: Sequence[str] = (), gho: Sequence[str] = (), years: tuple[int, int] | None = None,
+           directory: str | os.PathLike = "data/raw", cache: HTTPCache | None = None,
+           client: GHOClient | None = None, gho_select: dict[str, dict] | None = None,
+           io_workers: int = 8, parse_workers: int | None = None) -> pd.DataFrame:
+    """Fetch and parse WDI and GHO indicators concurrently.
+
+    Args:
+        wdi: WDI indicator codes (downloaded with
+            :func:`~income_health.wdi.download_wdi`) or paths to WDI CSVs
+            already on disk.
+        gho: GHO indicator codes.
+        years: Inclusive ``(start, end)`` window; pushed to the GHO server
+            and to the WDI parser.
+        directory: Where downloaded WDI files are extracted.
+        cache: Optional HTTP cache shared by every download.
+        client: GHO client; a default one using ``cache`` is created if omitted.
+        gho_select: Per-indicator row filters applied before collapsing GHO
+            dimensions, e.g. ``{"MORT_100": {"Dim1": "SEX_BTSX"}}``.
+        io_workers: Concurrent downloads.
+        parse_workers: Parsing processes; defaults to the number of CPUs.
+
+    Returns:
+        The long panel with categorical ``country`` and ``indicator``,
+        ``int16`` ``year`` and ``float64`` ``value``.
+    """
+    client = client or GHOClient(cache=cache)
+    gho_select = gho_select or {}
+
+    def fetch_wdi(code: str) -> Path:
+        if os.path.exists(code):
+            return Path(code)
+        return download_wdi(code, directory, cache=cache)
+
+    def fetch_gho(code: str) -> list[bytes]:
+        return client.fetch_pages(code, years=years)
+
+    parts = []
+    with ThreadPoolExecutor(max_workers=io_workers) as io, \
+            ProcessPoolExecutor(max_workers=parse_workers) as cpu:
+        downloads: dict[Future, tuple[str, str]] = {}
+        for code in wdi:
+            downloads[io.submit(fetch_wdi, code)] = ("wdi", code)
+        for code in gho:
+            downloads[io.submit(fetch_gho, code)] = ("gho", code)
+
+        parses = []
+        for done in as_completed(downloads):
+            kind, code = downloads[done]
+            if kind == "wdi":
+                parses.append(cpu.submit(parse_wdi_file, done.result(), years))
+            else:
+                parses.append(cpu.submit(parse_gho_pages, code, done.result(), gho_select.get(code)))
+        for parsed in as_completed(parses):
+            part = parsed.result()
+            parts.append(part.astype({"country": str, "indicator": str}))
+
+    if not parts:
+        return pd.DataFrame({"country": pd.Categorical([]), "indicator": pd.Categorical([]),
+                             "year": pd.Series(dtype="int16"), "value": pd.Series(dtype="float64")})
+    panel = pd.concat(parts, ignore_index=True)
+    panel = panel.astype({"country": "category", "indicator": "category", "year": "int16"})
+    return panel.sort_values(["indicator", "country", "year"]).reset_index(drop=True)
@@ -0,0 +1,382 @@
+"""Per-stage timing, memory and I/O instrumentation.
+
+Wrap a unit of work in :func:`instrument` (or decorate it with
+:func:`instrumented`) to record a :class:`StageMetrics`: wall and CPU
+time, rows in and out, bytes downloaded while it ran, peak resident set
+size and, when enabled, peak traced Python memory (``tracemalloc``), plus
+an optional ``cProfile`` summary. Every record goes to a :class:`MetricsRegistry`,
+which keeps it in process and forwards it to any sinks, e.g. a JSON-lines
+file.
+
+The default registry is configured from the environment, so production
+runs can be inspected without code changes:
+
+``INCOME_HEALTH_METRICS``
+    Append one JSON line per stage to this file.
+``INCOME_HEALTH_PROFILE``
+    Comma-separated stage names to profile, or ``all``.
+``INCOME_HEALTH_TRACEMALLOC``
+    Set to ``1`` to record traced peaks. Off by default: ``tracemalloc``
+    slows allocation-heavy code several times over.
+
+Stage nesting is tracked per thread (and per ``contextvars`` context), so
+stages running concurrently in different threads do not become each
+other's parents. Memory peaks are process-wide, however: the RSS and the
+``tracemalloc`` peak of a stage include whatever other threads allocated
+while it ran, and while stages overlap across threads the traced peak is
+not reset between them. A download is credited to the stages of the
+thread that made it, or, from a helper thread that runs no stage of its
+own (e.g. a pool fetching pages), to every active stage;
+:func:`record_download` is called by the HTTP layer.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import contextvars
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (0 where unavailable)."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+class RSSSampler(threading.Thread):
+    """Poll the resident set size in the background and keep the peak."""
+
+    def __init__(self, interval: float = 0.01):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.start_rss = self.peak = current_rss()
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.is_set():
+            self.peak = max(self.peak, current_rss())
+            self._done.wait(self.interval)
+
+    def stop(self) -> int:
+        """Stop sampling and return the peak RSS in bytes."""
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, current_rss())
+        return self.peak
+
+
+def count_rows(value: Any) -> int | None:
+    """Row count of a frame-like value (anything with ``shape``), else ``None``."""
+    shape = getattr(value, "shape", None)
+    if shape:
+        return int(shape[0])
+    if isinstance(value, dict) and isinstance(value.get("rows"), int):
+        return value["rows"]
+    return None
+
+
+@dataclass
+class StageMetrics:
+    """What one run of a stage cost.
+
+    Attributes:
+        stage: Stage name.
+        started_at: UTC start time (ISO 8601).
+        wall_s: Elapsed time.
+        cpu_s: CPU time of this process (all threads) and of any child
+            processes that finished during the stage.
+        rows_in: Rows handed to the stage, when known.
+        rows_out: Rows it produced, when known.
+        bytes_downloaded: Bytes received over the network during the stage.
+        peak_traced_bytes: Peak ``tracemalloc`` memory of the process while
+            the stage ran, or ``None`` when memory was not traced.
+        peak_rss_bytes: Peak resident set size of the process.
+        rss_delta_bytes: Peak RSS minus RSS at the start.
+        profile: Top functions by cumulative time, when profiled.
+        error: Exception type and message if the stage failed.
+        extra: Anything else the stage wants to report.
+    """
+
+    stage: str
+    started_at: str = ""
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    rows_in: int | None = None
+    rows_out: int | None = None
+    bytes_downloaded: int = 0
+    peak_traced_bytes: int | None = None
+    peak_rss_bytes: int = 0
+    rss_delta_bytes: int = 0
+    profile: str | None = None
+    error: str | None = None
+    extra: dict = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def json_lines_sink(path: str | os.PathLike) -> Callable[[StageMetrics], None]:
+    """Sink appending each record as one JSON line to ``path``."""
+    lock = threading.Lock()
+
+    def sink(metrics: StageMetrics) -> None:
+        line = json.dumps(metrics.as_dict(), default=str)
+        with lock:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as fh:
+                fh.write(line + "\n")
+    return sink
+
+
+def logging_sink(logger) -> Callable[[StageMetrics], None]:
+    """Sink emitting each record as a JSON message on a :mod:`logging` logger."""
+    def sink(metrics: StageMetrics) -> None:
+        logger.info(json.dumps(metrics.as_dict(), default=str))
+    return sink
+
+
+class MetricsRegistry:
+    """In-process collection of :class:`StageMetrics` with optional sinks.
+
+    Args:
+        sinks: Callables receiving every record as it is added.
+        profile: Stage names to profile, or ``{"all"}``.
+        trace_memory: Whether stages use ``tracemalloc`` by default.
+    """
+
+    def __init__(self, sinks: list[Callable[[StageMetrics], None]] | None = None,
+                 profile: set[str] | None = None, trace_memory: bool = False):
+        self.sinks = list(sinks or [])
+        self.profile = set(profile or ())
+        self.trace_memory = trace_memory
+        self.records: list[StageMetrics] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, environ: dict | None = None) -> "MetricsRegistry":
+        """Registry configured by the ``INCOME_HEALTH_*`` environment variables."""
+        environ = os.environ if environ is None else environ
+        sinks = [json_lines_sink(environ["INCOME_HEALTH_METRICS"])] if environ.get("INCOME_HEALTH_METRICS") else []
+        profile = {s.strip() for s in environ.get("INCOME_HEALTH_PROFILE", "").split(",") if s.strip()}
+        trace = environ.get("INCOME_HEALTH_TRACEMALLOC", "0").strip().lower() not in ("", "0", "false", "no")
+        return cls(sinks, profile, trace)
+
+    def wants_profile(self, stage: str) -> bool:
+        return "all" in self.profile or stage in self.profile
+
+    def record(self, metrics: StageMetrics) -> None:
+        with self._lock:
+            self.records.append(metrics)
+        for sink in self.sinks:
+            sink(metrics)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.records.clear()
+
+    def summary(self) -> dict[str, dict]:
+        """Totals per stage: runs, wall and CPU time, rows, bytes and the largest peaks."""
+        totals: dict[str, dict] = {}
+        for m in list(self.records):
+            t = totals.setdefault(m.stage, {"runs": 0, "wall_s": 0.0, "cpu_s": 0.0, "rows_out": 0,
+                                            "bytes_downloaded": 0, "peak_traced_bytes": None,
+                                            "peak_rss_bytes": 0, "errors": 0})
+            t["runs"] += 1
+            t["wall_s"] += m.wall_s
+            t["cpu_s"] += m.cpu_s
+            t["rows_out"] += m.rows_out or 0
+            t["bytes_downloaded"] += m.bytes_downloaded
+            if m.peak_traced_bytes is not None:
+                t["peak_traced_bytes"] = max(t["peak_traced_bytes"] or 0, m.peak_traced_bytes)
+            t["peak_rss_bytes"] = max(t["peak_rss_bytes"], m.peak_rss_bytes)
+            t["errors"] += m.error is not None
+        return totals
+
+    def to_json(self, path: str | os.PathLike) -> None:
+        """Write every record and the summary to one JSON document."""
+        payload = {"records": [m.as_dict() for m in self.records], "summary": self.summary()}
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(payload, indent=2, default=str), encoding="utf-8")
+
+
+registry = MetricsRegistry.from_env()
+
+# Stages running in the current thread or context, outermost first.
+_stack: contextvars.ContextVar[tuple] = contextvars.ContextVar("income_health_stages", default=())
+# Stages running in any thread, and how many of them use tracemalloc.
+_active: list["_Recorder"] = []
+_active_lock = threading.Lock()
+_tracers = 0
+_owns_trace = False
+
+
+def record_download(nbytes: int) -> None:
+    """Credit ``nbytes`` received over the network to the stages it was downloaded for.
+
+    These are the stages of the calling context, or every active stage when
+    the caller runs none itself.
+    """
+    with _active_lock:
+        for recorder in _stack.get() or _active:
+            recorder.metrics.bytes_downloaded += nbytes
+
+
+class _Recorder:
+    def __init__(self, metrics: StageMetrics):
+        self.metrics = metrics
+        self.inner_peak = 0  # highest tracemalloc peak reported by nested stages
+
+    @property
+    def rows_in(self) -> int | None:
+        return self.metrics.rows_in
+
+    @rows_in.setter
+    def rows_in(self, value: int | None) -> None:
+        self.metrics.rows_in = value
+
+    @property
+    def rows_out(self) -> int | None:
+        return self.metrics.rows_out
+
+    @rows_out.setter
+    def rows_out(self, value: int | None) -> None:
+        self.metrics.rows_out = value
+
+    @property
+    def extra(self) -> dict:
+        return self.metrics.extra
+
+
+def _cpu_time() -> float:
+    cpu = time.process_time()
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu += children.ru_utime + children.ru_stime
+    return cpu
+
+
+@contextmanager
+def instrument(stage: str, rows_in: int | None = None, profile: bool | None = None,
+               trace_memory: bool | None = None, metrics: MetricsRegistry | None = None) -> Iterator[_Recorder]:
+    """Measure the enclosed block as one run of ``stage``.
+
+    Set ``rows_out`` (and anything in ``extra``) on the yielded object::
+
+        with instrument("combine", rows_in=len(gho)) as run:
+            combined = combine_gdp_mortality(gho, wdi)
+            run.rows_out = len(combined)
+
+    Args:
+        stage: Name the record is filed under.
+        rows_in: Rows handed to the stage.
+        profile: Capture a ``cProfile`` summary; defaults to the registry's
+            ``profile`` setting. Ignored while another stage is profiled.
+        trace_memory: Use ``tracemalloc``; defaults to the registry setting.
+            Nested stages share one trace, and the outer stage's peak
+            includes the inner ones. The trace is process-wide, so the peak
+            also includes concurrent stages in other threads.
+        metrics: Registry to record into; the module default if omitted.
+    """
+    metrics = metrics or registry
+    profile = metrics.wants_profile(stage) if profile is None else profile
+    trace_memory = metrics.trace_memory if trace_memory is None else trace_memory
+    recorder = _Recorder(StageMetrics(stage, datetime.now(timezone.utc).isoformat(), rows_in=rows_in))
+
+    global _tracers, _owns_trace
+    stack = _stack.get()
+    parent = stack[-1] if stack else None
+    with _active_lock:
+        # Only one profiler can be active in the process.
+        profiling = any(r.metrics.extra.get("_profiling") for r in _active)
+        concurrent = any(r not in stack for r in _active)
+        _active.append(recorder)
+        if trace_memory:
+            if _tracers == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _owns_trace = True
+            _tracers += 1
+            if parent is not None:
+                parent.inner_peak = max(parent.inner_peak, tracemalloc.get_traced_memory()[1])
+            # Resetting would lose the peak of a stage running in another thread.
+            if not concurrent:
+                tracemalloc.reset_peak()
+    token = _stack.set(stack + (recorder,))
+    profiler = None
+    if profile and not profiling:
+        profiler = cProfile.Profile()
+        recorder.metrics.extra["_profiling"] = True
+        profiler.enable()
+
+    sampler = RSSSampler()
+    sampler.start()
+    wall, cpu = time.perf_counter(), _cpu_time()
+    try:
+        yield recorder
+    except BaseException as exc:
+        recorder.metrics.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        recorder.metrics.wall_s = time.perf_counter() - wall
+        recorder.metrics.cpu_s = _cpu_time() - cpu
+        recorder.metrics.peak_rss_bytes = sampler.stop()
+        recorder.metrics.rss_delta_bytes = recorder.metrics.peak_rss_bytes - sampler.start_rss
+        if profiler is not None:
+            profiler.disable()
+            recorder.metrics.extra.pop("_profiling", None)
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(25)
+            recorder.metrics.profile = out.getvalue()
+        _stack.reset(token)
+        with _active_lock:
+            if trace_memory:
+                if tracemalloc.is_tracing():
+                    peak = max(tracemalloc.get_traced_memory()[1], recorder.inner_peak)
+                    recorder.metrics.peak_traced_bytes = peak
+                    if parent is not None:
+                        parent.inner_peak = max(parent.inner_peak, peak)
+                _tracers -= 1
+                if _tracers == 0 and _owns_trace:
+                    tracemalloc.stop()
+                    _owns_trace = False
+            _active.remove(recorder)
+        metrics.record(recorder.metrics)
+
+
+def instrumented(stage: str | None = None, **options) -> Callable:
+    """Decorator form of :func:`instrument`.
+
+    ``rows_in`` is the total length of the frame-like positional arguments
+    and ``rows_out`` the length of the result, when they have one.
+    """
+    def decorate(func: Callable) -> Callable:
+        name = stage or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            sizes = [n for n in (count_rows(a) for a in args) if n is not None]
+            with instrument(name, rows_in=sum(sizes) if sizes else None, **options) as run:
+                result = func(*args, **kwargs)
+                run.rows_out = count_rows(result)
+            return result
+        return wrapper
+    return decorate
@@ -0,0 +1,271 @@
+"""Named pipeline stages with memoized, hash-keyed results.
+
+Each :class:`Stage` declares the stages it reads from and the parameters
+it depends on. Its cache key hashes the stage name, the source code of
+its function and of any helpers it lists, its parameters, an optional
+fingerprint of external inputs (a file's size and mtime, the date of a
+download) and the keys of its upstream stages. Keys can therefore be computed for the whole graph
+before anything runs, and a stage is executed only when no result is
+stored under its current key. An up-to-date stage is not even loaded
+from disk unless a stale stage downstream needs it as input. Results
+stored under keys that are no longer current are removed by
+:meth:`Pipeline.prune`.
+
+Every execution or cache load of a stage is measured with
+:func:`~income_health.instrument.instrument` and filed in the pipeline's
+metrics registry under the stage name.
+
+Stages receive their inputs by reference; :meth:`Pipeline.run` executes
+them with pandas copy-on-write on, scoped to the run, so they cannot
+change each other's data and no defensive ``.copy()`` is needed.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import inspect
+import json
+import os
+import pickle
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Iterable, Sequence
+
+import pandas as pd
+
+from income_health.instrument import MetricsRegistry, count_rows, instrument
+
+
+def enable_copy_on_write() -> None:
+    """Turn on pandas copy-on-write for the whole session (always on from pandas 3)."""
+    if int(pd.__version__.split(".")[0]) < 3:
+        pd.set_option("mode.copy_on_write", True)
+
+
+def copy_on_write() -> contextlib.AbstractContextManager:
+    """Context in which pandas copy-on-write is on, restoring the option on exit."""
+    if int(pd.__version__.split(".")[0]) < 3:
+        return pd.option_context("mode.copy_on_write", True)
+    return contextlib.nullcontext()
+
+
+def file_fingerprint(path: str | os.PathLike) -> Callable[[], str]:
+    """Fingerprint that changes whenever the file at ``path`` is rewritten."""
+    def fingerprint() -> str:
+        stat = os.stat(path)
+        return f"{os.fspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return fingerprint
+
+
+def daily_fingerprint() -> str:
+    """Fingerprint that changes once a day, for stages that download data."""
+    return date.today().isoformat()
+
+
+def _source(func: Callable) -> str:
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        return f"{func.__module__}.{getattr(func, '__qualname__', repr(func))}"
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One step of the pipeline.
+
+    Attributes:
+        name: Unique stage name.
+        func: Called as ``func(*inputs, **params)``.
+        inputs: Names of the upstream stages whose results are passed to
+            ``func`` positionally, in this order.
+        params: JSON-serializable keyword parameters for ``func``.
+        fingerprint: Returns a string describing external inputs.
+        depends: Helpers whose source is hashed along with ``func``, so
+            editing them invalidates the stage too.
+    """
+
+    name: str
+    func: Callable[..., Any]
+    inputs: tuple[str, ...] = ()
+    params: dict = field(default_factory=dict)
+    fingerprint: Callable[[], str] | None = None
+    depends: tuple[Callable, ...] = ()
+
+
+class Pipeline:
+    """A DAG of :class:`Stage` objects with an on-disk result cache.
+
+    Args:
+        cache_dir: Where stage results are pickled, one directory per stage.
+        metrics: Registry stage metrics are recorded in; the default
+            :data:`income_health.instrument.registry` if omitted.
+    """
+
+    def __init__(self, cache_dir: str | os.PathLike = ".cache/stages", metrics: MetricsRegistry | None = None):
+        self.cache_dir = Path(cache_dir)
+        self.metrics = metrics
+        self.stages: dict[str, Stage] = {}
+        self.executed: list[str] = []
+
+    def add(self, name: str, func: Callable[..., Any], inputs: Sequence[str] = (),
+            fingerprint: Callable[[], str] | None = None, depends: Sequence[Callable] = (),
+            **params) -> Stage:
+        """Register a stage; upstream stages must be added first."""
+        if name in self.stages:
+            raise ValueError(f"stage {name!r} is already defined")
+        missing = [i for i in inputs if i not in self.stages]
+        if missing:
+            raise ValueError(f"stage {name!r} reads from unknown stages {missing}")
+        stage = Stage(name, func, tuple(inputs), params, fingerprint, tuple(depends))
+        self.stages[name] = stage
+        return stage
+
+    def keys(self) -> dict[str, str]:
+        """Cache key of every stage, computed without running anything."""
+        keys: dict[str, str] = {}
+        for name, stage in self.stages.items():  # insertion order is topological
+            payload = {
+                "name": name,
+                "source": [_source(f) for f in (stage.func, *stage.depends)],
+                "params": stage.params,
+                "fingerprint": stage.fingerprint() if stage.fingerprint else None,
+                "inputs": {i: keys[i] for i in stage.inputs},
+            }
+            encoded = json.dumps(payload, sort_keys=True, default=repr).encode()
+            keys[name] = hashlib.sha256(encoded).hexdigest()[:20]
+        return keys
+
+    def _path(self, name: str, key: str) -> Path:
+        return self.cache_dir / name / f"{key}.pkl"
+
+    def stale(self) -> list[str]:
+        """Stages without a stored result for their current key."""
+        return [name for name, key in self.keys().items() if not self._path(name, key).exists()]
+
+    def prune(self) -> list[Path]:
+        """Delete stored results of this pipeline's stages that are not under a current key.
+
+        Returns:
+            The files removed.
+        """
+        keys = self.keys()
+        removed = []
+        for name, key in keys.items():
+            directory = self.cache_dir / name
+            if not directory.is_dir():
+                continue
+            for path in directory.iterdir():
+                if path.name != f"{key}.pkl":
+                    path.unlink(missing_ok=True)
+                    removed.append(path)
+        return removed
+
+    def run(self, targets: Iterable[str] | None = None, force: Iterable[str] = ()) -> dict[str, Any]:
+        """Produce the results of ``targets`` (every leaf stage by default).
+
+        Args:
+            targets: Stage names whose results are wanted.
+            force: Stages to re-execute even if a result is stored.
+
+        Returns:
+            Mapping of each target name to its result.
+        """
+        keys = self.keys()
+        force = set(force)
+        if targets is None:
+            used = {i for stage in self.stages.values() for i in stage.inputs}
+            targets = [name for name in self.stages if name not in used]
+        self.executed = []
+        results: dict[str, Any] = {}
+
+        def resolve(name: str) -> Any:
+            if name in results:
+                return results[name]
+            stage = self.stages[name]
+            path = self._path(name, keys[name])
+            if path.exists() and name not in force:
+                with instrument(name, metrics=self.metrics) as run:
+                    with open(path, "rb") as fh:
+                        value = pickle.load(fh)
+                    run.rows_out = count_rows(value)
+                    run.extra.update(cached=True, key=keys[name])
+            else:
+                inputs = [resolve(i) for i in stage.inputs]
+                sizes = [n for n in map(count_rows, inputs) if n is not None]
+                with instrument(name, rows_in=sum(sizes) if sizes else None, metrics=self.metrics) as run:
+                    value = stage.func(*inputs, **stage.params)
+                    run.rows_out = count_rows(value)
+                    run.extra.update(cached=False, key=keys[name])
+                self.executed.append(name)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".tmp")
+                with open(tmp, "wb") as fh:
+                    pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, path)
+            results[name] = value
+            return value
+
+        with copy_on_write():
+            return {name: resolve(name) for name in targets}
+
+
+def build_pipeline(wdi_path: str | os.PathLike, client=None, indicator: str = "MORT_100",
+                   years: tuple[int, int] = (2014, 2023), keep: Sequence[str] = (),
+                   select: dict | None = None, cache_dir: str | os.PathLike = ".cache/stages",
+                   metrics: MetricsRegistry | None = None) -> Pipeline:
+    """The gather → clean → combine → analyze pipeline of the notebook.
+
+    ``analyze`` is :func:`~income_health.stats.summarize` of the combined
+    panel: per-country correlations of log GDP with the mortality rate.
+
+    Args:
+        wdi_path: GDP file; the gather stage re-runs when it changes.
+        client: :class:`~income_health.gho.GHOClient`; a default one is
+            created if omitted. The download re-runs once a day and
+            whenever the client's service URL changes.
+        indicator: GHO indicator code.
+        years: Window of years to combine.
+        keep: GHO dimensions kept through the combine step.
+        select: Row filter applied to GHO data before collapsing.
+        cache_dir: Where stage results are stored.
+        metrics: Registry stage metrics are recorded in.
+    """
+    from income_health.clean import clean_gdp, clean_mortality
+    from income_health.combine import collapse_dimensions, combine_gdp_mortality, join_long
+    from income_health.gho import DEFAULT_FIELDS, GHOClient
+    from income_health.reshape import wide_to_long
+    from income_health.stats import Panel, difference, growth, pearson, spearman, summarize
+    from income_health.streaming import ColumnBuilder, ValueStream
+    from income_health.wdi import WDIHeader, load_wdi, read_wdi_header, year_columns
+
+    client = client or GHOClient()
+
+    def mortality_fingerprint():
+        return json.dumps({"day": daily_fingerprint(), "base_url": client.base_url})
+
+    def gather_mortality(indicator, fields):
+        return client.fetch(indicator, fields=fields, stream=True)
+
+    def combine(gdp_clean, mortality_clean, years, keep, select):
+        return combine_gdp_mortality(mortality_clean, gdp_clean, years=tuple(years), keep=keep, select=select)
+
+    def analyze(combined, min_periods):
+        return summarize(Panel.from_wide(combined, ["GDP", "Mortality Rate"]), min_periods=min_periods)
+
+    pipeline = Pipeline(cache_dir, metrics)
+    pipeline.add("gdp", load_wdi, fingerprint=file_fingerprint(wdi_path), depends=[read_wdi_header, WDIHeader],
+                 path=os.fspath(wdi_path))
+    pipeline.add("mortality", gather_mortality, fingerprint=mortality_fingerprint,
+                 depends=[GHOClient.fetch, ValueStream, ColumnBuilder], indicator=indicator,
+                 fields=list(DEFAULT_FIELDS))
+    pipeline.add("gdp_clean", clean_gdp, inputs=["gdp"], depends=[year_columns])
+    pipeline.add("mortality_clean", clean_mortality, inputs=["mortality"])
+    pipeline.add("combined", combine, inputs=["gdp_clean", "mortality_clean"],
+                 depends=[combine_gdp_mortality, collapse_dimensions, join_long, wide_to_long],
+                 years=list(years), keep=list(keep), select=select)
+    pipeline.add("analyze", analyze, inputs=["combined"],
+                 depends=[summarize, Panel.from_wide, Panel.from_long, pearson, spearman, growth, difference],
+                 min_periods=3)
+    return pipeline
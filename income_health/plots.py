@@ -0,0 +1,265 @@
+"""Figures for the research questions that scale with pixels, not rows.
+
+Drawing one marker per observation gets slower with every row added. The
+functions here aggregate first with NumPy and then draw a fixed-size image
+or a handful of artists, so render time depends on the figure resolution.
+Without an ``ax`` they draw on a standalone Agg figure, which needs no
+display and touches no global pyplot state, so they are safe to call from
+batch jobs and worker processes. matplotlib is imported only when a
+figure is actually drawn.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def _figure(figsize, dpi):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+def _save(figure, path: str | os.PathLike | None) -> None:
+    if path is not None:
+        os.makedirs(os.path.dirname(os.fspath(path)) or ".", exist_ok=True)
+        figure.savefig(path)
+
+
+def density_scatter(frame: pd.DataFrame, x: str = "GDP", y: str = "Mortality Rate",
+                    label: str = "Country Code", highlight: Sequence[str] = (), log_x: bool = True,
+                    bins: tuple[int, int] = (256, 192), ax=None, path: str | os.PathLike | None = None,
+                    figsize: tuple[float, float] = (10, 6), dpi: int = 100,
+                    title: str | None = None):
+    """Plot ``y`` against ``x`` as a 2D histogram instead of one marker per row.
+
+    Args:
+        frame: Observations with columns ``x``, ``y`` and ``label``.
+        x: Column on the horizontal axis; log10-scaled when ``log_x``.
+        y: Column on the vertical axis.
+        label: Column identifying the entity, used for ``highlight``.
+        highlight: Entities whose observations are drawn as markers on top.
+        log_x: Bin ``x`` on a log10 scale (non-positive values are dropped).
+        bins: Number of bins along x and y.
+        ax: Axes to draw on; a new headless figure is created when omitted.
+        path: Write the figure to this PNG file.
+        figsize: Size of a newly created figure, in inches.
+        dpi: Resolution of a newly created figure.
+        title: Axes title; defaults to ``"<x> vs <y>"``.
+
+    Returns:
+        The matplotlib ``Figure``.
+    """
+    from matplotlib.colors import LogNorm
+
+    xs = frame[x].to_numpy(dtype=np.float64)
+    ys = frame[y].to_numpy(dtype=np.float64)
+    valid = np.isfinite(xs) & np.isfinite(ys)
+    if log_x:
+        valid &= xs > 0
+    xs, ys = xs[valid], ys[valid]
+    if log_x:
+        xs = np.log10(xs)
+
+    counts, x_edges, y_edges = np.histogram2d(xs, ys, bins=bins) if len(xs) else \
+        (np.zeros((1, 1)), np.array([0.0, 1.0]), np.array([0.0, 1.0]))
+
+    figure = ax.figure if ax is not None else _figure(figsize, dpi)
+    ax = ax if ax is not None else figure.add_subplot()
+    image = ax.imshow(np.ma.masked_equal(counts.T, 0), origin="lower", aspect="auto",
+                      extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]),
+                      cmap="viridis", norm=LogNorm(vmin=1, vmax=max(counts.max(), 1)),
+                      interpolation="nearest")
+    figure.colorbar(image, ax=ax, label="Observations")
+
+    if highlight:
+        selected = frame[frame[label].isin(list(highlight))]
+        for name, rows in selected.groupby(selected[label].astype(str), sort=True):
+            hx = rows[x].to_numpy(dtype=np.float64)
+            hy = rows[y].to_numpy(dtype=np.float64)
+            keep = np.isfinite(hx) & np.isfinite(hy) & ((hx > 0) if log_x else True)
+            ax.plot(np.log10(hx[keep]) if log_x else hx[keep], hy[keep], marker="o", markersize=4,
+                    linestyle="none", label=name)
+        ax.legend(title=label, loc="upper right")
+
+    ax.set_title(title or f"{x} vs {y}")
+    ax.set_xlabel(f"log10 {x}" if log_x else x)
+    ax.set_ylabel(y)
+    _save(figure, path)
+    return figure
+
+
+def country_year_matrix(frame: pd.DataFrame, value: str = "GDP", entity: str = "Country Name",
+                        year: str = "Year") -> tuple[pd.Index, np.ndarray, np.ndarray]:
+    """Pivot long observations into a dense entity × year array in one pass.
+
+    Duplicate (entity, year) observations are averaged. A datetime ``year``
+    column is reduced to its calendar year.
+
+    Returns:
+        ``(entities, years, matrix)`` where ``matrix[i, j]`` is the value of
+        ``entities[i]`` in ``years[j]`` and missing cells are ``NaN``.
+    """
+    years_col = frame[year]
+    if pd.api.types.is_datetime64_any_dtype(years_col):
+        years_col = years_col.dt.year
+    year_values = years_col.to_numpy(dtype=np.int64)
+    values = frame[value].to_numpy(dtype=np.float64)
+    codes, entities = pd.factorize(frame[entity].astype(str), sort=True)
+
+    valid = np.isfinite(values) & (codes >= 0)
+    if not valid.any():
+        return pd.Index(entities), np.empty(0, dtype=np.int64), np.empty((len(entities), 0))
+    first = year_values[valid].min()
+    years = np.arange(first, year_values[valid].max() + 1)
+    shape = (len(entities), len(years))
+    sums = np.zeros(shape)
+    counts = np.zeros(shape)
+    np.add.at(sums, (codes[valid], year_values[valid] - first), values[valid])
+    np.add.at(counts, (codes[valid], year_values[valid] - first), 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        matrix = sums / counts
+    return pd.Index(entities), years, matrix
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept; each bucket in between keeps
+    the point forming the largest triangle with the previous pick and the
+    average of the next bucket, which preserves peaks and troughs.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    picked = np.empty(threshold, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], max(edges[i + 1], edges[i] + 1)
+        nxt_stop = edges[i + 2] if i + 2 < len(edges) else n
+        nxt_start = stop if stop < nxt_stop else n - 1
+        avg_x = x[nxt_start:nxt_stop].mean() if nxt_stop > nxt_start else x[-1]
+        avg_y = y[nxt_start:nxt_stop].mean() if nxt_stop > nxt_start else y[-1]
+        bx, by = x[start:stop], y[start:stop]
+        area = np.abs((x[previous] - avg_x) * (by - y[previous]) - (x[previous] - bx) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        picked[i + 1] = previous
+    return picked
+
+
+def _segments(years: np.ndarray, matrix: np.ndarray, max_points: int | None) -> list[np.ndarray]:
+    segments = []
+    for row in matrix:
+        keep = np.isfinite(row)
+        xs, ys = years[keep].astype(np.float64), row[keep]
+        if max_points is not None and len(xs) > max_points:
+            index = lttb(xs, ys, max_points)
+            xs, ys = xs[index], ys[index]
+        segments.append(np.column_stack([xs, ys]))
+    return segments
+
+
+def timeseries_plot(frame: pd.DataFrame, value: str = "GDP", entity: str = "Country Name",
+                    year: str = "Year", top: int | None = 10, entities: Sequence[str] | None = None,
+                    groups: dict | pd.Series | None = None, max_points: int | None = None,
+                    log_y: bool = False, ax=None, path: str | os.PathLike | None = None,
+                    figsize: tuple[float, float] = (12, 6), dpi: int = 100, ncols: int = 3,
+                    title: str | None = None):
+    """Plot one line per entity from a precomputed entity × year array.
+
+    The series are computed once with :func:`country_year_matrix` and drawn
+    with one ``LineCollection`` per panel instead of one estimator and one
+    artist per hue.
+
+    Args:
+        frame: Long observations.
+        value: Column with the plotted value.
+        entity: Column naming the series, e.g. ``"Country Name"``.
+        year: Year column (integer or datetime).
+        top: Keep only the entities with the largest latest value; ``None``
+            keeps all. Ignored when ``entities`` is given.
+        entities: Explicit list of entities to plot.
+        groups: Mapping of entity to group (region, income group...) to draw
+            one small-multiple panel per group.
+        max_points: Downsample each series to at most this many points
+            with :func:`lttb`.
+        log_y: Use a logarithmic y axis.
+        ax: Axes to draw on (single-panel plots only).
+        path: Write the figure to this PNG file.
+        figsize, dpi: Size and resolution of a newly created figure.
+        ncols: Panels per row when faceting.
+        title: Figure title; defaults to ``"<value> over time"``.
+
+    Returns:
+        The matplotlib ``Figure``.
+    """
+    from matplotlib.collections import LineCollection
+    from matplotlib.lines import Line2D
+
+    names, years, matrix = country_year_matrix(frame, value, entity, year)
+    if entities is not None:
+        wanted = names.get_indexer(pd.Index([str(e) for e in entities]))
+        rows = wanted[wanted >= 0]
+    elif top is not None and len(names) > top:
+        # Latest available value of every series, found without a Python loop.
+        filled = pd.DataFrame(matrix).ffill(axis=1).to_numpy()
+        latest = filled[:, -1] if filled.size else np.zeros(len(names))
+        rows = np.argsort(np.nan_to_num(latest, nan=-np.inf))[::-1][:top]
+    else:
+        rows = np.arange(len(names))
+    names, matrix = names[rows], matrix[rows]
+
+    if groups is not None:
+        mapping = pd.Series(groups)
+        labels = mapping.reindex(names).fillna("Other").to_numpy()
+        panels = sorted(set(labels))
+    else:
+        labels = np.full(len(names), "", dtype=object)
+        panels = [""]
+
+    if ax is not None and len(panels) > 1:
+        raise ValueError("faceted plots create their own figure; do not pass ax")
+    if ax is not None:
+        figure, axes = ax.figure, [ax]
+    else:
+        figure = _figure(figsize, dpi)
+        cols = min(ncols, len(panels))
+        grid_rows = -(-len(panels) // cols)
+        axes = list(np.atleast_1d(figure.subplots(grid_rows, cols, sharex=True, sharey=True, squeeze=False)).ravel())
+        for extra in axes[len(panels):]:
+            extra.set_visible(False)
+
+    import matplotlib
+
+    cmap = matplotlib.colormaps["tab20"]
+    colors = cmap(np.arange(len(names)) % cmap.N)
+    segments = _segments(years, matrix, max_points)
+    for panel_ax, panel in zip(axes, panels):
+        members = np.flatnonzero(labels == panel)
+        collection = LineCollection([segments[i] for i in members], colors=colors[members], linewidths=1.5)
+        panel_ax.add_collection(collection)
+        panel_ax.autoscale_view()
+        if log_y:
+            panel_ax.set_yscale("log")
+        if panel:
+            panel_ax.set_title(str(panel))
+        if len(members) <= 12:
+            handles = [Line2D([], [], color=colors[i]) for i in members]
+            panel_ax.legend(handles, [names[i] for i in members], title=entity, fontsize="small",
+                            loc="upper left", bbox_to_anchor=(1.02, 1) if len(panels) == 1 else None)
+        panel_ax.set_xlabel("Year")
+        panel_ax.set_ylabel(value)
+
+    figure.suptitle(title or f"{value} over time")
+    figure.tight_layout()
+    _save(figure, path)
+    return figure
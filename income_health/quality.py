@@ -0,0 +1,180 @@
+"""Single-pass data-quality profiling.
+
+Repeated ``head()``/``info()``/``isnull().sum()`` calls each scan the whole
+frame and only print text. :class:`Profiler` gathers everything the
+assessment needs in one vectorized pass per chunk: null counts and
+all-null columns, dtypes that change between chunks, non-numeric entries
+in value columns, duplicate keys and year coverage per country. Chunks
+can come from ``pd.read_csv(..., chunksize=...)`` so inputs larger than
+memory are profiled in bounded space (apart from the hashes of the keys
+seen). The result is a JSON-serializable report.
+
+A column is reported as a dtype mismatch when pandas infers a different
+dtype for it in different chunks, e.g. ``int64`` in one and ``object`` in
+the next. Values that are wrong in every chunk alike (numbers stored as
+text throughout) are not mismatches; list such columns in ``numeric`` to
+have their unparseable entries counted instead.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+class Profiler:
+    """Accumulate quality statistics over one or more chunks.
+
+    Args:
+        key: Columns that should identify a row, e.g.
+            ``("SpatialDim", "TimeDim")``; duplicates are counted on them.
+        country: Column holding the country code, for year coverage.
+        year: Column holding the year, for year coverage.
+        numeric: Columns expected to be numeric; entries that cannot be
+            parsed as numbers are counted.
+        examples: How many duplicate keys and non-numeric values to keep.
+    """
+
+    def __init__(self, key: Sequence[str] = (), country: str | None = None, year: str | None = None,
+                 numeric: Sequence[str] = (), examples: int = 5):
+        self.key = list(key)
+        self.country = country
+        self.year = year
+        self.numeric = list(numeric)
+        self.examples = examples
+        self.rows = 0
+        self.chunks = 0
+        self._columns: dict[str, dict] = {}
+        # Sorted runs of distinct key hashes, largest first; see _remember_keys.
+        self._seen_keys: list[np.ndarray] = []
+        self._duplicates = 0
+        self._duplicate_examples: list = []
+        # Distinct (country, year) pairs per chunk; merged once by _coverage_pairs.
+        self._coverage: list[pd.DataFrame] = []
+
+    def update(self, chunk: pd.DataFrame) -> "Profiler":
+        """Fold one chunk into the statistics."""
+        self.chunks += 1
+        self.rows += len(chunk)
+        nulls = chunk.isna().sum()
+        for name, dtype in chunk.dtypes.items():
+            stats = self._columns.setdefault(str(name), {
+                "dtype": str(dtype), "dtypes_seen": [], "nulls": 0,
+            })
+            if str(dtype) not in stats["dtypes_seen"]:
+                stats["dtypes_seen"].append(str(dtype))
+            stats["nulls"] += int(nulls[name])
+
+        for name in self.numeric:
+            self._update_numeric(name, chunk[name])
+        if self.key:
+            self._update_keys(chunk)
+        if self.country and self.year:
+            self._coverage.append(chunk[[self.country, self.year]].dropna().drop_duplicates())
+        return self
+
+    def _update_numeric(self, name: str, column: pd.Series) -> None:
+        stats = self._columns[str(name)]
+        parsed = pd.to_numeric(column, errors="coerce")
+        bad = parsed.isna() & column.notna()
+        stats["non_numeric"] = stats.get("non_numeric", 0) + int(bad.sum())
+        examples = stats.setdefault("non_numeric_examples", [])
+        if len(examples) < self.examples and bad.any():
+            examples.extend(column[bad].astype(str).unique()[: self.examples - len(examples)].tolist())
+        if parsed.notna().any():
+            low, high = float(parsed.min()), float(parsed.max())
+            stats["min"] = min(stats.get("min", low), low)
+            stats["max"] = max(stats.get("max", high), high)
+
+    def _update_keys(self, chunk: pd.DataFrame) -> None:
+        hashes = pd.util.hash_pandas_object(chunk[self.key], index=False).to_numpy(dtype=np.uint64)
+        within = pd.Series(hashes).duplicated().to_numpy()
+        earlier = np.zeros(len(hashes), dtype=bool)
+        for run in self._seen_keys:
+            position = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            earlier |= run[position] == hashes
+        duplicate = within | earlier
+        self._duplicates += int(duplicate.sum())
+        if len(self._duplicate_examples) < self.examples and duplicate.any():
+            rows = chunk.loc[duplicate, self.key].drop_duplicates().head(self.examples)
+            self._duplicate_examples.extend(
+                rows.astype(str).to_dict("records")[: self.examples - len(self._duplicate_examples)])
+        self._remember_keys(np.unique(hashes[~duplicate]))
+
+    def _remember_keys(self, hashes: np.ndarray) -> None:
+        """Add new distinct hashes, merging runs so each is at least twice the next.
+
+        That keeps the number of runs logarithmic in the keys seen and every
+        hash is merged a logarithmic number of times, so the cost per chunk
+        does not grow linearly with the chunks before it.
+        """
+        if not len(hashes):
+            return
+        runs = self._seen_keys
+        runs.append(hashes)
+        while len(runs) > 1 and len(runs[-2]) < 2 * len(runs[-1]):
+            last = runs.pop()
+            runs[-1] = np.union1d(runs[-1], last)
+
+    def _coverage_pairs(self) -> pd.DataFrame:
+        """Distinct (country, year) pairs over every chunk so far."""
+        if len(self._coverage) > 1:
+            self._coverage = [pd.concat(self._coverage, ignore_index=True).drop_duplicates()]
+        return self._coverage[0]
+
+    def report(self) -> dict:
+        """Summarize everything seen so far as a JSON-serializable dict."""
+        columns = {}
+        for name, stats in self._columns.items():
+            entry = dict(stats)
+            entry["null_fraction"] = stats["nulls"] / self.rows if self.rows else 0.0
+            entry["all_null"] = self.rows > 0 and stats["nulls"] == self.rows
+            entry["dtype_mismatch"] = len(stats["dtypes_seen"]) > 1
+            columns[name] = entry
+        report = {
+            "rows": self.rows,
+            "chunks": self.chunks,
+            "columns": columns,
+            "all_null_columns": [n for n, c in columns.items() if c["all_null"]],
+            "dtype_mismatches": [n for n, c in columns.items() if c["dtype_mismatch"]],
+            "non_numeric": {n: columns[str(n)].get("non_numeric", 0) for n in self.numeric},
+        }
+        if self.key:
+            report["duplicate_keys"] = {"key": self.key, "rows": self._duplicates,
+                                        "examples": self._duplicate_examples}
+        if self._coverage:
+            coverage = self._coverage_pairs()
+            years = pd.to_numeric(coverage[self.year], errors="coerce")
+            grouped = years.groupby(coverage[self.country].astype(str))
+            span = grouped.agg(["min", "max", "nunique"])
+            report["year_coverage"] = {
+                country: {"first": int(row["min"]), "last": int(row["max"]), "years": int(row["nunique"]),
+                          "missing": int(row["max"] - row["min"] + 1 - row["nunique"])}
+                for country, row in span.iterrows()
+            }
+        return report
+
+    def to_json(self, path: str | os.PathLike) -> dict:
+        """Write the report to ``path`` and return it."""
+        report = self.report()
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        return report
+
+
+def profile(data: pd.DataFrame | Iterable[pd.DataFrame], **options) -> dict:
+    """Profile a frame or an iterable of chunks; see :class:`Profiler` for options."""
+    profiler = Profiler(**options)
+    for chunk in [data] if isinstance(data, pd.DataFrame) else data:
+        profiler.update(chunk)
+    return profiler.report()
+
+
+def null_counts(report: dict) -> pd.Series:
+    """Columns with missing values and how many, as ``isnull().sum()`` would show."""
+    counts = pd.Series({name: c["nulls"] for name, c in report["columns"].items()}, dtype="int64")
+    return counts[counts > 0]
@@ -0,0 +1,311 @@
+"""Incremental refresh of the stored GDP, mortality and combined panels.
+
+A full rebuild re-parses the whole WDI file, re-downloads all of MORT_100
+and rewrites every output. :func:`refresh` only does the work a new
+release requires:
+
+* WDI is re-parsed only when its ``Last Updated Date`` marker differs from
+  the one recorded at the previous refresh, and only GDP values that are
+  new or changed are kept as the delta;
+* GHO is queried with ``$filter=TimeDim gt <stored maximum>`` so only new
+  years are downloaded;
+* the combined panel is recomputed for the affected (country, year) keys
+  only, and every dataset is written with :meth:`SnapshotStore.update`,
+  which rewrites just the years that changed.
+
+The combined panel is recomputed with the same join, year window, kept
+dimensions and entity filtering as a full build, and keeps its dtypes; the
+scope it was built with is recorded in its snapshot manifest.
+
+Revisions to already stored GHO years are not picked up by the ``TimeDim``
+filter; pass ``full_gho=True`` to re-fetch everything. Rows that vanished
+upstream are deleted from the refreshed window: every year of a re-parsed
+WDI file and, with ``full_gho``, every stored GHO year (unless the server
+returns nothing at all).
+
+Each step is recorded in the instrumentation registry as
+``refresh.gdp``, ``refresh.mortality``, ``refresh.write`` and
+``refresh.combined``.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from income_health.combine import COUNTRY, YEAR, collapse_dimensions, join_long
+from income_health.entities import EntityIndex
+from income_health.gho import GHOClient
+from income_health.instrument import instrument
+from income_health.reshape import wide_to_long
+from income_health.store import SnapshotStore
+from income_health.wdi import load_wdi, read_wdi_header
+
+GDP_DATASET = "gdp"
+MORTALITY_DATASET = "mortality"
+COMBINED_DATASET = "combined"
+STATE_FILE = "refresh_state.json"
+
+KEYS = [COUNTRY, YEAR]
+
+
+@dataclass
+class RefreshResult:
+    """What a call to :func:`refresh` changed."""
+
+    wdi_reparsed: bool = False
+    gdp_rows: int = 0
+    mortality_rows: int = 0
+    combined_rows: int = 0
+    affected_keys: int = 0
+    snapshots: dict = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _load_state(store: SnapshotStore) -> dict:
+    try:
+        with open(store.root / STATE_FILE, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_state(store: SnapshotStore, state: dict) -> None:
+    store.root.mkdir(parents=True, exist_ok=True)
+    tmp = store.root / (STATE_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(state, fh, indent=2)
+    os.replace(tmp, store.root / STATE_FILE)
+
+
+def _plain(frame: pd.DataFrame) -> pd.DataFrame:
+    """Drop categorical dtypes so frames from different runs concatenate cleanly."""
+    return frame.astype({c: str for c, t in frame.dtypes.items() if isinstance(t, pd.CategoricalDtype)})
+
+
+def _typed(frame: pd.DataFrame) -> pd.DataFrame:
+    """Restore the dtypes of freshly built panels: categorical labels and ``int16`` years."""
+    labels = {c: "category" for c, t in frame.dtypes.items()
+              if c != YEAR and not pd.api.types.is_numeric_dtype(t)}
+    return frame.astype({**labels, YEAR: "int16"})
+
+
+def _key_index(frame: pd.DataFrame, keys: Sequence[str] = KEYS) -> pd.MultiIndex:
+    return pd.MultiIndex.from_arrays([frame[k].astype(int) if k == YEAR else frame[k].astype(str)
+                                      for k in keys])
+
+
+def changed_rows(old: pd.DataFrame, new: pd.DataFrame, value: str, keys: Sequence[str] = KEYS) -> pd.DataFrame:
+    """Rows of ``new`` whose key is absent from ``old`` or whose ``value`` differs."""
+    if old.empty:
+        return new
+    previous = pd.Series(old[value].to_numpy(), index=_key_index(old, keys))
+    before = previous.reindex(_key_index(new, keys)).to_numpy()
+    after = new[value].to_numpy()
+    same = (before == after) | (np.isnan(before) & np.isnan(after))
+    return new[~same]
+
+
+def removed_keys(old: pd.DataFrame, new: pd.DataFrame, keys: Sequence[str] = KEYS) -> pd.MultiIndex:
+    """Keys of ``old`` that no longer appear in ``new``."""
+    if old.empty:
+        return _key_index(new.iloc[:0], keys)
+    previous = _key_index(old, keys)
+    return previous[~previous.isin(_key_index(new, keys))].unique()
+
+
+def upsert(base: pd.DataFrame, delta: pd.DataFrame, keys: Sequence[str] = KEYS,
+           removed: pd.MultiIndex | None = None) -> pd.DataFrame:
+    """Replace rows of ``base`` by key with those of ``delta``, append new keys and drop ``removed`` ones."""
+    if removed is not None and len(removed) and not base.empty:
+        base = base[~_key_index(base, keys).isin(removed)]
+    if base.empty:
+        return _typed(_plain(delta).reset_index(drop=True))
+    merged = pd.concat([_plain(base), _plain(delta)], ignore_index=True)
+    merged = merged.drop_duplicates(list(keys), keep="last").sort_values(list(keys)).reset_index(drop=True)
+    return _typed(merged)
+
+
+def _read_years(store: SnapshotStore, name: str, years: Sequence[int]) -> pd.DataFrame:
+    if not store.exists(name):
+        return pd.DataFrame(columns=KEYS)
+    return _plain(store.read(name, partitions=sorted(set(years))))
+
+
+def _save(store: SnapshotStore, name: str, frame: pd.DataFrame, replace: bool = False, drop: Sequence[int] = (),
+          **provenance) -> dict:
+    if store.exists(name) and not replace:
+        return store.update(name, frame, drop=drop, **provenance)
+    return store.write(name, frame, partition_by=YEAR, **provenance)
+
+
+def combined_scope(years: tuple[int, int] | None = None, keep: Sequence[str] = (), select: dict | None = None,
+                   entities: EntityIndex | None = None, countries_only: bool = True) -> dict:
+    """What a combined panel was built from, recorded as ``extra["scope"]`` of its snapshots.
+
+    :func:`refresh` compares it with the scope of the stored panel and
+    rebuilds the panel instead of patching it when they differ.
+    """
+    return {"years": [int(y) for y in years] if years is not None else None, "keep": list(keep),
+            "select": select or None, "entities": entities is not None,
+            "countries_only": bool(countries_only) if entities is not None else None}
+
+
+def stored_scope(store: SnapshotStore, name: str = COMBINED_DATASET) -> dict | None:
+    """Scope recorded with the latest snapshot of ``name``, if any."""
+    if not store.exists(name):
+        return None
+    return store.manifest(name).get("extra", {}).get("scope")
+
+
+def refresh(store: SnapshotStore, wdi_path: str | os.PathLike, client: GHOClient | None = None,
+            indicator: str = "MORT_100", select: dict | None = None, full_gho: bool = False,
+            years: tuple[int, int] | None = None, keep: Sequence[str] | None = None,
+            entities: EntityIndex | None = None, countries_only: bool = True) -> RefreshResult:
+    """Bring the stored panels up to date with the latest WDI file and GHO data.
+
+    The combined panel is recomputed with
+    :func:`~income_health.combine.join_long`, the same join the full build
+    uses, so it keeps the build's columns, dtypes, year window and kept
+    dimensions. ``years``, ``keep`` and ``select`` default to the scope
+    recorded with the stored panel (see :func:`combined_scope`); when the
+    requested scope differs, the whole panel is rebuilt and replaced.
+
+    Args:
+        store: Where the ``gdp``, ``mortality`` and ``combined`` datasets live.
+        wdi_path: Current GDP file, e.g. from :func:`~income_health.wdi.download_wdi`.
+        client: GHO client; ``None`` skips the GHO side of the refresh.
+        indicator: GHO indicator code.
+        select: Row filter applied to GHO data before collapsing dimensions.
+        full_gho: Re-fetch every GHO year instead of only new ones.
+        years: Inclusive window of the combined panel; ``gdp`` and
+            ``mortality`` are always stored in full.
+        keep: GHO dimensions kept in the mortality and combined keys.
+        entities: Canonicalize country codes through this index, as in
+            :func:`~income_health.combine.combine_gdp_mortality`.
+        countries_only: With ``entities``, drop aggregates and regions.
+
+    Returns:
+        A summary of what was re-parsed, downloaded and rewritten.
+    """
+    state = _load_state(store)
+    result = RefreshResult()
+    fetched_at = datetime.now(timezone.utc).isoformat()
+    previous = stored_scope(store)
+    if previous is not None:
+        years = years if years is not None else previous["years"]
+        keep = keep if keep is not None else previous["keep"]
+        select = select if select is not None else previous["select"]
+    keep = list(keep or ())
+    scope = combined_scope(years, keep, select, entities, countries_only)
+    mortality_keys = [*KEYS, *keep]
+
+    # The mortality dataset is collapsed with keep/select; a different choice needs every year again.
+    mortality_scope = {"keep": keep, "select": select or None}
+    rebuild_mortality = (store.exists(MORTALITY_DATASET)
+                         and state.get("mortality_scope", {"keep": [], "select": None}) != mortality_scope)
+    full_gho = full_gho or rebuild_mortality
+
+    # GDP: re-parse only when the World Bank published a new release.
+    gdp_delta = pd.DataFrame(columns=KEYS)
+    gdp_removed = _key_index(gdp_delta)
+    header = read_wdi_header(wdi_path)
+    if header.last_updated is None or header.last_updated != state.get("wdi_last_updated"):
+        result.wdi_reparsed = True
+        with instrument("refresh.gdp") as run:
+            wdi = load_wdi(wdi_path)
+            fresh = _plain(wide_to_long(wdi, (COUNTRY, "Country Name"), value_name="GDP", year_name=YEAR))
+            stored = _read_years(store, GDP_DATASET, header.years)
+            gdp_delta = changed_rows(stored, fresh, "GDP")
+            gdp_removed = removed_keys(stored, fresh)
+            run.rows_in, run.rows_out = len(fresh), len(gdp_delta)
+        state["wdi_last_updated"] = header.last_updated
+
+    # Mortality: ask the server only for years after the stored maximum.
+    mortality_delta = pd.DataFrame(columns=mortality_keys)
+    mortality_removed = _key_index(mortality_delta, mortality_keys)
+    if client is not None:
+        since = None if full_gho else state.get("gho_max_year", {}).get(indicator)
+        extra = f"TimeDim gt {int(since)}" if since is not None else None
+        with instrument("refresh.mortality") as run:
+            gho = client.fetch(indicator, extra_filter=extra)
+            run.rows_in = len(gho)
+            if not gho.empty:
+                mortality_delta = _plain(collapse_dimensions(gho, keep=keep, select=select)
+                                         .rename(columns={"Value": "Mortality Rate"}))
+                if full_gho and store.exists(MORTALITY_DATASET) and not rebuild_mortality:
+                    stored = _plain(store.read(MORTALITY_DATASET))
+                    mortality_removed = removed_keys(stored, mortality_delta, mortality_keys)
+                    mortality_delta = changed_rows(stored, mortality_delta, "Mortality Rate", mortality_keys)
+                top = int(gho["TimeDim"].max())
+                state.setdefault("gho_max_year", {})[indicator] = max(top, since or top)
+            run.rows_out = len(mortality_delta)
+        state["mortality_scope"] = mortality_scope
+
+    # Write the deltas, touching only the years they belong to.
+    with instrument("refresh.write", rows_in=len(gdp_delta) + len(mortality_delta)):
+        for name, delta, removed, keys, source in (
+                (GDP_DATASET, gdp_delta, gdp_removed, KEYS, str(wdi_path)),
+                (MORTALITY_DATASET, mortality_delta, mortality_removed, mortality_keys, indicator)):
+            if delta.empty and not len(removed):
+                continue
+            replace = name == MORTALITY_DATASET and rebuild_mortality
+            touched = set(delta[YEAR].astype(int)) | set(removed.get_level_values(1))
+            base = pd.DataFrame(columns=keys) if replace else _read_years(store, name, touched)
+            merged = upsert(base, delta, keys, removed)
+            emptied = touched - set(merged[YEAR].astype(int))
+            result.snapshots[name] = _save(store, name, merged, replace, drop=emptied, source=source,
+                                           fetched_at=fetched_at)["id"]
+    result.gdp_rows, result.mortality_rows = len(gdp_delta), len(mortality_delta)
+
+    # Recompute the combined panel for the affected country-years only, or
+    # entirely when it does not exist yet or was built with another scope.
+    rebuild = previous != scope or rebuild_mortality
+    if rebuild:
+        gdp = _plain(store.read(GDP_DATASET)) if store.exists(GDP_DATASET) else pd.DataFrame(columns=KEYS)
+        mortality = (_plain(store.read(MORTALITY_DATASET)) if store.exists(MORTALITY_DATASET)
+                     else pd.DataFrame(columns=mortality_keys))
+        affected = _key_index(gdp).union(_key_index(mortality))
+    else:
+        removed = gdp_removed.union(mortality_removed.droplevel(list(range(len(KEYS), len(mortality_keys)))))
+        affected = _key_index(gdp_delta).union(_key_index(mortality_delta)).union(removed)
+    if years is not None:
+        affected = affected[(affected.get_level_values(1) >= years[0]) & (affected.get_level_values(1) <= years[1])]
+    result.affected_keys = len(affected)
+    affected_years = sorted(set(affected.get_level_values(1)))
+    if not affected_years:
+        _save_state(store, state)
+        return result
+
+    with instrument("refresh.combined", rows_in=len(affected)) as run:
+        if not rebuild:
+            gdp = _read_years(store, GDP_DATASET, affected_years)
+            mortality = _read_years(store, MORTALITY_DATASET, affected_years)
+        if not (store.exists(GDP_DATASET) and store.exists(MORTALITY_DATASET)):
+            _save_state(store, state)
+            return result
+        gdp = gdp[_key_index(gdp).isin(affected)]
+        mortality = mortality[_key_index(mortality).isin(affected)]
+        recomputed = join_long(mortality, gdp, keep=keep, entities=entities, countries_only=countries_only)
+
+        combined = pd.DataFrame(columns=recomputed.columns)
+        if not rebuild:
+            combined = _read_years(store, COMBINED_DATASET, affected_years)
+            if not combined.empty:
+                combined = combined[~_key_index(combined).isin(affected)]
+        combined = upsert(combined, recomputed, mortality_keys)[list(recomputed.columns)]
+        result.combined_rows = run.rows_out = len(recomputed)
+        emptied = set(affected_years) - set(combined[YEAR].astype(int))
+        result.snapshots[COMBINED_DATASET] = _save(store, COMBINED_DATASET, combined, rebuild, drop=emptied,
+                                                   source=indicator, fetched_at=fetched_at,
+                                                   extra={"scope": scope})["id"]
+    _save_state(store, state)
+    return result
@@ -0,0 +1,243 @@
+"""Batch reports for every region and income-group slice of the panel.
+
+:func:`batch_report` builds the dense :class:`~income_health.stats.Panel`
+once, writes its values to a ``.npy`` file and hands worker processes
+only the path: each worker memory-maps the file read-only, so the panel
+is neither pickled per task nor copied per process. Every slice (a WDI
+region, an income group, a WHO region or a crossing such as region ×
+income group) is a list of row indices into that array; the worker
+computes its statistics, draws its figures on headless Agg canvases and
+writes them under ``<output>/<slice>/``. ``<output>/index.json`` lists
+every slice with its headline numbers and files.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tracemalloc
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from itertools import product
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from income_health.entities import EntityIndex
+from income_health.instrument import instrument
+from income_health.stats import Panel, bootstrap_ci, difference, growth, pearson, pooled, spearman
+
+# Single groupings plus the region × income group crossing: 7 + 4 + 6 + 28 slices.
+DEFAULT_GROUPINGS: tuple = ("region", "income_group", "who_region", ("region", "income_group"))
+PANEL_FILE = "_panel.npy"
+INDEX_FILE = "index.json"
+
+# Set in each worker by _init_worker.
+_shared: dict = {}
+
+
+def slices(entities: EntityIndex, codes: Sequence[str], groupings: Sequence = DEFAULT_GROUPINGS,
+           min_countries: int = 3, include_all: bool = True) -> list[dict]:
+    """Slices of ``codes`` (the panel's entity axis) by region and income group.
+
+    Args:
+        entities: Index that knows each country's groups.
+        codes: Entity labels along the panel's first axis.
+        groupings: Grouping names from
+            :data:`~income_health.entities.GROUPINGS`, or tuples of them for
+            crossed slices.
+        min_countries: Skip slices with fewer countries.
+        include_all: Add an ``"all"`` slice of every country.
+
+    Returns:
+        One dict per slice with ``key``, ``title``, ``groups`` (grouping →
+        group code) and ``rows`` (positions in ``codes``).
+
+    Warns:
+        UserWarning: A requested grouping produced no slice, e.g. income
+            groups without the WDI country metadata or WHO regions without
+            GHO data in the index.
+    """
+    ids = entities.encode(codes)
+    countries = np.flatnonzero(entities.kinds(ids))
+    result = []
+    if include_all and len(countries) >= min_countries:
+        result.append({"key": "all", "title": "All countries", "groups": {}, "rows": countries})
+    for grouping in groupings:
+        by = (grouping,) if isinstance(grouping, str) else tuple(grouping)
+        group_ids = np.stack([entities.group_of(ids, b) for b in by])[:, countries]
+        present = [sorted(set(g[g >= 0].tolist())) for g in group_ids]
+        missing = [b for b, groups in zip(by, present) if not groups]
+        if missing:
+            warnings.warn(f"no slices for {' × '.join(by)}: the entity index knows no "
+                          f"{' or '.join(missing)} of any country in the panel", stacklevel=2)
+            continue
+        produced = len(result)
+        for combo in product(*present):
+            rows = countries[(group_ids == np.asarray(combo)[:, None]).all(axis=0)]
+            if len(rows) < min_countries:
+                continue
+            groups = dict(zip(by, entities.decode(list(combo)).tolist()))
+            names = entities.decode(list(combo), "name").tolist()
+            key = "__".join(f"{b}-{code}" for b, code in groups.items())
+            result.append({"key": key, "title": " / ".join(names), "groups": groups, "rows": rows})
+        if len(result) == produced:
+            warnings.warn(f"no slices for {' × '.join(by)}: every group has fewer than {min_countries} "
+                          "countries", stacklevel=2)
+    return result
+
+
+def _init_worker(panel_path: str, entities: list[str], names: list[str], years: list[int],
+                 indicators: list[str]) -> None:
+    # A forked worker inherits the parent's tracemalloc session, which would
+    # trace every allocation of the rendering code.
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    values = np.load(panel_path, mmap_mode="r")
+    _shared["panel"] = Panel(pd.Index(entities), np.asarray(years), pd.Index(indicators), values)
+    _shared["names"] = np.asarray(names, dtype=object)
+
+
+def _finite(value) -> float | None:
+    return float(value) if np.isfinite(value) else None
+
+
+def _slice_frame(panel: Panel, names: np.ndarray, x: str, y: str) -> pd.DataFrame:
+    """Long frame of one slice in the layout the plotting functions expect."""
+    entities, years = len(panel.entities), len(panel.years)
+    return pd.DataFrame({
+        "Country Code": np.repeat(panel.entities.to_numpy(dtype=object), years),
+        "Country Name": np.repeat(names, years),
+        "Year": np.tile(panel.years, entities),
+        x: panel.get(x).ravel(),
+        y: panel.get(y).ravel(),
+    })
+
+
+def _render_slice(task: dict) -> dict:
+    """Statistics and figures of one slice; runs in a worker process."""
+    full, rows = _shared["panel"], task["rows"]
+    # Fancy indexing copies just this slice's rows out of the shared map.
+    panel = Panel(full.entities[rows], full.years, full.indicators, np.asarray(full.values[rows]))
+    names = _shared["names"][rows]
+    x, y, min_periods = task["x"], task["y"], task["min_periods"]
+    gx, gy = panel.get(x), panel.get(y)
+    level = np.log(np.where(gx > 0, gx, np.nan)) if task["log_x"] else gx
+    change_x, change_y = growth(gx, "log"), difference(gy)
+
+    per_country = pd.DataFrame({
+        "name": names,
+        "years": (np.isfinite(gx) & np.isfinite(gy)).sum(axis=1),
+        "pearson": pearson(level, gy, min_periods=min_periods),
+        "spearman": spearman(level, gy, min_periods=min_periods),
+        "growth_vs_change": pearson(change_x, change_y, min_periods=min_periods),
+    }, index=panel.entities)
+    stats = {
+        "countries": len(rows),
+        "observations": int(per_country["years"].sum()),
+        "pooled_pearson": _finite(pooled(level, gy, "pearson", min_periods)),
+        "pooled_spearman": _finite(pooled(level, gy, "spearman", min_periods)),
+        "pooled_growth_vs_change": _finite(pooled(change_x, change_y, "pearson", min_periods)),
+        "median_country_pearson": _finite(per_country["pearson"].median()),
+    }
+    if task["n_boot"]:
+        with warnings.catch_warnings():
+            # Countries without enough years have all-NaN per-country resamples.
+            warnings.simplefilter("ignore", RuntimeWarning)
+            ci = bootstrap_ci(level, gy, n_boot=task["n_boot"], workers=0, seed=task["seed"],
+                              min_periods=min_periods)
+        stats["pooled_pearson_ci"] = [_finite(v) for v in ci["pooled"]]
+
+    directory = Path(task["directory"])
+    directory.mkdir(parents=True, exist_ok=True)
+    files = ["stats.json"]
+    if task["figures"]:
+        from income_health.plots import density_scatter, timeseries_plot
+
+        frame = _slice_frame(panel, names, x, y)
+        density_scatter(frame, x=x, y=y, log_x=task["log_x"], bins=(96, 72), path=directory / "scatter.png",
+                        title=f"{x} vs {y}: {task['title']}")
+        timeseries_plot(frame, value=y, entity="Country Name", top=10, path=directory / "timeseries.png",
+                        title=f"{y} over time: {task['title']}")
+        files += ["scatter.png", "timeseries.png"]
+
+    payload = {"key": task["key"], "title": task["title"], "groups": task["groups"], **stats,
+               "per_country": per_country.astype(object).where(per_country.notna(), None).to_dict("index")}
+    (directory / "stats.json").write_text(json.dumps(payload, indent=2, default=float), encoding="utf-8")
+    return {"key": task["key"], "title": task["title"], "groups": task["groups"], **stats,
+            "files": [f"{task['key']}/{name}" for name in files]}
+
+
+def batch_report(data: pd.DataFrame | Panel, entities: EntityIndex, output: str | os.PathLike = "reports",
+                 groupings: Sequence = DEFAULT_GROUPINGS, x: str = "GDP", y: str = "Mortality Rate",
+                 log_x: bool = True, min_countries: int = 3, min_periods: int = 3, n_boot: int = 0,
+                 figures: bool = True, workers: int | None = None, seed: int = 0) -> dict:
+    """Write statistics and figures for every slice of the panel in parallel.
+
+    Args:
+        data: The combined panel (one row per country and year with columns
+            ``Country Code``, ``Year``, ``x`` and ``y``) or a ready
+            :class:`~income_health.stats.Panel`.
+        entities: Index assigning countries to regions and income groups.
+        output: Directory for the report; existing slice files are replaced.
+        groupings: Which slices to produce; see :func:`slices`.
+        x: Indicator on the horizontal axis (log-scaled when ``log_x``).
+        y: Outcome indicator.
+        log_x: Correlate ``log(x)`` rather than ``x`` with ``y``.
+        min_countries: Skip slices with fewer countries.
+        min_periods: Minimum paired years for a correlation.
+        n_boot: Bootstrap replicates for a pooled confidence interval per
+            slice; ``0`` skips it.
+        figures: Draw ``scatter.png`` and ``timeseries.png`` per slice.
+        workers: Worker processes; ``None`` uses every core.
+        seed: Bootstrap seed, shared by every slice.
+
+    Returns:
+        The index written to ``<output>/index.json``.
+    """
+    panel = data if isinstance(data, Panel) else Panel.from_wide(data, [x, y])
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    todo = slices(entities, panel.entities, groupings, min_countries)
+    names = entities.decode(entities.encode(panel.entities), "name")
+    names = [n if n is not None else code for n, code in zip(names, panel.entities)]
+
+    panel_path = output / PANEL_FILE
+    np.save(panel_path, np.ascontiguousarray(panel.values))
+    initargs = (os.fspath(panel_path), panel.entities.tolist(), names, panel.years.tolist(),
+                panel.indicators.tolist())
+    results = {}
+    try:
+        with instrument("report", rows_in=len(panel.entities)) as run:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+                futures = []
+                for piece in todo:
+                    directory = output / piece["key"]
+                    if directory.exists():
+                        shutil.rmtree(directory)
+                    futures.append(pool.submit(_render_slice, {
+                        **piece, "directory": os.fspath(directory), "x": x, "y": y, "log_x": log_x,
+                        "min_periods": min_periods, "n_boot": n_boot, "seed": seed, "figures": figures,
+                    }))
+                for future in as_completed(futures):
+                    entry = future.result()
+                    results[entry["key"]] = entry
+            run.rows_out = len(results)
+            run.extra["slices"] = len(results)
+    finally:
+        panel_path.unlink(missing_ok=True)
+
+    index = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "x": x,
+        "y": y,
+        "years": [int(panel.years.min()), int(panel.years.max())] if len(panel.years) else None,
+        "countries": len(panel.entities),
+        "slices": [results[piece["key"]] for piece in todo],
+    }
+    (output / INDEX_FILE).write_text(json.dumps(index, indent=2), encoding="utf-8")
+    return index
@@ -0,0 +1,82 @@
+"""Wide-to-long reshaping of WDI year blocks.
+
+``pd.melt`` repeats every object-dtype id string once per year and parsing
+the year labels back into dates costs a string parse per row. The helpers
+here build the long panel straight from the numeric year block: ids are
+repeated as categorical codes, years are ``int16`` and only the requested
+year window is ever touched.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from income_health.wdi import year_columns
+
+
+def wide_to_long(wide: pd.DataFrame, id_columns: Sequence[str] = ("Country Code", "Country Name"),
+                 years: tuple[int | None, int | None] | None = None, value_name: str = "value",
+                 year_name: str = "Year", dropna: bool = True, year_dtype: str = "int16") -> pd.DataFrame:
+    """Reshape the integer year columns of ``wide`` into one row per id and year.
+
+    Args:
+        wide: Frame with identifier columns and integer year columns, as
+            returned by :func:`~income_health.wdi.load_wdi`.
+        id_columns: Identifier columns to carry; they come back categorical.
+        years: Inclusive ``(start, end)`` window; other years are never read.
+        value_name: Name of the value column.
+        year_name: Name of the year column.
+        dropna: Drop id/year pairs without a value.
+        year_dtype: ``"int16"`` or ``"period"`` for an annual ``Period``.
+
+    Returns:
+        ``id_columns``, ``year_name`` and ``value_name``, ordered by id then year.
+    """
+    start, end = years if years is not None else (None, None)
+    selected = [y for y in year_columns(wide)
+                if (start is None or y >= start) and (end is None or y <= end)]
+    block = wide[selected].to_numpy(dtype=np.float64)
+    n_rows, n_years = block.shape
+
+    values = block.ravel()
+    keep = ~np.isnan(values) if dropna else slice(None)
+    row_index = np.repeat(np.arange(n_rows), n_years)[keep]
+    year_values = np.tile(np.asarray(selected, dtype=np.int16), n_rows)[keep]
+
+    columns = {}
+    for name in id_columns:
+        ids = wide[name]
+        categorical = ids if isinstance(ids.dtype, pd.CategoricalDtype) else ids.astype("category")
+        codes = categorical.cat.codes.to_numpy()[row_index]
+        columns[name] = pd.Categorical.from_codes(codes, dtype=categorical.dtype)
+    columns[year_name] = year_to_period(year_values) if year_dtype == "period" else year_values
+    columns[value_name] = values[keep]
+    return pd.DataFrame(columns)
+
+
+def _year_ordinals(years) -> tuple[np.ndarray, np.ndarray]:
+    """Years as offsets from 1970, plus the mask of missing years."""
+    years = np.asarray(years, dtype=np.float64)
+    missing = np.isnan(years)
+    return np.where(missing, 1970, years).astype(np.int64) - 1970, missing
+
+
+def year_to_timestamp(years) -> np.ndarray:
+    """Convert integer years to January 1st timestamps without parsing strings.
+
+    Missing years become ``NaT``.
+    """
+    ordinals, missing = _year_ordinals(years)
+    stamps = ordinals.astype("datetime64[Y]").astype("datetime64[ns]")
+    stamps[missing] = np.datetime64("NaT")
+    return stamps
+
+
+def year_to_period(years) -> pd.PeriodIndex:
+    """Convert integer years to an annual ``PeriodIndex``; missing years become ``NaT``."""
+    ordinals, missing = _year_ordinals(years)
+    ordinals[missing] = pd.NaT.value
+    return pd.PeriodIndex.from_ordinals(ordinals, freq="Y")
@@ -0,0 +1,228 @@
+"""Embedded SQLite store for (country, indicator, year) observations.
+
+The Parquet snapshots in :mod:`income_health.store` are the system of
+record; this backend serves the small, repeated slices dashboards ask for
+("GDP and MORT_100 for AFR 2014-2023") without reloading a whole file.
+Observations live in a normalized schema::
+
+    country(id, code, name, region)
+    indicator(id, code, name, source)
+    observation(indicator_id, country_id, year, value)
+
+``observation`` is a ``WITHOUT ROWID`` table clustered on
+(indicator, country, year), so that key is a covering index for
+per-country lookups; a second covering index on (indicator, year,
+country) serves year-window scans across all countries.
+
+Country regions are WHO regions taken from the ``ParentLocationCode`` of
+GHO data (:meth:`SQLStore.load_gho`) or given to
+:meth:`SQLStore.load_countries`; WDI files carry none, so filtering by
+region needs one of those loads first.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import pandas as pd
+
+from income_health.combine import collapse_dimensions
+from income_health.reshape import wide_to_long
+
+# Codes per ``IN (...)`` lookup, well under SQLite's bound-parameter limit.
+LOOKUP_BATCH = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS country (
+    id INTEGER PRIMARY KEY,
+    code TEXT NOT NULL UNIQUE,
+    name TEXT,
+    region TEXT
+);
+CREATE TABLE IF NOT EXISTS indicator (
+    id INTEGER PRIMARY KEY,
+    code TEXT NOT NULL UNIQUE,
+    name TEXT,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS observation (
+    indicator_id INTEGER NOT NULL REFERENCES indicator(id),
+    country_id INTEGER NOT NULL REFERENCES country(id),
+    year INTEGER NOT NULL,
+    value REAL,
+    PRIMARY KEY (indicator_id, country_id, year)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS observation_by_year
+    ON observation (indicator_id, year, country_id, value);
+CREATE INDEX IF NOT EXISTS country_by_region ON country (region, id);
+"""
+
+
+class SQLStore:
+    """Load long observations into SQLite and query slices back as DataFrames.
+
+    Args:
+        path: Database file; ``":memory:"`` for a throwaway store.
+    """
+
+    def __init__(self, path: str | os.PathLike = "data/income_health.sqlite"):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    # -- loading ----------------------------------------------------------
+
+    def _ids(self, table: str, codes: Iterable[str]) -> dict[str, int]:
+        """Ids of ``codes`` in ``table``, inserting the ones not there yet."""
+        codes = list(dict.fromkeys(codes))
+        self.connection.executemany(f"INSERT OR IGNORE INTO {table} (code) VALUES (?)",
+                                    [(c,) for c in codes])
+        ids = {}
+        for start in range(0, len(codes), LOOKUP_BATCH):
+            batch = codes[start:start + LOOKUP_BATCH]
+            ids.update(self.connection.execute(
+                f"SELECT code, id FROM {table} WHERE code IN ({','.join('?' * len(batch))})", batch))
+        return ids
+
+    def load_countries(self, countries: pd.DataFrame, code: str = "Country Code",
+                       name: str | None = "Country Name", region: str | None = None) -> None:
+        """Insert or update country names and regions."""
+        frame = countries.drop_duplicates(code)
+        names = frame[name].astype(str) if name else pd.Series(None, index=frame.index)
+        regions = frame[region].astype(object) if region else pd.Series(None, index=frame.index)
+        rows = [(str(c), n, r if isinstance(r, str) else None)
+                for c, n, r in zip(frame[code], names, regions)]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO country (code, name, region) VALUES (?, ?, ?) "
+                "ON CONFLICT(code) DO UPDATE SET "
+                "name = COALESCE(excluded.name, country.name), "
+                "region = COALESCE(excluded.region, country.region)", rows)
+
+    def load_observations(self, frame: pd.DataFrame, indicator: str, value: str = "value",
+                          country: str = "Country Code", year: str = "Year",
+                          indicator_name: str | None = None, source: str | None = None) -> int:
+        """Upsert the long ``frame`` as observations of ``indicator``.
+
+        The whole load runs in one transaction with a single ``executemany``.
+
+        Returns:
+            Number of rows written.
+        """
+        frame = frame.dropna(subset=[value])
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO indicator (code, name, source) VALUES (?, ?, ?) "
+                "ON CONFLICT(code) DO UPDATE SET "
+                "name = COALESCE(excluded.name, indicator.name), "
+                "source = COALESCE(excluded.source, indicator.source)",
+                (indicator, indicator_name, source))
+            indicator_id = self.connection.execute(
+                "SELECT id FROM indicator WHERE code = ?", (indicator,)).fetchone()[0]
+            country_ids = self._ids("country", frame[country].astype(str))
+            rows = zip([indicator_id] * len(frame),
+                       frame[country].astype(str).map(country_ids).tolist(),
+                       frame[year].astype(int).tolist(),
+                       frame[value].astype(float).tolist())
+            self.connection.executemany(
+                "INSERT INTO observation (indicator_id, country_id, year, value) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(indicator_id, country_id, year) DO UPDATE SET value = excluded.value",
+                rows)
+        return len(frame)
+
+    def load_wdi(self, wdi: pd.DataFrame, source: str | None = None) -> int:
+        """Load every indicator of a frame returned by :func:`~income_health.wdi.load_wdi`."""
+        self.load_countries(wdi)
+        written = 0
+        for (code, name), block in wdi.groupby(["Indicator Code", "Indicator Name"], sort=False):
+            long = wide_to_long(block, ("Country Code",))
+            written += self.load_observations(long, code, indicator_name=name, source=source)
+        return written
+
+    def load_gho(self, gho: pd.DataFrame, indicator: str, select: dict | None = None,
+                 source: str | None = None) -> int:
+        """Collapse GHO observations to (country, year) and load them.
+
+        ``ParentLocationCode``, when present, is recorded as the country's
+        WHO region.
+        """
+        if "ParentLocationCode" in gho.columns:
+            self.load_countries(gho, code="SpatialDim", name=None, region="ParentLocationCode")
+        long = collapse_dimensions(gho, select=select)
+        return self.load_observations(long, indicator, value="Value", source=source)
+
+    # -- querying ---------------------------------------------------------
+
+    def query(self, indicators: Sequence[str], countries: Sequence[str] | None = None,
+              region: str | None = None, years: tuple[int, int] | None = None,
+              wide: bool = True) -> pd.DataFrame:
+        """Return observations for a slice of indicators, countries and years.
+
+        Args:
+            indicators: Indicator codes, e.g. ``["NY.GDP.MKTP.CD", "MORT_100"]``.
+            countries: Country codes to keep; ``None`` keeps every country.
+            region: Keep only countries of this WHO region, e.g. ``"AFR"``.
+            years: Inclusive ``(start, end)`` window.
+            wide: One column per indicator instead of long rows.
+
+        Returns:
+            Columns ``country``, ``year`` and either ``indicator``/``value``
+            or one column per indicator, in the order given and all-NaN for
+            indicators without data in the slice. Empty when ``indicators`` or
+            ``countries`` is an empty list.
+
+        Raises:
+            ValueError: ``region`` is given but no country has a region yet,
+                i.e. no GHO data (or regions) were loaded.
+        """
+        if region and self.connection.execute(
+                "SELECT 1 FROM country WHERE region IS NOT NULL LIMIT 1").fetchone() is None:
+            raise ValueError("no country has a region; load GHO data with ParentLocationCode "
+                             "(load_gho) or call load_countries(..., region=...) first")
+        indicators = list(indicators)
+        columns = ["country", "year", *indicators] if wide else ["country", "indicator", "year", "value"]
+        if not indicators or (countries is not None and len(countries) == 0):
+            return pd.DataFrame(columns=columns)
+
+        clauses = [f"i.code IN ({','.join('?' * len(indicators))})"]
+        params: list = list(indicators)
+        if region:
+            clauses.append("c.region = ?")
+            params.append(region)
+        if years:
+            clauses.append("o.year BETWEEN ? AND ?")
+            params.extend(years)
+        # Sorted batches keep SQLite's parameter limit and the overall c.code order.
+        batches: list = [None]
+        if countries is not None:
+            codes = sorted(dict.fromkeys(countries))
+            batches = [codes[start:start + LOOKUP_BATCH] for start in range(0, len(codes), LOOKUP_BATCH)]
+        parts = []
+        for batch in batches:
+            where = clauses if batch is None else [*clauses, f"c.code IN ({','.join('?' * len(batch))})"]
+            sql = ("SELECT c.code AS country, i.code AS indicator, o.year AS year, o.value AS value "
+                   "FROM observation o "
+                   "JOIN indicator i ON i.id = o.indicator_id "
+                   "JOIN country c ON c.id = o.country_id "
+                   "WHERE " + " AND ".join(where) + " ORDER BY c.code, o.year")
+            parts.append(pd.read_sql_query(sql, self.connection, params=params + (batch or [])))
+        long = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True)
+        if not wide:
+            return long
+        if long.empty:
+            return pd.DataFrame(columns=columns)
+        table = long.pivot_table(index=["country", "year"], columns="indicator", values="value",
+                                 aggfunc="first").reset_index()
+        table.columns.name = None
+        # Indicators without any row in the slice still get their (empty) column.
+        return table.reindex(columns=columns)
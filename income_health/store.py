@@ -0,0 +1,279 @@
+"""Versioned, content-addressed Parquet store for raw and cleaned data.
+
+Every snapshot of a dataset is split into one Parquet file per year. Each
+file is named after a hash of its contents, so a partition that did not
+change between two runs is stored once and shared by both snapshots. A
+snapshot is described by a JSON manifest listing its partitions, schema,
+row count and where the data came from; its id is the hash of that
+partition list, so writing identical data twice yields the same snapshot.
+
+Layout under ``root``::
+
+    <dataset>/objects/<hash>.parquet
+    <dataset>/snapshots/<snapshot id>.json
+    <dataset>/LATEST
+
+Requires ``pyarrow``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import pandas as pd
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise ImportError("SnapshotStore needs pyarrow; install it with 'pip install pyarrow'") from exc
+    return pa, pq
+
+
+def frame_hash(frame: pd.DataFrame) -> str:
+    """Hash the values, column names and dtypes of ``frame``."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(c), str(t)] for c, t in frame.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _partition_keys(column: pd.Series) -> pd.Series:
+    """Year of a datetime column, or the column itself."""
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column.dt.year
+    if isinstance(column.dtype, pd.PeriodDtype):
+        return column.dt.year
+    return column
+
+
+class SnapshotStore:
+    """Write and read versioned snapshots of DataFrames.
+
+    Args:
+        root: Directory holding every dataset.
+    """
+
+    def __init__(self, root: str | os.PathLike = "data/store"):
+        self.root = Path(root)
+
+    def _dataset(self, name: str) -> Path:
+        return self.root / name
+
+    def _object_path(self, name: str, digest: str) -> Path:
+        return self._dataset(name) / "objects" / f"{digest}.parquet"
+
+    def _manifest_path(self, name: str, snapshot_id: str) -> Path:
+        return self._dataset(name) / "snapshots" / f"{snapshot_id}.json"
+
+    def write(self, name: str, frame: pd.DataFrame, partition_by: str | None = "Year",
+              source: str | None = None, fetched_at: str | None = None, extra: dict | None = None) -> dict:
+        """Store ``frame`` as a new snapshot of dataset ``name``.
+
+        Args:
+            name: Dataset name, e.g. ``"raw_combined"``.
+            frame: Data to store; the index is not kept.
+            partition_by: Column to split files on; datetime and period
+                columns are split by calendar year. ``None`` writes one file.
+            source: Where the data came from, e.g. the download URL.
+            fetched_at: When the source was downloaded (ISO 8601).
+            extra: Any other JSON-serializable provenance to record.
+
+        Returns:
+            The snapshot manifest.
+        """
+        pa, _ = _pyarrow()
+        frame = frame.reset_index(drop=True)
+        partitions = {key: self._write_partition(name, part)
+                      for key, part in self._split(frame, partition_by)}
+        schema = pa.Schema.from_pandas(frame, preserve_index=False)
+        return self._commit(name, partitions, schema, partition_by, source, fetched_at, extra)
+
+    def update(self, name: str, frame: pd.DataFrame, base: str | None = None,
+               source: str | None = None, fetched_at: str | None = None, extra: dict | None = None,
+               drop: Iterable = ()) -> dict:
+        """Store a snapshot that replaces only the partitions present in ``frame``.
+
+        Every partition of the ``base`` snapshot (the latest by default) that
+        ``frame`` does not touch is carried over by reference, so an update
+        costs only the changed years. Partitions listed in ``drop`` are left
+        out instead, unless ``frame`` has rows for them.
+        """
+        pa, _ = _pyarrow()
+        manifest = self.manifest(name, base)
+        partition_by = manifest["partition_by"]
+        if partition_by is None:
+            raise ValueError(f"dataset {name!r} is not partitioned; use write() instead")
+        partitions = {key: part for key, part in manifest["partitions"].items()
+                      if key not in {str(k) for k in drop}}
+        for key, part in self._split(frame.reset_index(drop=True), partition_by):
+            partitions[key] = self._write_partition(name, part)
+        schema = pa.Schema.from_pandas(frame, preserve_index=False)
+        return self._commit(name, partitions, schema, partition_by, source, fetched_at, extra)
+
+    def write_chunks(self, name: str, chunks: Iterable[pd.DataFrame], partition_by: str | None = "Year",
+                     source: str | None = None, fetched_at: str | None = None,
+                     extra: dict | None = None) -> dict:
+        """Store a snapshot from an iterable of frames without holding them all in memory.
+
+        Each partition is appended to its Parquet file chunk by chunk while
+        its content hash is updated incrementally, so the partitions, their
+        hashes and the snapshot id are the same as :meth:`write` produces
+        for the concatenated frame. Every chunk must have the same columns
+        and dtypes.
+        """
+        pa, pq = _pyarrow()
+        writers: dict[str, dict] = {}
+        schema = dtypes = None
+        objects = self._dataset(name) / "objects"
+        objects.mkdir(parents=True, exist_ok=True)
+        try:
+            for chunk in chunks:
+                chunk = chunk.reset_index(drop=True)
+                if schema is None:
+                    schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                    dtypes = json.dumps([[str(c), str(t)] for c, t in chunk.dtypes.items()]).encode()
+                elif json.dumps([[str(c), str(t)] for c, t in chunk.dtypes.items()]).encode() != dtypes:
+                    raise ValueError(f"chunk dtypes {dict(chunk.dtypes)} differ from the first chunk")
+                for key, part in self._split(chunk, partition_by):
+                    state = writers.get(key)
+                    if state is None:
+                        digest = hashlib.sha256(dtypes)
+                        tmp = objects / f".{name}-{key}-{os.getpid()}.tmp"
+                        state = writers[key] = {"digest": digest, "rows": 0, "tmp": tmp,
+                                                "writer": pq.ParquetWriter(tmp, schema)}
+                    state["digest"].update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+                    state["writer"].write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False))
+                    state["rows"] += len(part)
+        except BaseException:
+            for state in writers.values():
+                state["writer"].close()
+                state["tmp"].unlink(missing_ok=True)
+            raise
+
+        if schema is None:
+            raise ValueError("write_chunks needs at least one chunk")
+        partitions = {}
+        for key, state in writers.items():
+            state["writer"].close()
+            digest = state["digest"].hexdigest()
+            path = self._object_path(name, digest)
+            if path.exists():
+                state["tmp"].unlink()
+            else:
+                os.replace(state["tmp"], path)
+            partitions[key] = {"object": digest, "rows": state["rows"]}
+        return self._commit(name, partitions, schema, partition_by, source, fetched_at, extra)
+
+    @staticmethod
+    def _split(frame: pd.DataFrame, partition_by: str | None):
+        if partition_by is None:
+            return [("all", frame)]
+        keys = _partition_keys(frame[partition_by])
+        return [(str(key), part.reset_index(drop=True))
+                for key, part in frame.groupby(keys, sort=True, observed=True)]
+
+    def _write_partition(self, name: str, part: pd.DataFrame) -> dict:
+        pa, pq = _pyarrow()
+        digest = frame_hash(part)
+        path = self._object_path(name, digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            pq.write_table(pa.Table.from_pandas(part, preserve_index=False), tmp)
+            os.replace(tmp, path)
+        return {"object": digest, "rows": len(part)}
+
+    def _commit(self, name: str, partitions: dict, schema, partition_by: str | None,
+                source: str | None, fetched_at: str | None, extra: dict | None) -> dict:
+        partitions = dict(sorted(partitions.items()))
+        snapshot_id = hashlib.sha256(json.dumps(partitions, sort_keys=True).encode()).hexdigest()[:16]
+        manifest_path = self._manifest_path(name, snapshot_id)
+        if manifest_path.exists():
+            self._set_latest(name, snapshot_id)
+            with open(manifest_path, encoding="utf-8") as fh:
+                return json.load(fh)
+
+        manifest = {
+            "id": snapshot_id,
+            "dataset": name,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "source": {"url": source, "fetched_at": fetched_at},
+            "schema": [{"name": f.name, "type": str(f.type)} for f in schema],
+            "rows": sum(entry["rows"] for entry in partitions.values()),
+            "partition_by": partition_by,
+            "partitions": partitions,
+            "extra": extra or {},
+        }
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(manifest_path, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, indent=2)
+        self._set_latest(name, snapshot_id)
+        return manifest
+
+    def exists(self, name: str) -> bool:
+        """Whether dataset ``name`` has at least one snapshot."""
+        return (self._dataset(name) / "LATEST").exists()
+
+    def _set_latest(self, name: str, snapshot_id: str) -> None:
+        (self._dataset(name) / "LATEST").write_text(snapshot_id, encoding="utf-8")
+
+    def snapshots(self, name: str) -> list[dict]:
+        """Manifests of every snapshot of ``name``, oldest first."""
+        directory = self._dataset(name) / "snapshots"
+        if not directory.exists():
+            return []
+        manifests = []
+        for path in directory.glob("*.json"):
+            with open(path, encoding="utf-8") as fh:
+                manifests.append(json.load(fh))
+        return sorted(manifests, key=lambda m: m["created_at"])
+
+    def manifest(self, name: str, snapshot: str | None = None) -> dict:
+        """Manifest of ``snapshot``, or of the most recently written one when omitted."""
+        if snapshot is None:
+            latest = self._dataset(name) / "LATEST"
+            if not latest.exists():
+                raise FileNotFoundError(f"no snapshots of dataset {name!r} in {self.root}")
+            snapshot = latest.read_text(encoding="utf-8").strip()
+        with open(self._manifest_path(name, snapshot), encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def read(self, name: str, snapshot: str | None = None, columns: Sequence[str] | None = None,
+             partitions: Sequence | None = None) -> pd.DataFrame:
+        """Load a snapshot, reading only the requested columns and partitions.
+
+        Files are memory-mapped, and partitions not listed in ``partitions``
+        (e.g. years outside a window) are never opened. Rows come back
+        grouped by partition.
+        """
+        pa, pq = _pyarrow()
+        manifest = self.manifest(name, snapshot)
+        wanted = None if partitions is None else {str(p) for p in partitions}
+        tables = [
+            pq.read_table(self._object_path(name, entry["object"]), columns=columns, memory_map=True)
+            for key, entry in manifest["partitions"].items()
+            if wanted is None or key in wanted
+        ]
+        if not tables:
+            names = columns or [f["name"] for f in manifest["schema"]]
+            return pd.DataFrame(columns=list(names))
+        return pa.concat_tables(tables, promote_options="default").to_pandas()
+
+    def diff(self, name: str, old: str, new: str) -> dict:
+        """Compare two snapshots partition by partition using their hashes."""
+        before = self.manifest(name, old)["partitions"]
+        after = self.manifest(name, new)["partitions"]
+        return {
+            "added": sorted(set(after) - set(before)),
+            "removed": sorted(set(before) - set(after)),
+            "changed": sorted(k for k in set(before) & set(after)
+                              if before[k]["object"] != after[k]["object"]),
+        }
@@ -0,0 +1,219 @@
+"""Incremental parsing of OData JSON payloads into typed columns.
+
+``response.json()`` followed by ``pd.json_normalize`` keeps three full
+copies of a GHO payload alive at once: the text, the dict tree and the
+flattened frame. :class:`ValueStream` instead walks the top-level
+``value`` array one record at a time, and :class:`ColumnBuilder` keeps only
+the requested fields in preallocated NumPy arrays, so peak memory is
+driven by the size of the typed result rather than by the payload.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+CHUNK_SIZE = 64 * 1024
+
+# Storage kind of well-known GHO fields. Codes and dimension values repeat
+# heavily and are stored as categoricals; anything unlisted is kept as-is.
+FIELD_KINDS = {
+    "SpatialDim": "category",
+    "SpatialDimType": "category",
+    "ParentLocationCode": "category",
+    "ParentLocation": "category",
+    "IndicatorCode": "category",
+    "TimeDimType": "category",
+    "Dim1": "category",
+    "Dim1Type": "category",
+    "Dim2": "category",
+    "Dim2Type": "category",
+    "Dim3": "category",
+    "Dim3Type": "category",
+    "TimeDim": "int",
+    "Id": "int",
+    "NumericValue": "float",
+    "Low": "float",
+    "High": "float",
+}
+
+_ARRAY_START = re.compile(r'"value"\s*:\s*\[')
+_COUNT = re.compile(r'"@odata\.count"\s*:\s*(\d+)')
+_SKIP = " \t\r\n,"
+
+
+def iter_chunks(payload: bytes, size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Slice an in-memory body into chunks without copying it."""
+    view = memoryview(payload)
+    for start in range(0, len(view), size):
+        yield view[start:start + size]
+
+
+def read_count(payload: bytes, limit: int = 4096) -> int | None:
+    """Read ``@odata.count`` from the start of a body without parsing the rest."""
+    head = bytes(payload[:limit]).decode("utf-8", errors="ignore")
+    found = _COUNT.search(head)
+    return int(found.group(1)) if found else None
+
+
+class ValueStream:
+    """Iterate over the records of an OData ``value`` array incrementally.
+
+    Args:
+        chunks: Raw body as an iterable of byte chunks, e.g.
+            ``response.iter_content(65536)`` or :func:`iter_chunks`.
+
+    Attributes:
+        count: ``@odata.count`` when the server sent it before the array.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self.count: int | None = None
+
+    def _more(self) -> str | None:
+        for chunk in self._chunks:
+            text = self._decoder.decode(bytes(chunk))
+            if text:
+                return text
+        return None
+
+    def __iter__(self) -> Iterator[dict]:
+        buf = ""
+        # Find the start of the array, remembering the count on the way.
+        while True:
+            match = _ARRAY_START.search(buf)
+            if match:
+                head, buf = buf[:match.start()], buf[match.end():]
+                found = _COUNT.search(head)
+                if found:
+                    self.count = int(found.group(1))
+                break
+            text = self._more()
+            if text is None:
+                raise ValueError("payload has no 'value' array")
+            buf += text
+
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in _SKIP:
+                pos += 1
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            if pos < len(buf):
+                try:
+                    record, pos = self._json.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    pass
+                else:
+                    yield record
+                    continue
+            # Need more input: drop what was consumed and append the next chunk.
+            text = self._more()
+            if text is None:
+                raise ValueError("payload ended inside the 'value' array")
+            buf = buf[pos:] + text
+            pos = 0
+
+
+class ColumnBuilder:
+    """Collect selected record fields into preallocated typed arrays.
+
+    Categorical fields are stored as ``int32`` codes against a growing
+    dictionary, integers as ``int64`` with a validity mask, floats as
+    ``float64`` with ``NaN`` for missing values and everything else in an
+    object array.
+
+    Args:
+        fields: Record keys to keep, in output column order.
+        capacity: Initial number of rows to allocate; arrays double when full.
+        kinds: Overrides for :data:`FIELD_KINDS`.
+    """
+
+    def __init__(self, fields: Iterable[str], capacity: int = 1024, kinds: dict | None = None):
+        self.fields = list(fields)
+        self.kinds = {f: (kinds or {}).get(f, FIELD_KINDS.get(f, "object")) for f in self.fields}
+        self.size = 0
+        self._capacity = max(1, capacity)
+        self._values = {f: self._allocate(kind, self._capacity) for f, kind in self.kinds.items()}
+        self._masks = {f: np.zeros(self._capacity, dtype=bool)
+                       for f, kind in self.kinds.items() if kind == "int"}
+        self._categories = {f: {} for f, kind in self.kinds.items() if kind == "category"}
+
+    @staticmethod
+    def _allocate(kind: str, n: int) -> np.ndarray:
+        if kind == "category":
+            return np.full(n, -1, dtype=np.int32)
+        if kind == "int":
+            return np.zeros(n, dtype=np.int64)
+        if kind == "float":
+            return np.full(n, np.nan, dtype=np.float64)
+        return np.empty(n, dtype=object)
+
+    def reserve(self, capacity: int) -> None:
+        """Grow the arrays to hold at least ``capacity`` rows."""
+        if capacity <= self._capacity:
+            return
+        for f, kind in self.kinds.items():
+            grown = self._allocate(kind, capacity)
+            grown[:self.size] = self._values[f][:self.size]
+            self._values[f] = grown
+            if f in self._masks:
+                mask = np.zeros(capacity, dtype=bool)
+                mask[:self.size] = self._masks[f][:self.size]
+                self._masks[f] = mask
+        self._capacity = capacity
+
+    def append(self, record: dict) -> None:
+        if self.size == self._capacity:
+            self.reserve(self._capacity * 2)
+        i = self.size
+        for f, kind in self.kinds.items():
+            value = record.get(f)
+            if value is None:
+                continue
+            if kind == "category":
+                codes = self._categories[f]
+                self._values[f][i] = codes.setdefault(value, len(codes))
+            elif kind == "int":
+                self._values[f][i] = value
+                self._masks[f][i] = True
+            else:
+                self._values[f][i] = value
+        self.size += 1
+
+    def extend(self, records: Iterable[dict]) -> int:
+        """Append every record and return how many were added."""
+        start = self.size
+        for record in records:
+            self.append(record)
+        return self.size - start
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the collected rows; the builder should not be reused after."""
+        n = self.size
+        columns = {}
+        for f, kind in self.kinds.items():
+            values = self._values[f][:n]
+            if kind == "category":
+                categories = list(self._categories[f])
+                columns[f] = pd.Categorical.from_codes(values, categories=categories)
+            elif kind == "int":
+                columns[f] = pd.arrays.IntegerArray(values, ~self._masks[f][:n])
+            else:
+                columns[f] = values
+        return pd.DataFrame(columns, columns=self.fields)
+
+
+def parse_gho_stream(chunks: Iterable[bytes], fields: Iterable[str], capacity: int = 1024) -> pd.DataFrame:
+    """Parse a GHO payload straight into a typed frame of ``fields``."""
+    builder = ColumnBuilder(fields, capacity)
+    builder.extend(ValueStream(chunks))
+    return builder.to_frame()
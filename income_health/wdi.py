@@ -0,0 +1,158 @@
+"""World Bank World Development Indicators (WDI) files.
+
+The World Bank publishes every indicator as a zipped bulk CSV, e.g.
+``API_NY.GDP.MKTP.CD_DS2_en_csv_v2_2.csv`` inside the archive returned by
+``https://api.worldbank.org/v2/en/indicator/NY.GDP.MKTP.CD?downloadformat=csv``.
+
+Per-indicator files start with a short metadata preamble (``Data Source``,
+``Last Updated Date``) before the real header; the all-indicator bulk dumps
+start directly with the header. :func:`load_wdi` handles both.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import os
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from income_health.cache import HTTPCache
+from income_health.instrument import record_download
+
+if TYPE_CHECKING:
+    import requests
+
+WDI_DOWNLOAD_URL = "https://api.worldbank.org/v2/en/indicator/{indicator}"
+
+ID_COLUMNS = ("Country Name", "Country Code", "Indicator Name", "Indicator Code")
+
+# The preamble is never longer than a handful of lines; give up well before
+# reading a data file that has no recognizable header at all.
+MAX_PREAMBLE_LINES = 50
+
+
+@dataclass(frozen=True)
+class WDIHeader:
+    """Layout of a WDI CSV file as found by :func:`read_wdi_header`.
+
+    Attributes:
+        skiprows: Number of lines before the header row.
+        columns: Header names, without the empty trailing column.
+        metadata: Key/value pairs from the preamble, e.g.
+            ``{"Last Updated Date": "11/13/2024"}``.
+    """
+
+    skiprows: int
+    columns: list[str]
+    metadata: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def years(self) -> list[int]:
+        """Years that have a column in the file."""
+        return [int(c) for c in self.columns if c.isdigit()]
+
+    @property
+    def last_updated(self) -> str | None:
+        return self.metadata.get("Last Updated Date")
+
+
+def read_wdi_header(path: str | os.PathLike, encoding: str = "utf-8-sig") -> WDIHeader:
+    """Locate the header row of a WDI CSV, collecting the preamble on the way."""
+    metadata = {}
+    with open(path, encoding=encoding, newline="") as fh:
+        for lineno, row in enumerate(csv.reader(fh)):
+            if lineno >= MAX_PREAMBLE_LINES:
+                break
+            if row and row[0] == ID_COLUMNS[0]:
+                columns = [c for c in row if c]
+                return WDIHeader(skiprows=lineno, columns=columns, metadata=metadata)
+            if len(row) > 1 and row[0] and row[1]:
+                metadata[row[0]] = row[1]
+    raise ValueError(f"{path} does not look like a WDI file: no '{ID_COLUMNS[0]}' header found")
+
+
+def year_columns(frame: pd.DataFrame) -> list[int]:
+    """Integer year columns of a frame returned by :func:`load_wdi`."""
+    return [c for c in frame.columns if isinstance(c, (int, np.integer))]
+
+
+def load_wdi(path: str | os.PathLike, years: tuple[int | None, int | None] | None = None,
+             id_columns=ID_COLUMNS, encoding: str = "utf-8-sig") -> pd.DataFrame:
+    """Load a WDI CSV into a frame with integer year columns.
+
+    Only the requested columns are parsed: the year block is restricted to
+    ``years`` before pandas sees the file, and year values are read straight
+    into ``float64``.
+
+    Args:
+        path: Per-indicator ``API_*.csv`` file or an all-indicator bulk dump.
+        years: Inclusive ``(start, end)`` range of year columns to keep;
+            either end may be ``None``.
+        id_columns: Identifier columns to keep alongside the years.
+        encoding: File encoding; the default strips a UTF-8 BOM if present.
+
+    Returns:
+        One row per country and indicator, identifier columns first and then
+        one ``float64`` column per year labelled with the year as ``int``.
+        The preamble metadata is kept in ``frame.attrs["wdi"]``.
+    """
+    header = read_wdi_header(path, encoding)
+    missing = [c for c in id_columns if c not in header.columns]
+    if missing:
+        raise ValueError(f"{path} is missing identifier columns {missing}")
+
+    start, end = years if years is not None else (None, None)
+    selected = [y for y in header.years
+                if (start is None or y >= start) and (end is None or y <= end)]
+    year_names = [str(y) for y in selected]
+    dtypes = {name: np.float64 for name in year_names}
+    dtypes.update({name: str for name in id_columns})
+
+    frame = pd.read_csv(path, skiprows=header.skiprows, usecols=list(id_columns) + year_names,
+                        dtype=dtypes, encoding=encoding, engine="c")
+    frame = frame[list(id_columns) + year_names]
+    frame.columns = list(id_columns) + selected
+    frame.attrs["wdi"] = dict(header.metadata)
+    return frame
+
+
+def download_wdi(indicator: str, directory: str | os.PathLike = ".",
+                 cache: HTTPCache | None = None, session: requests.Session | None = None,
+                 timeout: float = 120) -> Path:
+    """Download the bulk CSV for a WDI indicator and return its path.
+
+    The data file (``API_<indicator>_...csv``) and the country metadata
+    (``Metadata_Country_...csv``, regions and income groups) are extracted
+    from the archive; the indicator metadata is skipped. With a ``cache`` the archive
+    is only downloaded again when the World Bank publishes a new version.
+    """
+    url = WDI_DOWNLOAD_URL.format(indicator=indicator)
+    params = {"downloadformat": "csv"}
+    import requests
+
+    session = session or requests.Session()
+    if cache is not None:
+        payload = cache.get(session, url, params, timeout=timeout)
+    else:
+        response = session.get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        payload = response.content
+        record_download(len(payload))
+
+    with zipfile.ZipFile(io.BytesIO(payload)) as archive:
+        names = [n for n in archive.namelist() if n.startswith("API_") and n.endswith(".csv")]
+        if not names:
+            raise ValueError(f"No data file found in the WDI archive for {indicator}")
+        target = Path(directory) / names[0]
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(archive.read(names[0]))
+        for name in archive.namelist():
+            if name.startswith("Metadata_Country_") and name.endswith(".csv"):
+                (target.parent / name).write_bytes(archive.read(name))
+    return target
@@ -0,0 +1,142 @@
+"""Shared fixtures: a local stand-in for the GHO OData service."""
+
+import hashlib
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+COUNTRIES = ("AFG", "ALB", "DZA", "AGO")
+YEARS = range(2000, 2024)
+SEXES = ("SEX_BTSX", "SEX_MLE", "SEX_FMLE")
+
+_CLAUSE = re.compile(r"(\w+) (eq|ge|le) ('(?:[^']|'')*'|-?\d+)")
+
+
+def gho_rows(indicator: str = "MORT_100") -> list[dict]:
+    """Every record the stand-in serves, in ``Id`` order."""
+    rows = []
+    for country in COUNTRIES:
+        for year in YEARS:
+            for sex in SEXES:
+                value = round(10 + len(rows) * 0.25, 2)
+                rows.append({"Id": len(rows), "IndicatorCode": indicator, "SpatialDim": country,
+                             "ParentLocationCode": "EMR", "TimeDim": year, "Dim1": sex, "Dim2": None,
+                             "Value": f"{value:.2f}", "NumericValue": value, "Comments": "unused"})
+    return rows
+
+
+def country_rows() -> list[dict]:
+    """The ``DIMENSION/COUNTRY/DimensionValues`` collection of the stand-in."""
+    return [{"Code": code, "Title": f"Country {code}", "ParentCode": "EMR", "ParentTitle": "Eastern Mediterranean"}
+            for code in COUNTRIES]
+
+
+def _literal(text: str):
+    return text[1:-1].replace("''", "'") if text.startswith("'") else int(text)
+
+
+def _matches(row: dict, expression: str) -> bool:
+    """Evaluate the subset of OData ``$filter`` that the client produces."""
+    for clause in expression.split(" and "):
+        alternatives = clause.strip().strip("()").split(" or ")
+        ok = False
+        for alternative in alternatives:
+            field, op, literal = _CLAUSE.fullmatch(alternative.strip()).groups()
+            value, bound = row[field], _literal(literal)
+            ok |= value == bound if op == "eq" else value >= bound if op == "ge" else value <= bound
+        if not ok:
+            return False
+    return True
+
+
+class GHOServer:
+    """A threaded HTTP server answering ``GET /<indicator>`` like the GHO API.
+
+    Attributes:
+        url: Base URL to hand to :class:`~income_health.gho.GHOClient`.
+        requests: Query parameters of every request received, in order.
+        failures: Respond ``503`` to this many upcoming requests.
+        etags: Send ``ETag`` headers and answer ``If-None-Match`` with ``304``.
+        counts: Honour ``$count=true``; when off, clients must find the
+            end from a short page.
+    """
+
+    def __init__(self):
+        self.rows = gho_rows()
+        self.requests: list[dict] = []
+        self.failures = 0
+        self.etags = True
+        self.counts = True
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/api"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), daemon=True)
+
+    def _handle(self, handler) -> None:
+        query = {k: v[0] for k, v in parse_qs(urlparse(handler.path).query).items()}
+        with self._lock:
+            self.requests.append(query)
+            fail = self.failures > 0
+            self.failures -= fail
+        if fail:
+            handler.send_response(503)
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+
+        rows = country_rows() if urlparse(handler.path).path.endswith("/DIMENSION/COUNTRY/DimensionValues") \
+            else self.rows
+        if "$filter" in query:
+            rows = [r for r in rows if _matches(r, query["$filter"])]
+        skip, top = int(query.get("$skip", 0)), int(query.get("$top", len(rows)))
+        page = rows[skip:skip + top]
+        if "$select" in query:
+            fields = query["$select"].split(",")
+            page = [{f: r[f] for f in fields if f in r} for r in page]
+        body = {"@odata.context": "stand-in"}
+        if self.counts and query.get("$count") == "true":
+            body["@odata.count"] = len(rows)
+        body["value"] = page
+        payload = json.dumps(body).encode("utf-8")
+        etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+
+        if self.etags and handler.headers.get("If-None-Match") == etag:
+            handler.send_response(304)
+            handler.send_header("ETag", etag)
+            handler.end_headers()
+            return
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(payload)))
+        if self.etags:
+            handler.send_header("ETag", etag)
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def start(self) -> "GHOServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def gho_server():
+    server = GHOServer().start()
+    yield server
+    server.stop()
@@ -0,0 +1,129 @@
+import pytest
+import requests
+
+from income_health.cache import HTTPCache, cache_key
+
+
+@pytest.fixture
+def page(gho_server):
+    return gho_server.url + "/MORT_100", {"$top": 5}
+
+
+def test_cache_key_ignores_parameter_order():
+    assert cache_key("u", {"a": 1, "b": 2}) == cache_key("u", {"b": 2, "a": 1})
+    assert cache_key("u", {"a": 1}) != cache_key("u", {"a": 2})
+
+
+def test_fresh_entries_are_served_from_disk(tmp_path, gho_server, page):
+    cache = HTTPCache(tmp_path)
+    with requests.Session() as session:
+        body = cache.get(session, *page)
+        assert cache.get(session, *page) == body
+    assert len(gho_server.requests) == 1
+    assert (cache.stats.misses, cache.stats.hits) == (1, 1)
+    cache.close()
+    assert HTTPCache(tmp_path).entry(*page)["etag"]
+
+
+def test_stale_entries_are_revalidated_with_etag(tmp_path, gho_server, page):
+    cache = HTTPCache(tmp_path, ttl=0)
+    with requests.Session() as session:
+        body = cache.get(session, *page)
+        assert cache.get(session, *page) == body
+        gho_server.rows[0]["Value"] = "changed"
+        changed = cache.get(session, *page)
+    assert changed != body and b"changed" in changed
+    assert (cache.stats.misses, cache.stats.revalidated) == (2, 1)
+    assert len(gho_server.requests) == 3
+
+
+def test_offline_and_failing_server(tmp_path, gho_server, page):
+    with requests.Session() as session:
+        body = HTTPCache(tmp_path).get(session, *page)
+        offline = HTTPCache(tmp_path, offline=True)
+        assert offline.get(session, *page) == body
+        with pytest.raises(requests.ConnectionError):
+            offline.get(session, gho_server.url + "/OTHER")
+
+        stale = HTTPCache(tmp_path, ttl=0)
+        gho_server.failures = 1
+        assert stale.get(session, *page) == body
+    assert stale.stats.stale_served == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, gho_server):
+    url = gho_server.url + "/MORT_100"
+    with requests.Session() as session:
+        size = len(HTTPCache(tmp_path / "probe").get(session, url, {"$top": 3, "$skip": 0}))
+        cache = HTTPCache(tmp_path / "lru", max_bytes=int(size * 2.5))
+        for skip in (0, 3, 6):
+            cache.get(session, url, {"$top": 3, "$skip": skip})
+            if skip == 3:
+                cache.get(session, url, {"$top": 3, "$skip": 0})
+    assert cache.stats.evictions == 1
+    assert cache.entry(url, {"$top": 3, "$skip": 3}) is None
+    assert cache.entry(url, {"$top": 3, "$skip": 0}) is not None
+    assert cache.size <= cache.max_bytes
+    cache.close()
+    assert HTTPCache(tmp_path / "lru").entry(url, {"$top": 3, "$skip": 3}) is None
+
+
+def test_hits_and_stores_do_not_rewrite_the_index(tmp_path, gho_server, page):
+    cache = HTTPCache(tmp_path)
+    index = tmp_path / "index.json"
+    with requests.Session() as session:
+        cache.get(session, *page)
+        assert not index.exists()
+        cache.flush()
+        written = index.read_bytes()
+        cache.get(session, *page)
+        cache.get(session, gho_server.url + "/MORT_100", {"$top": 7})
+        assert index.read_bytes() == written
+    accessed = cache.entry(*page)["last_access"]
+    cache.close()
+    assert HTTPCache(tmp_path).entry(*page)["last_access"] == accessed
+
+
+def test_recency_is_flushed_when_the_cache_is_collected(tmp_path, gho_server, page):
+    with requests.Session() as session:
+        cache = HTTPCache(tmp_path)
+        cache.get(session, *page)
+        cache.get(session, *page)
+        accessed = cache.entry(*page)["last_access"]
+        del cache
+    assert HTTPCache(tmp_path).entry(*page)["last_access"] == accessed
+
+
+def test_not_modified_without_a_cached_copy_is_an_error(tmp_path):
+    class NotModified:
+        def get(self, url, **kwargs):
+            response = requests.Response()
+            response.status_code, response.url = 304, url
+            return response
+
+    cache = HTTPCache(tmp_path)
+    with pytest.raises(requests.HTTPError, match="304"):
+        cache.get(NotModified(), "http://example.invalid/x")
+    assert cache.entry("http://example.invalid/x") is None
+
+
+def test_counters_are_exact_under_concurrency(tmp_path, gho_server, page):
+    from concurrent.futures import ThreadPoolExecutor
+
+    cache = HTTPCache(tmp_path)
+    with requests.Session() as session:
+        cache.get(session, *page)
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda _: cache.get(session, *page), range(400)))
+    assert cache.stats.hits == 400
+
+
+def test_index_reads_are_locked_copies(tmp_path, gho_server, page):
+    cache = HTTPCache(tmp_path)
+    with requests.Session() as session:
+        body = cache.get(session, *page)
+    entry = cache.entry(*page)
+    entry["size"] = 0
+    assert cache.entry(*page)["size"] == len(body) == cache.size
+    cache.clear()
+    assert cache.size == 0 and cache.entry(*page) is None
@@ -0,0 +1,111 @@
+import json
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate
+from income_health.chunked import rows_for_budget, run_chunked
+from income_health.clean import clean_gdp, clean_mortality
+from income_health.combine import combine_gdp_mortality
+from income_health.gho import DEFAULT_FIELDS
+from income_health.streaming import iter_chunks, parse_gho_stream
+from income_health.wdi import load_wdi
+
+YEARS = (2014, 2023)
+
+
+@pytest.fixture(scope="module")
+def inputs(tmp_path_factory):
+    return generate(tmp_path_factory.mktemp("synthetic"), scale=0.1)
+
+
+def in_memory(inputs, **options) -> pd.DataFrame:
+    gho = parse_gho_stream(iter_chunks(inputs["gho"].read_bytes()), DEFAULT_FIELDS)
+    return combine_gdp_mortality(clean_mortality(gho), clean_gdp(load_wdi(inputs["wdi"])), years=YEARS, **options)
+
+
+def canonical(frame: pd.DataFrame, keys) -> pd.DataFrame:
+    frame = frame.sort_values(list(keys)).reset_index(drop=True)
+    return frame.astype({c: str for c in frame.columns if isinstance(frame[c].dtype, pd.CategoricalDtype)})
+
+
+def test_rows_for_budget_is_positive():
+    assert rows_for_budget(0) >= 1
+    assert rows_for_budget(2**30) > rows_for_budget(2**20)
+
+
+@pytest.mark.parametrize("buckets", [1, 4])
+def test_chunked_matches_in_memory(inputs, tmp_path, buckets):
+    expected = in_memory(inputs)
+    result = run_chunked(inputs["wdi"], inputs["gho"], years=YEARS, memory_budget=2**20, buckets=buckets,
+                         spill_dir=tmp_path)
+    assert len(result) == len(expected) > 0
+    assert list(result.columns) == list(expected.columns)
+    keys = ["Country Code", "Year"]
+    pd.testing.assert_frame_equal(canonical(result, keys), canonical(expected, keys))
+
+
+def test_chunked_accepts_page_bodies(inputs, tmp_path):
+    pages = page_bodies(inputs)
+    whole = run_chunked(inputs["wdi"], inputs["gho"], years=YEARS, buckets=2, spill_dir=tmp_path)
+    paged = run_chunked(inputs["wdi"], iter(pages), years=YEARS, buckets=2, spill_dir=tmp_path)
+    keys = ["Country Code", "Year"]
+    pd.testing.assert_frame_equal(canonical(paged, keys), canonical(whole, keys))
+
+
+@pytest.mark.parametrize("keep", [("Dim1",), ("Dim1", "Dim2")])
+def test_chunked_keeps_dimensions_categorical(inputs, tmp_path, keep):
+    expected = in_memory(inputs, keep=keep)
+    result = run_chunked(inputs["wdi"], inputs["gho"], years=YEARS, keep=keep, memory_budget=2**20, buckets=4,
+                         spill_dir=tmp_path)
+    for column in keep:
+        assert result[column].dtype == expected[column].dtype
+    keys = ["Country Code", "Year", *keep]
+    pd.testing.assert_frame_equal(canonical(result, keys), canonical(expected, keys))
+
+
+def test_chunked_store_output_with_keep(inputs, tmp_path):
+    pytest.importorskip("pyarrow")
+    from income_health.store import SnapshotStore
+
+    store = SnapshotStore(tmp_path / "store")
+    manifest = run_chunked(inputs["wdi"], inputs["gho"], years=YEARS, keep=("Dim1",), memory_budget=2**20,
+                           buckets=4, store=store, spill_dir=tmp_path)
+    stored = store.read("combined")
+    assert manifest["rows"] == len(stored) == len(in_memory(inputs, keep=("Dim1",)))
+    assert isinstance(stored["Dim1"].dtype, pd.CategoricalDtype)
+
+
+def page_bodies(inputs, count=True):
+    records = json.loads(inputs["gho"].read_bytes())["value"]
+    half = len(records) // 2
+    first = {"@odata.count": len(records), "value": records[:half]} if count else {"value": records[:half]}
+    return [json.dumps(first).encode(), json.dumps({"value": records[half:]}).encode()]
+
+
+def test_stream_buckets_follow_the_budget(inputs, tmp_path, monkeypatch):
+    import income_health.chunked as chunked
+
+    used = []
+    original = chunked.combine_chunks
+
+    def spy(*args, **kwargs):
+        used.append(kwargs["buckets"])
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(chunked, "combine_chunks", spy)
+    total = len(json.loads(inputs["gho"].read_bytes())["value"])
+    for budget in (2**20, 2**30):
+        result = run_chunked(inputs["wdi"], iter(page_bodies(inputs)), years=YEARS, memory_budget=budget,
+                             spill_dir=tmp_path)
+        assert len(result) == len(in_memory(inputs))
+    assert used[0] == -(-total // rows_for_budget(2**20)) > 1
+    assert used[1] == 1
+
+
+def test_stream_without_count_needs_explicit_buckets(inputs, tmp_path):
+    with pytest.raises(ValueError, match="buckets"):
+        run_chunked(inputs["wdi"], iter(page_bodies(inputs, count=False)), years=YEARS, spill_dir=tmp_path)
+    result = run_chunked(inputs["wdi"], iter(page_bodies(inputs, count=False)), years=YEARS, buckets=2,
+                         spill_dir=tmp_path)
+    assert len(result) == len(in_memory(inputs))
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from income_health.combine import collapse_dimensions, combine_gdp_mortality
+
+
+@pytest.fixture
+def gho():
+    return pd.DataFrame({
+        "SpatialDim": pd.Categorical(["AFG", "AFG", "AFG", "ALB", "ALB", None]),
+        "TimeDim": pd.array([2020, 2020, 2021, 2020, None, 2020], dtype="Int64"),
+        "Dim1": pd.Categorical(["SEX_MLE", "SEX_FMLE", "SEX_MLE", "SEX_MLE", "SEX_MLE", "SEX_MLE"]),
+        "Value": ["10", "20", "30", "No data", "50", "60"],
+    })
+
+
+@pytest.fixture
+def wdi():
+    return pd.DataFrame({"Country Name": ["Afghanistan", "Albania"], "Country Code": ["AFG", "ALB"],
+                         2020: [1.0, 2.0], 2021: [1.5, np.nan]})
+
+
+def test_collapse_drops_rows_without_country_or_year(gho):
+    collapsed = collapse_dimensions(gho)
+    assert collapsed["Year"].dtype == "int16"
+    assert collapsed.set_index(["Country Code", "Year"])["Value"].to_dict() == {("AFG", 2020): 15.0,
+                                                                                ("AFG", 2021): 30.0}
+
+
+def test_collapse_keeps_and_selects_dimensions(gho):
+    kept = collapse_dimensions(gho, keep=["Dim1"])
+    assert len(kept) == 3 and isinstance(kept["Dim1"].dtype, pd.CategoricalDtype)
+    assert collapse_dimensions(gho, select={"Dim1": "SEX_FMLE"})["Value"].tolist() == [20.0]
+
+
+def test_combine_joins_one_row_per_key(gho, wdi):
+    combined = combine_gdp_mortality(gho, wdi, years=(2020, 2021))
+    assert combined[["Country Code", "Year", "Mortality Rate", "GDP"]].astype({"Country Code": str}) \
+        .values.tolist() == [["AFG", 2020, 15.0, 1.0], ["AFG", 2021, 30.0, 1.5]]
+    with_dim = combine_gdp_mortality(gho, wdi, keep=["Dim1"])
+    assert len(with_dim) == 3 and (with_dim["GDP"] > 0).all()
+
+
+def test_combine_rejects_duplicate_gdp_rows(gho, wdi):
+    with pytest.raises(pd.errors.MergeError):
+        combine_gdp_mortality(gho, pd.concat([wdi, wdi]))
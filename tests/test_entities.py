@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from income_health.entities import EntityIndex, load_entity_index
+
+WDI = pd.DataFrame({
+    "Country Code": ["AFG", "ALB", "DZA", "WLD", "LIC"],
+    "Country Name": ["Afghanistan", "Albania", "Algeria", "World", "Low income"],
+})
+METADATA = pd.DataFrame({
+    "Country Code": ["AFG", "ALB", "DZA", "WLD"],
+    "Region": ["South Asia", "Europe & Central Asia", "Middle East & North Africa", np.nan],
+    "IncomeGroup": ["Low income", "Upper middle income", "Lower middle income", np.nan],
+    "TableName": ["Afghanistan", "Albania", "Algeria", "World"],
+})
+GHO = pd.DataFrame({
+    "SpatialDim": ["AFG", "ALB", "DZA", "GLOBAL", "AFR"],
+    "ParentLocationCode": ["EMR", "EUR", "AFR", None, None],
+})
+
+
+@pytest.fixture
+def index():
+    return EntityIndex.build(wdi=WDI, metadata=METADATA, gho=GHO, aliases={"Algérie": "DZA"})
+
+
+def test_codes_names_and_aliases_share_ids(index):
+    ids = index.encode(["AFG", "afghanistan", " Afghanistan ", "GLOBAL", "WLD", "WB_LI", "Algérie", "XXX", None])
+    assert ids[0] == ids[1] == ids[2]
+    assert ids[3] == ids[4] and ids[5] == index.encode(["LIC"])[0]
+    assert ids[6] == index.encode(["DZA"])[0]
+    assert list(ids[-2:]) == [-1, -1]
+    assert index.aliases["global"] == ids[4]
+    assert list(index.kinds(index.encode(["AFG", "WLD", "XXX"]))) == [True, False, False]
+
+
+def test_canonicalize(index):
+    frame = pd.DataFrame({"Country Code": ["GLOBAL", "AFG", "ZZZ", "Albania"], "GDP": [1.0, 2.0, 3.0, 4.0]})
+    result, unknown = index.canonicalize(frame)
+    assert unknown == ["ZZZ"]
+    assert result["Country Code"].astype(str).tolist() == ["WLD", "AFG", "ALB"]
+    assert list(result["Country Code"].cat.categories) == index.table["code"].tolist()
+    np.testing.assert_array_equal(result["Country Code"].cat.codes, index.encode(["WLD", "AFG", "ALB"]))
+
+    countries, _ = index.canonicalize(frame, countries_only=True)
+    assert countries["Country Code"].astype(str).tolist() == ["AFG", "ALB"]
+
+
+def test_groups_and_rollup(index):
+    assert index.members("LIC", by="income_group") == ["AFG"]
+    assert index.members("AFR", by="who_region") == ["DZA"]
+    frame = pd.DataFrame({
+        "Country Code": ["AFG", "ALB", "DZA", "WLD", "AFG"],
+        "Year": [2020, 2020, 2020, 2020, 2021],
+        "GDP": [1.0, 2.0, 4.0, 100.0, 8.0],
+    })
+    rollup = index.rollup(frame, by="who_region")
+    assert rollup.to_dict("list") == {
+        "Country Code": ["AFR", "EUR", "EMR", "EMR"],
+        "Group Name": ["Africa", "Europe", "Eastern Mediterranean", "Eastern Mediterranean"],
+        "Year": [2020, 2020, 2020, 2021],
+        "GDP": [4.0, 2.0, 1.0, 8.0],
+    }
+    totals = index.rollup(frame, by="income_group", year=None)
+    assert dict(zip(totals["Country Code"], totals["GDP"])) == {"UMC": 2.0, "LMC": 4.0, "LIC": 9.0}
+    assert index.select(frame, income_group="LIC")["GDP"].tolist() == [1.0, 8.0]
+    with pytest.raises(ValueError, match="unknown grouping"):
+        index.group_of([0], by="continent")
+
+
+def test_rollup_without_metadata_is_empty():
+    index = EntityIndex.build(wdi=WDI)
+    frame = pd.DataFrame({"Country Code": ["AFG"], "Year": [2020], "GDP": [1.0]})
+    assert index.rollup(frame, by="income_group").empty
+
+
+def test_cache_key_tracks_sources(tmp_path):
+    wdi_path = tmp_path / "API_TEST.csv"
+    wdi_path.write_text("Country Name,Country Code,Indicator Name,Indicator Code,2020,\n"
+                        "Afghanistan,AFG,GDP,NY.GDP.MKTP.CD,1.0,\n")
+    cache_path = tmp_path / "entities.json"
+    first = load_entity_index(wdi_path, cache_path=cache_path)
+    assert first.encode(["AFG"])[0] >= 0
+    assert "ALB" not in first.table["code"].tolist()
+
+    mtime = cache_path.stat().st_mtime_ns
+    cached = load_entity_index(wdi_path, cache_path=cache_path)
+    assert cache_path.stat().st_mtime_ns == mtime
+    pd.testing.assert_frame_equal(cached.table, first.table)
+
+    metadata_path = tmp_path / "Metadata_Country_API_TEST.csv"
+    METADATA.to_csv(metadata_path, index=False)
+    with_metadata = load_entity_index(wdi_path, cache_path=cache_path)
+    assert with_metadata.members("LIC", by="income_group") == ["AFG"]
+
+    with_gho = load_entity_index(wdi_path, gho=GHO, cache_path=cache_path)
+    assert with_gho.members("EUR", by="who_region") == ["ALB"]
@@ -0,0 +1,72 @@
+import pytest
+import requests
+
+from income_health.gho import GHOClient, build_filter, make_session
+
+
+def client_for(server, **options):
+    options.setdefault("page_size", 50)
+    session = make_session(retries=options.pop("retries", 3), backoff_factor=0)
+    return GHOClient(base_url=server.url, session=session, **options)
+
+
+def test_build_filter():
+    assert build_filter() is None
+    assert build_filter((2010, None)) == "TimeDim ge 2010"
+    assert build_filter((2010, 2012), ["ALB", "AFG", "ALB"], "Dim1 eq 'SEX_BTSX'") == (
+        "TimeDim ge 2010 and TimeDim le 2012 and (SpatialDim eq 'AFG' or SpatialDim eq 'ALB')"
+        " and (Dim1 eq 'SEX_BTSX')")
+    assert build_filter(countries=["C'IV"]) == "(SpatialDim eq 'C''IV')"
+
+
+def test_fetch_pages_through_every_row(gho_server):
+    records = client_for(gho_server, max_workers=3).fetch_records("MORT_100", fields=None)
+    assert [r["Id"] for r in records] == list(range(len(gho_server.rows)))
+
+    first, *rest = gho_server.requests
+    assert first["$count"] == "true" and "$skip" not in first
+    assert all(q["$top"] == "50" and q["$orderby"] == "Id" and "$count" not in q for q in rest)
+    assert sorted(int(q["$skip"]) for q in rest) == list(range(50, len(gho_server.rows), 50))
+
+
+def test_fetch_without_count_stops_at_short_page(gho_server):
+    gho_server.counts = False
+    pages = client_for(gho_server, max_workers=2).fetch_pages("MORT_100", fields=("Id",))
+    assert sum(page.count(b'"Id"') for page in pages) == len(gho_server.rows)
+    assert len(pages) == len(gho_server.rows) // 50 + 1
+
+
+def test_filter_and_select_are_pushed_to_the_server(gho_server):
+    frame = client_for(gho_server).fetch("MORT_100", fields=("SpatialDim", "TimeDim", "NumericValue"),
+                                         years=(2010, 2012), countries=["ALB", "DZA"])
+    query = gho_server.requests[0]
+    assert query["$select"] == "SpatialDim,TimeDim,NumericValue"
+    assert "TimeDim ge 2010" in query["$filter"] and "SpatialDim eq 'DZA'" in query["$filter"]
+    assert list(frame.columns) == ["SpatialDim", "TimeDim", "NumericValue"]
+    assert len(frame) == 2 * 3 * 3
+    assert set(frame["SpatialDim"]) == {"ALB", "DZA"}
+    assert frame["TimeDim"].between(2010, 2012).all()
+
+
+def test_streamed_fetch_matches_records(gho_server):
+    client = client_for(gho_server)
+    fields = ("SpatialDim", "TimeDim", "Dim1", "NumericValue")
+    plain = client.fetch("MORT_100", fields=fields)
+    streamed = client.fetch("MORT_100", fields=fields, stream=True)
+    assert streamed["SpatialDim"].dtype == "category"
+    assert streamed.astype({"SpatialDim": object, "Dim1": object}).equals(
+        plain.astype({"SpatialDim": object, "Dim1": object, "TimeDim": streamed["TimeDim"].dtype}))
+
+
+def test_transient_errors_are_retried(gho_server):
+    gho_server.failures = 2
+    records = client_for(gho_server, retries=3).fetch_records("MORT_100", years=(2023, 2023))
+    assert len(records) == len(gho_server.rows) // len(range(2000, 2024))
+    assert len(gho_server.requests) == 3
+
+
+def test_retries_are_bounded(gho_server):
+    gho_server.failures = 10
+    with pytest.raises(requests.HTTPError):
+        client_for(gho_server, retries=2).fetch_records("MORT_100")
+    assert len(gho_server.requests) == 3
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import requests
+
+from income_health.combine import combine_gdp_mortality
+from income_health.gho import GHOClient, make_session
+from income_health.ingest import PANEL_COLUMNS, ingest
+from income_health.wdi import load_wdi
+
+WDI_FILE = Path(__file__).resolve().parent.parent / "API_NY.GDP.MKTP.CD_DS2_en_csv_v2_2.csv"
+YEARS = (2014, 2022)
+
+
+def client_for(server, retries=2):
+    return GHOClient(base_url=server.url, page_size=40, session=make_session(retries=retries, backoff_factor=0))
+
+
+def test_ingest_matches_a_serial_fetch(gho_server):
+    client = client_for(gho_server)
+    panel = ingest(wdi=[str(WDI_FILE)], gho=["MORT_100"], years=YEARS, client=client, parse_workers=2)
+    assert list(panel.columns) == PANEL_COLUMNS
+    assert panel["year"].dtype == "int16" and panel["year"].between(*YEARS).all()
+    assert set(panel["indicator"]) == {"NY.GDP.MKTP.CD", "MORT_100"}
+
+    wide = panel.astype({"country": str, "indicator": str}).pivot_table(
+        index=["country", "year"], columns="indicator", values="value").dropna().reset_index().rename_axis(columns=None)
+    serial = combine_gdp_mortality(client.fetch("MORT_100", years=YEARS), load_wdi(WDI_FILE), years=YEARS)
+    expected = serial.astype({"Country Code": str})[["Country Code", "Year", "GDP", "Mortality Rate"]]
+    expected = expected.sort_values(["Country Code", "Year"]).reset_index(drop=True)
+    got = wide.rename(columns={"country": "Country Code", "year": "Year", "NY.GDP.MKTP.CD": "GDP",
+                               "MORT_100": "Mortality Rate"})[list(expected.columns)]
+    pd.testing.assert_frame_equal(got.sort_values(["Country Code", "Year"]).reset_index(drop=True), expected,
+                                  check_dtype=False)
+    assert len(expected) > 0
+
+
+def test_failing_source_raises(gho_server):
+    gho_server.failures = 100
+    with pytest.raises(requests.HTTPError):
+        ingest(wdi=[str(WDI_FILE)], gho=["MORT_100"], years=YEARS, client=client_for(gho_server, retries=0),
+               parse_workers=1)
+
+
+def test_missing_wdi_file_raises(tmp_path, gho_server):
+    from income_health.cache import HTTPCache
+
+    with pytest.raises(requests.ConnectionError):
+        ingest(wdi=["NO.SUCH.INDICATOR"], directory=tmp_path, cache=HTTPCache(tmp_path / "http", offline=True),
+               client=client_for(gho_server), parse_workers=1)
+
+
+def test_nothing_to_ingest(gho_server):
+    panel = ingest(client=client_for(gho_server), parse_workers=1)
+    assert panel.empty and list(panel.columns) == PANEL_COLUMNS
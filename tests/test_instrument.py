@@ -0,0 +1,66 @@
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from income_health.instrument import MetricsRegistry, instrument, record_download
+
+
+def test_tracemalloc_is_opt_in():
+    assert MetricsRegistry.from_env({}).trace_memory is False
+    assert MetricsRegistry.from_env({"INCOME_HEALTH_TRACEMALLOC": "1"}).trace_memory is True
+    metrics = MetricsRegistry()
+    with instrument("plain", metrics=metrics):
+        assert not tracemalloc.is_tracing()
+    assert metrics.records[0].peak_traced_bytes is None
+
+
+def test_nested_peaks_propagate_and_tracing_stops():
+    metrics = MetricsRegistry(trace_memory=True)
+    with instrument("outer", metrics=metrics):
+        with instrument("inner", metrics=metrics):
+            block = np.ones(2**20)
+            del block
+    inner, outer = metrics.records
+    assert inner.peak_traced_bytes >= 8 * 2**20
+    assert outer.peak_traced_bytes >= inner.peak_traced_bytes
+    assert not tracemalloc.is_tracing()
+
+
+def test_nesting_and_downloads_are_per_thread():
+    metrics = MetricsRegistry(trace_memory=True)
+    both_running = threading.Barrier(2)
+
+    def stage(name, nbytes):
+        with instrument(name, metrics=metrics):
+            both_running.wait()
+            record_download(nbytes)
+            with instrument(name + ".child", metrics=metrics):
+                pass
+            both_running.wait()
+
+    with ThreadPoolExecutor(2) as pool:
+        list(pool.map(stage, ["a", "b"], [10, 20]))
+    by_stage = {m.stage: m for m in metrics.records}
+    assert by_stage["a"].bytes_downloaded == 10 and by_stage["b"].bytes_downloaded == 20
+    assert by_stage["a.child"].bytes_downloaded == 0
+    assert not tracemalloc.is_tracing()
+
+
+def test_helper_thread_downloads_credit_active_stages():
+    metrics = MetricsRegistry()
+    with instrument("fetch", metrics=metrics):
+        with ThreadPoolExecutor(2) as pool:
+            list(pool.map(record_download, [5, 7]))
+    assert metrics.records[0].bytes_downloaded == 12
+
+
+def test_failed_stage_is_recorded():
+    metrics = MetricsRegistry()
+    try:
+        with instrument("broken", metrics=metrics):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    assert metrics.records[0].error == "ValueError: boom"
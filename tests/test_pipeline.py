@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import pytest
+
+from income_health.gho import GHOClient
+from income_health.pipeline import Pipeline, build_pipeline
+
+from conftest import COUNTRIES
+
+WDI_FILE = Path(__file__).resolve().parent.parent / "API_NY.GDP.MKTP.CD_DS2_en_csv_v2_2.csv"
+
+
+def one():
+    return 1
+
+
+def add(value, step):
+    return value + step
+
+
+def test_stages_run_once_and_prune_removes_old_keys(tmp_path):
+    pipeline = Pipeline(tmp_path)
+    pipeline.add("start", one)
+    pipeline.add("next", add, inputs=["start"], step=1)
+    assert pipeline.run() == {"next": 2} and pipeline.executed == ["start", "next"]
+    assert pipeline.run() == {"next": 2} and pipeline.executed == []
+
+    changed = Pipeline(tmp_path)
+    changed.add("start", one)
+    changed.add("next", add, inputs=["start"], step=5)
+    assert changed.stale() == ["next"]
+    assert changed.run() == {"next": 6}
+    assert [p.parent.name for p in changed.prune()] == ["next"]
+    assert len(list((tmp_path / "next").iterdir())) == 1
+    assert changed.prune() == []
+
+
+def test_unknown_inputs_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="unknown stages"):
+        Pipeline(tmp_path).add("next", add, inputs=["start"], step=1)
+
+
+def test_build_pipeline_analyzes_and_keys_on_the_client(tmp_path, gho_server):
+    client = GHOClient(base_url=gho_server.url, page_size=100)
+    pipeline = build_pipeline(WDI_FILE, client, cache_dir=tmp_path)
+    results = pipeline.run()
+    assert list(results) == ["analyze"]
+    summary = results["analyze"]
+    assert set(summary.index) == set(COUNTRIES)
+    assert {"years", "pearson", "spearman", "growth_vs_change"} <= set(summary.columns)
+
+    requests_made = len(gho_server.requests)
+    build_pipeline(WDI_FILE, client, cache_dir=tmp_path).run()
+    assert len(gho_server.requests) == requests_made
+
+    elsewhere = GHOClient(base_url=gho_server.url.replace("127.0.0.1", "localhost"), page_size=100)
+    moved = build_pipeline(WDI_FILE, elsewhere, cache_dir=tmp_path)
+    assert moved.stale() == ["mortality", "mortality_clean", "combined", "analyze"]
@@ -0,0 +1,90 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+
+from matplotlib.collections import LineCollection
+
+from income_health.plots import country_year_matrix, density_scatter, lttb, timeseries_plot
+
+
+def small_frame():
+    return pd.DataFrame({
+        "Country Code": ["AFG", "AFG", "ALB", "ALB", "ALB", "DZA"],
+        "Country Name": ["Afghanistan", "Afghanistan", "Albania", "Albania", "Albania", "Algeria"],
+        "Year": [2014, 2016, 2014, 2014, 2015, 2016],
+        "GDP": [2.0e10, 1.8e10, 1.2e10, 1.4e10, np.nan, 1.6e11],
+        "Mortality Rate": [60.0, 55.0, 9.0, 8.0, 8.5, 20.0],
+    })
+
+
+def test_density_scatter_bins_valid_rows(tmp_path):
+    figure = density_scatter(small_frame(), bins=(8, 4), highlight=["ALB"], path=tmp_path / "scatter.png")
+    ax = figure.axes[0]
+    (image,) = ax.get_images()
+    assert image.get_array().shape == (4, 8)
+    assert image.get_array().sum() == 5
+    assert [line.get_label() for line in ax.get_lines()] == ["ALB"]
+    assert len(ax.get_lines()[0].get_xdata()) == 2
+    assert (tmp_path / "scatter.png").stat().st_size > 0
+
+
+def test_density_scatter_without_data():
+    frame = small_frame().assign(GDP=np.nan)
+    (image,) = density_scatter(frame).axes[0].get_images()
+    assert image.get_array().shape == (1, 1)
+
+
+def test_country_year_matrix():
+    entities, years, matrix = country_year_matrix(small_frame())
+    assert list(entities) == ["Afghanistan", "Albania", "Algeria"]
+    assert list(years) == [2014, 2015, 2016]
+    assert matrix.shape == (3, 3)
+    np.testing.assert_array_equal(matrix, [[2.0e10, np.nan, 1.8e10],
+                                           [1.3e10, np.nan, np.nan],
+                                           [np.nan, np.nan, 1.6e11]])
+
+    dated = small_frame().assign(Year=pd.to_datetime(small_frame()["Year"].astype(str)))
+    _, dated_years, dated_matrix = country_year_matrix(dated)
+    np.testing.assert_array_equal(dated_years, years)
+    np.testing.assert_array_equal(dated_matrix, matrix)
+
+
+def test_lttb_keeps_endpoints_and_threshold():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 25.0)
+    y[437] = 5.0
+    index = lttb(x, y, 50)
+    assert len(index) == 50
+    assert index[0] == 0 and index[-1] == 999
+    assert np.all(np.diff(index) > 0)
+    assert 437 in index
+
+
+def test_lttb_passthrough():
+    x = np.arange(10, dtype=np.float64)
+    np.testing.assert_array_equal(lttb(x, x, 10), np.arange(10))
+    np.testing.assert_array_equal(lttb(x, x, 25), np.arange(10))
+    np.testing.assert_array_equal(lttb(x, x, 2), np.arange(10))
+
+
+def test_timeseries_plot_draws_one_segment_per_entity():
+    frame = pd.DataFrame({
+        "Country Name": np.repeat([f"Country {i}" for i in range(15)], 30),
+        "Year": np.tile(np.arange(1990, 2020), 15),
+        "GDP": np.arange(15 * 30, dtype=np.float64),
+    })
+    figure = timeseries_plot(frame, top=10, max_points=12)
+    (collection,) = [c for c in figure.axes[0].collections if isinstance(c, LineCollection)]
+    segments = collection.get_segments()
+    assert len(segments) == 10
+    assert all(len(segment) == 12 for segment in segments)
+    assert all(segment[0, 0] == 1990 and segment[-1, 0] == 2019 for segment in segments)
+
+    groups = {f"Country {i}": "even" if i % 2 == 0 else "odd" for i in range(15)}
+    faceted = timeseries_plot(frame, top=None, groups=groups)
+    counts = [len(c.get_segments()) for ax in faceted.axes for c in ax.collections
+              if isinstance(c, LineCollection)]
+    assert counts == [8, 7]
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from income_health.quality import Profiler, null_counts, profile
+
+
+def gho_like(rows: int = 400) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "SpatialDim": rng.choice(["AFG", "ALB", "DZA", "AGO"], rows),
+        "TimeDim": rng.integers(2000, 2024, rows),
+        "Value": rng.normal(50, 10, rows).round(1).astype(str),
+        "Comments": None,
+    })
+    frame.loc[::37, "Value"] = "No data"
+    frame.loc[::53, "SpatialDim"] = None
+    return frame
+
+
+def test_chunked_profile_matches_one_pass():
+    frame = gho_like()
+    options = dict(key=("SpatialDim", "TimeDim"), country="SpatialDim", year="TimeDim", numeric=["Value"])
+    whole = profile(frame, **options)
+    chunked = profile((frame.iloc[i:i + 23] for i in range(0, len(frame), 23)), **options)
+    assert chunked["chunks"] > 1
+    for section in ("rows", "all_null_columns", "non_numeric", "year_coverage"):
+        assert chunked[section] == whole[section]
+    assert chunked["duplicate_keys"]["rows"] == whole["duplicate_keys"]["rows"]
+    expected = frame.duplicated(["SpatialDim", "TimeDim"]).sum()
+    assert whole["duplicate_keys"]["rows"] == expected
+
+
+def test_report_contents():
+    frame = gho_like()
+    report = profile(frame, key=("SpatialDim", "TimeDim"), country="SpatialDim", year="TimeDim",
+                     numeric=["Value"])
+    assert report["all_null_columns"] == ["Comments"]
+    assert report["non_numeric"]["Value"] == len(range(0, len(frame), 37))
+    assert "No data" in report["columns"]["Value"]["non_numeric_examples"]
+    assert set(report["year_coverage"]) == {"AFG", "ALB", "DZA", "AGO"}
+    assert null_counts(report).to_dict() == {"SpatialDim": frame["SpatialDim"].isna().sum(),
+                                             "Comments": len(frame)}
+
+
+def test_report_can_be_taken_between_chunks():
+    profiler = Profiler(country="SpatialDim", year="TimeDim")
+    profiler.update(pd.DataFrame({"SpatialDim": ["AFG"], "TimeDim": [2000]}))
+    assert profiler.report()["year_coverage"]["AFG"]["years"] == 1
+    profiler.update(pd.DataFrame({"SpatialDim": ["AFG", "AFG"], "TimeDim": [2000, 2002]}))
+    assert profiler.report()["year_coverage"]["AFG"] == {"first": 2000, "last": 2002, "years": 2, "missing": 1}
+
+
+def test_duplicate_keys_across_many_chunks():
+    rng = np.random.default_rng(1)
+    frame = pd.DataFrame({"SpatialDim": rng.choice(list("ABCDEFGHIJ"), 3000), "TimeDim": rng.integers(0, 200, 3000)})
+    profiler = Profiler(key=("SpatialDim", "TimeDim"))
+    for start in range(0, len(frame), 7):
+        profiler.update(frame.iloc[start:start + 7])
+    assert profiler.report()["duplicate_keys"]["rows"] == frame.duplicated().sum()
+    runs = [len(run) for run in profiler._seen_keys]
+    assert sum(runs) == len(frame.drop_duplicates())
+    assert len(runs) <= 12 and all(a >= 2 * b for a, b in zip(runs, runs[1:]))
@@ -0,0 +1,77 @@
+import csv
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from income_health.cli import main
+from income_health.gho import GHOClient
+from income_health.refresh import refresh
+
+pytest.importorskip("pyarrow")
+
+from income_health.store import SnapshotStore  # noqa: E402
+
+WDI_FILE = Path(__file__).resolve().parent.parent / "API_NY.GDP.MKTP.CD_DS2_en_csv_v2_2.csv"
+
+
+@pytest.mark.parametrize("build_options", [["--years", "2014-2022"], ["--years", "2010-2020", "--keep", "Dim1"]])
+def test_fetch_keeps_the_built_panel(tmp_path, gho_server, build_options):
+    common = ["--store", str(tmp_path / "store"), "--cache-dir", str(tmp_path / "cache")]
+    source = ["--wdi", str(WDI_FILE), "--gho-url", gho_server.url]
+    assert main([*common, "build", *source, *build_options]) == 0
+    store = SnapshotStore(tmp_path / "store")
+    built = store.read("combined")
+
+    assert main([*common, "fetch", *source]) == 0
+    refreshed = store.read("combined")
+    assert store.manifest("combined")["extra"]["scope"] == store.snapshots("combined")[0]["extra"]["scope"]
+    key = [c for c in ("Country Code", "Year", "Dim1") if c in built.columns]
+    pd.testing.assert_frame_equal(refreshed.sort_values(key).reset_index(drop=True),
+                                  built.sort_values(key).reset_index(drop=True))
+
+
+def test_fetch_with_a_new_window_rebuilds_the_panel(tmp_path, gho_server):
+    common = ["--store", str(tmp_path / "store"), "--cache-dir", str(tmp_path / "cache")]
+    source = ["--wdi", str(WDI_FILE), "--gho-url", gho_server.url]
+    assert main([*common, "build", *source, "--years", "2014-2022"]) == 0
+    assert main([*common, "fetch", *source, "--years", "2018-2020"]) == 0
+    years = SnapshotStore(tmp_path / "store").read("combined")["Year"]
+    assert (years.min(), years.max()) == (2018, 2020)
+
+
+def test_refresh_deletes_rows_that_vanished_upstream(tmp_path, gho_server):
+    wdi = tmp_path / WDI_FILE.name
+    shutil.copy(WDI_FILE, wdi)
+    store = SnapshotStore(tmp_path / "store")
+    client = GHOClient(base_url=gho_server.url, page_size=50)
+    refresh(store, wdi, client, years=(2014, 2022))
+    keys = set(store.read("combined")[["Country Code", "Year"]].astype({"Country Code": str, "Year": int})
+               .itertuples(index=False))
+    assert {("AFG", 2016), ("ALB", 2018), ("DZA", 2020)} <= keys
+
+    # A new WDI release without Afghanistan's 2016 GDP, and GHO dropping Albania 2018 and all of 2020.
+    with open(wdi, newline="", encoding="utf-8-sig") as fh:
+        rows = list(csv.reader(fh))
+    rows[2][1] = "12/19/2024"
+    afghanistan = next(row for row in rows if row[1:2] == ["AFG"])
+    afghanistan[rows[4].index("2016")] = ""
+    with open(wdi, "w", newline="", encoding="utf-8") as fh:
+        csv.writer(fh).writerows(rows)
+    gho_server.rows[:] = [r for r in gho_server.rows
+                          if r["TimeDim"] != 2020 and (r["SpatialDim"], r["TimeDim"]) != ("ALB", 2018)]
+
+    result = refresh(store, wdi, client, full_gho=True)
+    assert result.wdi_reparsed
+    gdp = store.read("gdp").astype({"Country Code": str, "Year": int})
+    mortality = store.read("mortality").astype({"Country Code": str, "Year": int})
+    assert not ((gdp["Country Code"] == "AFG") & (gdp["Year"] == 2016)).any()
+    assert ((gdp["Country Code"] == "AFG") & (gdp["Year"] == 2017)).any()
+    assert not ((mortality["Country Code"] == "ALB") & (mortality["Year"] == 2018)).any()
+    assert 2020 not in set(mortality["Year"])
+    assert "2020" not in store.manifest("mortality")["partitions"]
+    keys = set(store.read("combined")[["Country Code", "Year"]].astype({"Country Code": str, "Year": int})
+               .itertuples(index=False))
+    assert not keys & {("AFG", 2016), ("ALB", 2018), ("DZA", 2020)}
+    assert {("AFG", 2017), ("ALB", 2019), ("DZA", 2021)} <= keys
@@ -0,0 +1,43 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from income_health.cli import main
+from income_health.entities import EntityIndex
+from income_health.report import slices
+
+from conftest import COUNTRIES
+
+WDI_FILE = Path(__file__).resolve().parent.parent / "API_NY.GDP.MKTP.CD_DS2_en_csv_v2_2.csv"
+
+
+def test_slices_warn_about_groupings_without_members():
+    gho = pd.DataFrame({"SpatialDim": list(COUNTRIES), "ParentLocationCode": "EMR"})
+    entities = EntityIndex.build(gho=gho)
+    with pytest.warns(UserWarning, match="no slices for") as caught:
+        found = slices(entities, list(COUNTRIES))
+    assert [s["key"] for s in found] == ["all", "who_region-EMR"]
+    assert len(caught) == 3  # region, income_group and their crossing
+
+    with pytest.warns(UserWarning, match="fewer than 5"):
+        assert slices(entities, list(COUNTRIES), groupings=["who_region"], min_countries=5) == []
+
+
+def test_report_slices_use_who_regions_and_metadata(tmp_path, gho_server):
+    pytest.importorskip("pyarrow")
+    metadata = tmp_path / "metadata.csv"
+    pd.DataFrame({"Country Code": list(COUNTRIES), "Region": "Middle East & North Africa",
+                  "IncomeGroup": "Low income", "TableName": [f"Country {c}" for c in COUNTRIES]}
+                 ).to_csv(metadata, index=False)
+    common = ["--store", str(tmp_path / "store"), "--cache-dir", str(tmp_path / "cache")]
+    assert main([*common, "build", "--wdi", str(WDI_FILE), "--gho-url", gho_server.url]) == 0
+    assert main([*common, "report", "--output", str(tmp_path / "reports"), "--slices", "--no-figures",
+                 "--workers", "1", "--wdi", str(WDI_FILE), "--metadata", str(metadata),
+                 "--gho-url", gho_server.url]) == 0
+
+    index = json.loads((tmp_path / "reports" / "slices" / "index.json").read_text())
+    keys = {s["key"] for s in index["slices"]}
+    assert {"all", "region-MEA", "income_group-LIC", "who_region-EMR", "region-MEA__income_group-LIC"} <= keys
+    assert all(s["countries"] == len(COUNTRIES) for s in index["slices"])
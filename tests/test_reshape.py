@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from income_health.reshape import wide_to_long, year_to_period, year_to_timestamp
+from income_health.wdi import load_wdi, year_columns
+
+WDI_FILE = Path(__file__).resolve().parent.parent / "API_NY.GDP.MKTP.CD_DS2_en_csv_v2_2.csv"
+
+
+def melted(wide, id_columns, years):
+    start, end = years or (1960, 2023)
+    long = wide.melt(id_vars=list(id_columns), value_vars=[c for c in year_columns(wide) if start <= c <= end],
+                     var_name="Year", value_name="value").dropna(subset=["value"])
+    return long.sort_values(list(id_columns) + ["Year"]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("years, rows", [((2014, 2016), 776), (None, 13979)])
+def test_wide_to_long_matches_melt(years, rows):
+    wide = load_wdi(WDI_FILE)
+    id_columns = ("Country Code", "Country Name")
+    long = wide_to_long(wide, id_columns, years=years)
+    assert len(long) == rows
+    assert long["Year"].dtype == np.int16
+    assert all(isinstance(long[c].dtype, pd.CategoricalDtype) for c in id_columns)
+    got = long.astype({c: str for c in id_columns} | {"Year": np.int64})
+    expected = melted(wide, id_columns, years).astype({"Year": np.int64})
+    pd.testing.assert_frame_equal(got.sort_values(list(id_columns) + ["Year"]).reset_index(drop=True), expected,
+                                  check_dtype=False)
+
+
+def test_wide_to_long_window_and_missing():
+    wide = load_wdi(WDI_FILE)
+    long = wide_to_long(wide, ("Country Code",), years=(2010, 2012), dropna=False, year_dtype="period")
+    assert len(long) == len(wide) * 3
+    assert isinstance(long["Year"].dtype, pd.PeriodDtype)
+    assert sorted(long["Year"].dt.year.unique()) == [2010, 2011, 2012]
+
+
+def test_year_conversions():
+    years = [1960, 2000, np.nan, 2023]
+    stamps = year_to_timestamp(years)
+    assert stamps.dtype == "datetime64[ns]"
+    assert list(pd.DatetimeIndex(stamps).year[[0, 1, 3]]) == [1960, 2000, 2023]
+    assert np.isnat(stamps[2])
+    assert pd.Timestamp(stamps[1]) == pd.Timestamp("2000-01-01")
+
+    periods = year_to_period(years)
+    assert periods.freqstr.startswith("Y")
+    assert list(periods.year[[0, 1, 3]]) == [1960, 2000, 2023]
+    assert pd.isna(periods[2])
+    pd.testing.assert_index_equal(year_to_period(np.array([2001, 2002], dtype=np.int16)),
+                                  pd.PeriodIndex(["2001", "2002"], freq="Y"))
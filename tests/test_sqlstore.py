@@ -0,0 +1,87 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from income_health.sqlstore import SQLStore
+
+
+@pytest.fixture
+def store():
+    store = SQLStore(":memory:")
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def wdi():
+    return pd.DataFrame({
+        "Country Name": ["Afghanistan", "Albania", "Algeria"],
+        "Country Code": ["AFG", "ALB", "DZA"],
+        "Indicator Name": "GDP (current US$)",
+        "Indicator Code": "NY.GDP.MKTP.CD",
+        2020: [1.0, 2.0, 3.0],
+        2021: [1.5, None, 3.5],
+    })
+
+
+@pytest.fixture
+def gho():
+    return pd.DataFrame({
+        "SpatialDim": ["AFG", "AFG", "ALB", "DZA"],
+        "ParentLocationCode": ["EMR", "EMR", "EUR", "AFR"],
+        "TimeDim": [2020, 2021, 2020, 2020],
+        "Value": [60.0, 58.0, 9.0, 20.0],
+    })
+
+
+def test_query_wide_and_long(store, wdi, gho):
+    assert store.load_wdi(wdi) == 5
+    assert store.load_gho(gho, "MORT_100") == 4
+    table = store.query(["NY.GDP.MKTP.CD", "MORT_100"], years=(2020, 2020))
+    assert list(table.columns) == ["country", "year", "NY.GDP.MKTP.CD", "MORT_100"]
+    assert table["country"].tolist() == ["AFG", "ALB", "DZA"]
+    long = store.query(["MORT_100"], countries=["AFG"], wide=False)
+    assert long["value"].tolist() == [60.0, 58.0]
+
+
+def test_empty_filters_return_empty_results(store, wdi):
+    store.load_wdi(wdi)
+    assert store.query([]).empty
+    empty = store.query(["NY.GDP.MKTP.CD"], countries=[])
+    assert empty.empty and list(empty.columns) == ["country", "year", "NY.GDP.MKTP.CD"]
+    assert list(store.query(["NY.GDP.MKTP.CD"], countries=[], wide=False).columns) == \
+        ["country", "indicator", "year", "value"]
+    assert store.query(["UNKNOWN"]).empty
+    missing = store.query(["NY.GDP.MKTP.CD", "UNKNOWN"], years=(2021, 2021))
+    assert list(missing.columns) == ["country", "year", "NY.GDP.MKTP.CD", "UNKNOWN"]
+    assert missing["NY.GDP.MKTP.CD"].tolist() == [1.5, 3.5] and missing["UNKNOWN"].isna().all()
+
+
+def test_region_filter_needs_gho_regions(store, wdi, gho):
+    store.load_wdi(wdi)
+    with pytest.raises(ValueError, match="load_gho"):
+        store.query(["NY.GDP.MKTP.CD"], region="EMR")
+    store.load_gho(gho, "MORT_100")
+    store.load_wdi(wdi)  # a later WDI load keeps the regions
+    assert store.query(["NY.GDP.MKTP.CD"], region="EMR")["country"].unique().tolist() == ["AFG"]
+
+
+def test_reloads_upsert(store, wdi):
+    store.load_wdi(wdi)
+    changed = wdi.copy()
+    changed[2020] = [10.0, 20.0, 30.0]
+    store.load_wdi(changed)
+    table = store.query(["NY.GDP.MKTP.CD"], years=(2020, 2020))
+    assert table["NY.GDP.MKTP.CD"].tolist() == [10.0, 20.0, 30.0]
+
+
+def test_ids_and_countries_are_looked_up_in_batches(store):
+    # More codes than SQLite accepts as parameters of one statement.
+    store.connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    codes = [f"C{i:04d}" for i in range(1200)]
+    frame = pd.DataFrame({"Country Code": codes, "Year": 2020, "value": range(len(codes))})
+    assert store.load_observations(frame, "X") == len(codes)
+    assert len(store.query(["X"], countries=codes[::7], wide=False)) == len(codes[::7])
+    table = store.query(["X"], countries=codes[::-1])
+    assert table["country"].tolist() == codes and table["X"].tolist() == list(range(len(codes)))
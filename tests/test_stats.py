@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from income_health.stats import (Panel, _bootstrap_chunk, bootstrap_ci, lagged_correlation, pearson,
+                                 rolling_correlation, spearman, summarize)
+
+
+@pytest.fixture
+def panel_pair():
+    rng = np.random.default_rng(1)
+    x = rng.normal(size=(6, 12))
+    y = 0.6 * x + rng.normal(size=(6, 12))
+    y[0, :4] = np.nan
+    return x, y
+
+
+def test_bootstrap_ci_does_not_depend_on_workers(panel_pair):
+    x, y = panel_pair
+    results = [bootstrap_ci(x, y, n_boot=120, seed=7, workers=workers) for workers in (0, 1, 2, None)]
+    for other in results[1:]:
+        assert other["pooled"] == results[0]["pooled"]
+        np.testing.assert_array_equal(other["entity"][0], results[0]["entity"][0])
+        np.testing.assert_array_equal(other["entity"][1], results[0]["entity"][1])
+
+
+def test_bootstrap_ci_depends_on_seed(panel_pair):
+    x, y = panel_pair
+    assert bootstrap_ci(x, y, n_boot=60, seed=1, workers=0)["pooled"] != \
+        bootstrap_ci(x, y, n_boot=60, seed=2, workers=0)["pooled"]
+
+
+def test_bootstrap_resamples_only_observed_years():
+    x = np.array([[1.0, 2.0, 3.0, 4.0, 5.0, np.nan, np.nan, np.nan, np.nan, np.nan]])
+    y = 2 * x
+    # Every resample holds five observed pairs, so min_periods=5 is always met.
+    per_entity, pooled_stats = _bootstrap_chunk(x, y, reps=200, seed=3, method="pearson", min_periods=5)
+    finite = np.isfinite(per_entity[:, 0])
+    assert finite.mean() > 0.98
+    np.testing.assert_allclose(per_entity[finite, 0], 1.0)
+    np.testing.assert_allclose(pooled_stats[np.isfinite(pooled_stats)], 1.0)
+    with pytest.warns(RuntimeWarning, match="All-NaN"):
+        result = bootstrap_ci(np.full((1, 5), np.nan), np.ones((1, 5)), n_boot=10, workers=0)
+    assert np.isnan(result["entity"][0][0])
+
+
+def test_pearson_and_spearman_use_pairwise_observations():
+    x = np.array([[1.0, 2.0, 3.0, 4.0, np.nan], [1.0, 2.0, np.nan, np.nan, np.nan]])
+    y = np.array([[2.0, 4.0, 6.0, 100.0, 1.0], [3.0, 1.0, 2.0, 4.0, 5.0]])
+    expected = np.corrcoef(x[0, :4], y[0, :4])[0, 1]
+    r = pearson(x, y)
+    assert r[0] == pytest.approx(expected)
+    assert np.isnan(r[1])
+    assert spearman(x, y)[0] == pytest.approx(1.0)
+    assert pearson(x, y, min_periods=2)[1] == pytest.approx(-1.0)
+    assert pearson(x.T, y.T, axis=0)[0] == pytest.approx(expected)
+
+
+def test_rolling_and_lagged_correlation():
+    x = np.arange(8, dtype=np.float64)[None] ** 2
+    y = x.copy()
+    rolling = rolling_correlation(x, y, window=3)
+    assert rolling.shape == x.shape
+    assert np.isnan(rolling[0, :2]).all()
+    np.testing.assert_allclose(rolling[0, 2:], 1.0)
+    assert np.isnan(rolling_correlation(x[:, :2], y[:, :2], window=3)).all()
+
+    z = np.sin(np.arange(20.0))[None]
+    lead = np.roll(z, 2, axis=1)
+    lagged = lagged_correlation(z, lead, lags=[0, 2])
+    assert lagged.shape == (1, 2)
+    assert lagged[0, 1] == pytest.approx(1.0)
+    assert lagged[0, 0] < 0.9
+
+
+def test_summarize():
+    years = np.arange(2000, 2010)
+    frame = pd.DataFrame({
+        "Country Code": np.repeat(["AAA", "BBB"], len(years)),
+        "Year": np.tile(years, 2),
+        "GDP": np.concatenate([np.exp(np.arange(10.0)), np.full(10, np.nan)]),
+        "Mortality Rate": np.concatenate([100 - 3 * np.arange(10.0), np.arange(10.0)]),
+    })
+    summary = summarize(Panel.from_wide(frame, ["GDP", "Mortality Rate"]))
+    assert list(summary.index) == ["AAA", "BBB"]
+    assert summary.loc["AAA", "years"] == 10 and summary.loc["BBB", "years"] == 0
+    assert summary.loc["AAA", "pearson"] == pytest.approx(-1.0)
+    assert summary.loc["AAA", "spearman"] == pytest.approx(-1.0)
+    assert np.isnan(summary.loc["AAA", "growth_vs_change"])
+    assert summary.loc["BBB"].drop("years").isna().all()
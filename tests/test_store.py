@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from income_health.store import SnapshotStore  # noqa: E402
+
+
+@pytest.fixture
+def frame():
+    years = np.repeat(np.arange(2018, 2022, dtype="int16"), 3)
+    return pd.DataFrame({
+        "Country Code": pd.Categorical(["AFG", "ALB", "DZA"] * 4),
+        "Year": years,
+        "GDP": np.linspace(1e9, 2e9, len(years)),
+        "Mortality Rate": np.linspace(50, 20, len(years)),
+    })
+
+
+def test_round_trip_keeps_values_and_dtypes(tmp_path, frame):
+    store = SnapshotStore(tmp_path)
+    manifest = store.write("combined", frame, source="test", extra={"scope": {"years": [2018, 2021]}})
+    assert manifest["rows"] == len(frame)
+    assert sorted(manifest["partitions"]) == ["2018", "2019", "2020", "2021"]
+    assert store.manifest("combined")["extra"] == {"scope": {"years": [2018, 2021]}}
+
+    back = store.read("combined")
+    pd.testing.assert_frame_equal(back, frame, check_categorical=False)
+    assert isinstance(back["Country Code"].dtype, pd.CategoricalDtype)
+
+    some = store.read("combined", columns=["Year", "GDP"], partitions=[2020])
+    assert list(some.columns) == ["Year", "GDP"] and set(some["Year"]) == {2020}
+
+
+def test_identical_content_is_deduplicated(tmp_path, frame):
+    store = SnapshotStore(tmp_path)
+    first = store.write("combined", frame)
+    assert store.write("combined", frame.copy())["id"] == first["id"]
+    chunks = [frame.iloc[:5], frame.iloc[5:]]
+    assert store.write_chunks("combined", chunks)["partitions"] == first["partitions"]
+    assert len(store.snapshots("combined")) == 1
+
+
+def test_update_and_diff(tmp_path, frame):
+    store = SnapshotStore(tmp_path)
+    old = store.write("combined", frame)
+    changed = frame[frame["Year"] == 2020].assign(GDP=0.0)
+    added = frame[frame["Year"] == 2021].assign(Year=np.int16(2022))
+    new = store.update("combined", pd.concat([changed, added]))
+
+    assert store.diff("combined", old["id"], new["id"]) == {"added": ["2022"], "removed": [], "changed": ["2020"]}
+    assert new["partitions"]["2018"] == old["partitions"]["2018"]
+    pd.testing.assert_frame_equal(store.read("combined", snapshot=old["id"]), frame, check_categorical=False)
+    latest = store.read("combined")
+    assert len(latest) == len(frame) + 3
+    assert (latest.loc[latest["Year"] == 2020, "GDP"] == 0).all()
+
+    dropped = store.update("combined", frame[frame["Year"] == 2019], drop=[2018, 2019])
+    assert sorted(dropped["partitions"]) == ["2019", "2020", "2021", "2022"]
+    assert store.diff("combined", new["id"], dropped["id"])["removed"] == ["2018"]
+    assert dropped["rows"] == len(store.read("combined")) == len(latest) - 3
+
+
+def test_missing_dataset(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        SnapshotStore(tmp_path).read("combined")
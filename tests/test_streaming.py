@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from income_health.streaming import ColumnBuilder, ValueStream, iter_chunks, parse_gho_stream, read_count
+
+RECORDS = [
+    {"Id": 1, "SpatialDim": "AFG", "TimeDim": 2020, "Dim1": "SEX_MLE", "Value": "12.5", "NumericValue": 12.5},
+    {"Id": 2, "SpatialDim": "ALB", "TimeDim": None, "Dim1": "SEX_FMLE", "Value": "No data", "NumericValue": None},
+    {"Id": 3, "SpatialDim": "AFG", "TimeDim": 2021, "Value": "Ünïcode ✓", "NumericValue": 7},
+]
+
+
+def payload(records=RECORDS, count=True) -> bytes:
+    body = {"@odata.context": "x"}
+    if count:
+        body["@odata.count"] = len(records)
+    body["value"] = records
+    return json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64 * 1024])
+def test_value_stream_handles_any_chunking(size):
+    stream = ValueStream(iter_chunks(payload(), size))
+    assert list(stream) == RECORDS
+    assert stream.count == len(RECORDS)
+
+
+def test_value_stream_without_count_and_empty_array():
+    stream = ValueStream(iter_chunks(payload(count=False), 5))
+    assert len(list(stream)) == 3 and stream.count is None
+    assert list(ValueStream([b'{"value": [ ]}'])) == []
+
+
+def test_value_stream_rejects_truncated_payloads():
+    with pytest.raises(ValueError, match="no 'value' array"):
+        list(ValueStream([b'{"error": "throttled"}']))
+    with pytest.raises(ValueError, match="ended inside"):
+        list(ValueStream(iter_chunks(payload()[:-10], 8)))
+
+
+def test_read_count():
+    assert read_count(payload()) == 3
+    assert read_count(payload(count=False)) is None
+
+
+def test_parse_gho_stream_types_columns():
+    frame = parse_gho_stream(iter_chunks(payload(), 4), ["SpatialDim", "TimeDim", "Dim1", "Value", "NumericValue"])
+    assert list(frame.columns) == ["SpatialDim", "TimeDim", "Dim1", "Value", "NumericValue"]
+    assert isinstance(frame["SpatialDim"].dtype, pd.CategoricalDtype)
+    assert frame["SpatialDim"].tolist() == ["AFG", "ALB", "AFG"]
+    assert frame["TimeDim"].dtype == "Int64" and frame["TimeDim"].isna().tolist() == [False, True, False]
+    assert frame["Dim1"].isna().tolist() == [False, False, True]
+    np.testing.assert_array_equal(frame["NumericValue"], [12.5, np.nan, 7.0])
+    assert frame["Value"].tolist() == ["12.5", "No data", "Ünïcode ✓"]
+
+
+def test_column_builder_grows_past_its_capacity():
+    builder = ColumnBuilder(["Id", "SpatialDim"], capacity=1)
+    assert builder.extend(RECORDS * 10) == 30
+    frame = builder.to_frame()
+    assert len(frame) == 30 and frame["Id"].tolist() == [1, 2, 3] * 10
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from income_health.wdi import ID_COLUMNS, load_wdi, read_wdi_header, year_columns
+
+WDI_FILE = Path(__file__).resolve().parent.parent / "API_NY.GDP.MKTP.CD_DS2_en_csv_v2_2.csv"
+
+
+def test_header_skips_the_preamble():
+    header = read_wdi_header(WDI_FILE)
+    assert header.skiprows == 4
+    assert header.columns[:4] == list(ID_COLUMNS)
+    assert header.metadata == {"Data Source": "World Development Indicators", "Last Updated Date": "11/13/2024"}
+    assert header.last_updated == "11/13/2024"
+    assert header.years[0] == 1960
+
+
+def test_load_matches_read_csv():
+    frame = load_wdi(WDI_FILE)
+    expected = pd.read_csv(WDI_FILE, skiprows=4)
+    expected = expected.drop(columns=[c for c in expected.columns if c.startswith("Unnamed")])
+    assert [str(c) for c in frame.columns] == list(expected.columns)
+    pd.testing.assert_frame_equal(frame.set_axis(expected.columns, axis=1), expected, check_dtype=False)
+    assert frame.attrs["wdi"]["Last Updated Date"] == "11/13/2024"
+
+
+def test_years_are_pushed_down():
+    frame = load_wdi(WDI_FILE, years=(2015, 2020))
+    assert year_columns(frame) == list(range(2015, 2021))
+    assert all(frame[y].dtype == np.float64 for y in year_columns(frame))
+    full = load_wdi(WDI_FILE)
+    pd.testing.assert_frame_equal(frame, full[list(ID_COLUMNS) + list(range(2015, 2021))])
+    assert year_columns(load_wdi(WDI_FILE, years=(None, 1961))) == [1960, 1961]
+
+
+def test_headerless_bulk_file(tmp_path):
+    path = tmp_path / "WDICSV.csv"
+    path.write_text(
+        "Country Name,Country Code,Indicator Name,Indicator Code,2000,2001,\n"
+        "Aruba,ABW,GDP (current US$),NY.GDP.MKTP.CD,1.5,,\n"
+        "Aruba,ABW,\"Mortality rate, infant\",SP.DYN.IMRT.IN,,7.25,\n")
+    header = read_wdi_header(path)
+    assert header.skiprows == 0 and header.metadata == {}
+    frame = load_wdi(path, id_columns=("Country Code", "Indicator Code"))
+    assert list(frame.columns) == ["Country Code", "Indicator Code", 2000, 2001]
+    assert frame[2000].tolist()[0] == 1.5 and np.isnan(frame[2000].tolist()[1])
+    assert frame[2001].tolist()[1] == 7.25
+
+
+def test_not_a_wdi_file(tmp_path):
+    path = tmp_path / "other.csv"
+    path.write_text("a,b\n1,2\n")
+    with pytest.raises(ValueError, match="does not look like a WDI file"):
+        read_wdi_header(path)
+    with pytest.raises(ValueError, match="missing identifier columns"):
+        load_wdi(WDI_FILE, id_columns=("Country Code", "Region"))